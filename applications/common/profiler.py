@@ -0,0 +1,212 @@
+"""
+Profiling of the running applications: a stack sampler, a memory tracer and the /admin endpoints of the web guis
+that control them. Shared by the applications, their web guis add applications/ to the path to import it.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+import math
+import tracemalloc
+
+# Shortest interval of the stack sampler in seconds, a shorter one would keep the GIL away from the application
+MIN_INTERVAL = 0.001
+
+
+class StackSampler:
+    """
+    A sampling profiler for a running process. A daemon thread reads the current stack of every other thread
+    with sys._current_frames every interval seconds and counts the collapsed stacks, so the profiled code is not
+    instrumented and the overhead only depends on the sampling rate.
+
+    The result is in the collapsed format of flamegraph.pl and speedscope: one "thread;outer;...;inner count"
+    line per distinct stack.
+
+    :param interval: Seconds between two samples
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._counts = collections.Counter()
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._running
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return '%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            stacks.append(';'.join(reversed(stack)))
+        with self._lock:
+            self._counts.update(stacks)
+            self.samples += 1
+
+    def _run(self):
+        next_sample = time.perf_counter()
+        while self._running:
+            self._sample()
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Sampling took longer than the interval, skip the missed samples instead of catching up
+                next_sample = time.perf_counter()
+
+    def start(self):
+        """ Clear the counts and start sampling, returns False if the sampler is already running. """
+        if self._running:
+            return False
+        with self._lock:
+            self._counts.clear()
+            self.samples = 0
+        self.started_at = time.time()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """ Stop sampling and return the collapsed stacks. """
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.collapsed()
+
+    def collapsed(self):
+        """ Return the collapsed stacks that were counted so far, the most frequent first. """
+        with self._lock:
+            return ''.join('%s %d\n' % (stack, count) for stack, count in self._counts.most_common())
+
+
+class MemoryTracer:
+    """
+    Compare the memory allocations of the process to a baseline with tracemalloc.
+
+    baseline starts tracing if it is not running and takes the baseline snapshot, diff takes a new snapshot and
+    returns the source lines whose allocated size grew the most since the baseline. Tracing slows down every
+    allocation, so it only runs between baseline and stop.
+
+    :param frames: Number of frames of the traceback that is stored for every allocation
+    """
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self._baseline = None
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def baseline(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._baseline = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        return {"traced_bytes": current, "peak_bytes": peak}
+
+    def diff(self, top=20):
+        """
+        Returns:
+            A dictionary with the traced and peak bytes and the top statistics ordered by the size difference,
+            or None if no baseline was taken
+        """
+        if self._baseline is None or not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        statistics = snapshot.compare_to(self._baseline, 'lineno')
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [{
+                "location": str(statistic.traceback[0]),
+                "size_diff": statistic.size_diff,
+                "size": statistic.size,
+                "count_diff": statistic.count_diff,
+                "count": statistic.count,
+            } for statistic in statistics[:top]],
+        }
+
+    def stop(self):
+        self._baseline = None
+        tracemalloc.stop()
+
+
+def register_admin_routes(app):
+    """
+    Register the profiling endpoints on a flask app. The endpoints that change the state of the process only
+    accept POST, the memory diff is a GET. They are not authenticated, so the applications only register them when
+    they are enabled in the config.
+    """
+    from flask import Response, jsonify, request
+
+    sampler = StackSampler()
+    memory_tracer = MemoryTracer()
+
+    @app.route("/admin/profile/start", methods=['POST'])
+    def profile_start():
+        # Start the stack sampler, the interval query parameter sets the seconds between two samples
+        if sampler.running:
+            return Response("The profiler is already running", status=409)
+        try:
+            interval = float(request.args.get("interval", sampler.interval))
+        except ValueError:
+            return Response("The interval must be a number of seconds", status=400)
+        if not interval > 0 or math.isinf(interval):
+            return Response("The interval must be a positive number of seconds", status=400)
+        sampler.interval = max(interval, MIN_INTERVAL)
+        if not sampler.start():
+            return Response("The profiler is already running", status=409)
+        return jsonify({"interval": sampler.interval})
+
+    @app.route("/admin/profile/stop", methods=['POST'])
+    def profile_stop():
+        # Stop the stack sampler and return the collapsed stacks, e.g. for flamegraph.pl or speedscope
+        if not sampler.running:
+            return Response("The profiler is not running", status=409)
+        return Response(sampler.stop(), mimetype="text/plain")
+
+    @app.route("/admin/memory/baseline", methods=['POST'])
+    def memory_baseline():
+        # Start tracemalloc if needed and take the snapshot that later diffs are compared to
+        return jsonify(memory_tracer.baseline())
+
+    @app.route("/admin/memory/diff", methods=['GET'])
+    def memory_diff():
+        # Return the source lines whose allocations grew the most since the baseline
+        try:
+            top = int(request.args.get("top", 20))
+        except ValueError:
+            return Response("top must be an integer", status=400)
+        diff = memory_tracer.diff(top)
+        if diff is None:
+            return Response("No memory baseline was taken", status=409)
+        return jsonify(diff)
+
+    @app.route("/admin/memory/stop", methods=['POST'])
+    def memory_stop():
+        memory_tracer.stop()
+        return jsonify({"tracing": memory_tracer.tracing})
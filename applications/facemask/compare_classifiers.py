@@ -0,0 +1,90 @@
+from configs.config_handler import Config
+import cv2 as cv
+import numpy as np
+from argparse import ArgumentParser
+import os
+import time
+
+
+def load_images(image_dir, input_size):
+    """
+    Read the images of a directory, or of its class subdirectories, resized to the classifier input.
+    The labels are the indices of the sorted subdirectories like the ones of the training data loader,
+    they are None if the images are not in subdirectories.
+    """
+    classes = sorted(name for name in os.listdir(image_dir) if os.path.isdir(os.path.join(image_dir, name)))
+    folders = [os.path.join(image_dir, name) for name in classes] if classes else [image_dir]
+    images, labels = [], []
+    for label, folder in enumerate(folders):
+        for filename in sorted(os.listdir(folder)):
+            image = cv.imread(os.path.join(folder, filename))
+            if image is None:
+                continue
+            image = cv.cvtColor(cv.resize(image, (input_size, input_size)), cv.COLOR_BGR2RGB)
+            images.append(image / 255.0)
+            labels.append(label)
+    return np.array(images, dtype=np.float32), (np.array(labels) if classes else None), classes
+
+
+def measure_latency(classifier, images, batch_size, repeat):
+    """ Return the median milliseconds of classifying one batch of batch_size images. """
+    batch = images[np.arange(batch_size) % len(images)]
+    classifier.predict(batch)  # Warm up
+    times = []
+    for _ in range(repeat):
+        t_begin = time.perf_counter()
+        classifier.predict(batch)
+        times.append(time.perf_counter() - t_begin)
+    return 1000 * np.median(times)
+
+
+def main():
+    """
+    Compare the TFLite backend of the x86 face mask classifier to the keras model: the agreement of the labels,
+    the difference of the class probabilities, the accuracy when the images are in class subdirectories and the
+    latency of different batch sizes.
+    Example: python compare_classifiers.py --config configs/config-x86.json --image_dir datasets/data/validation
+    """
+    argparse = ArgumentParser()
+    argparse.add_argument('--config', type=str, help='json config file path')
+    argparse.add_argument('--image_dir', type=str, help='the directory of face images, defaults to the validation '
+                                                        'folder of the dataset')
+    argparse.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 4, 16, 64],
+                          help='batch sizes of the latency measurement')
+    argparse.add_argument('--repeat', type=int, default=50, help='timed batches of every batch size')
+    args = argparse.parse_args()
+
+    cfg = Config(path=args.config)
+    image_dir = args.image_dir or os.path.join(cfg.PATH, cfg.VALID_FOLDER)
+    images, labels, classes = load_images(image_dir, cfg.CLASSIFIER_INPUT_SIZE)
+    if len(images) == 0:
+        print('No images were found under: ', image_dir)
+        exit(1)
+    print("INFO: Comparing the classifiers on %d images of %s" % (len(images), image_dir))
+
+    from libs.classifiers.x86 import face_mask, face_mask_tflite
+    classifiers = {"keras": face_mask.Classifier(cfg), "tflite": face_mask_tflite.Classifier(cfg)}
+    print("INFO: The TFLite model is: ", classifiers["tflite"].model_path)
+
+    probabilities = {name: classifier.predict(images) for name, classifier in classifiers.items()}
+    predictions = {name: np.argmax(output, axis=1) for name, output in probabilities.items()}
+    difference = np.abs(probabilities["keras"] - probabilities["tflite"])
+    agreement = np.mean(predictions["keras"] == predictions["tflite"])
+    print("label agreement: %.4f (%d of %d differ)" % (
+        agreement, np.sum(predictions["keras"] != predictions["tflite"]), len(images)))
+    print("probability difference: max %.2e, mean %.2e" % (difference.max(), difference.mean()))
+    if labels is not None:
+        print("class IDs: ", {name: i for i, name in enumerate(classes)})
+        for name, prediction in predictions.items():
+            print("%s accuracy: %.4f" % (name, np.mean(prediction == labels)))
+
+    print('%-10s %12s %12s %8s' % ('batch', 'keras_ms', 'tflite_ms', 'speedup'))
+    for batch_size in args.batch_sizes:
+        latency = {name: measure_latency(classifier, images, batch_size, args.repeat)
+                   for name, classifier in classifiers.items()}
+        print('%-10d %12.3f %12.3f %7.2fx' % (batch_size, latency["keras"], latency["tflite"],
+                                              latency["keras"] / latency["tflite"]))
+
+
+if __name__ == '__main__':
+    main()
@@ -33,16 +33,42 @@ class Config:
         self.CLASSIFIER_NAME = self._config["classifier"]["name"]
         self.CLASSIFIER_MODEL_PATH = self._config["classifier"]["model_path"]
         self.CLASSIFIER_INPUT_SIZE = self._config["classifier"]["input_size"]
+        # Optional TFLite backend of the x86 classifier, num_threads 0 uses all of the cores
+        self.CLASSIFIER_BACKEND = self._config["classifier"].get("backend", "keras")
+        self.CLASSIFIER_NUM_THREADS = self._config["classifier"].get("num_threads", 0)
+        self.CLASSIFIER_XNNPACK = self._config["classifier"].get("xnnpack", True)
+        self.CLASSIFIER_CACHE_DIRECTORY = self._config["classifier"].get("cache_directory",
+                                                                         "data/classifiers/x86/tflite")
 
         self.DETECTOR_NAME = self._config["detector"]["name"]
         self.DETECTOR_MODEL_PATH = self._config["detector"]["model_path"]
         self.DETECTOR_INPUT_SIZE = self._config["detector"]["input_size"]
+        # Number of synthetic faces of the Dummy device
+        self.DETECTOR_CROWD_SIZE = self._config["detector"].get("crowd_size", 10)
+        # Optional face sizes in pixels of the detector input and adaptive scale pruning of the tinyface detector
+        self.DETECTOR_MIN_FACE_SIZE = self._config["detector"].get("min_face_size", 0)
+        self.DETECTOR_MAX_FACE_SIZE = self._config["detector"].get("max_face_size", None)
+        self.DETECTOR_ADAPTIVE_SCALES = self._config["detector"].get("adaptive_scales", False)
+        self.DETECTOR_SCALE_WINDOW = self._config["detector"].get("scale_window", 100)
+        self.DETECTOR_SCALE_PROBE_INTERVAL = self._config["detector"].get("scale_probe_interval", 10)
+        self.DETECTOR_MIN_SCALE_HIT_RATE = self._config["detector"].get("min_scale_hit_rate", 0.05)
+
+        # Optional tracker that caches the classifier labels of the faces and votes over them
+        tracker = self._config.get("tracker", {})
+        self.TRACKER_ENABLED = tracker.get("enabled", False)
+        self.TRACKER_RECLASSIFY_INTERVAL = tracker.get("reclassify_interval", 5)
+        self.TRACKER_VOTE_WINDOW = tracker.get("vote_window", 5)
+        self.TRACKER_APPEARANCE_THRESHOLD = tracker.get("appearance_threshold", 0.1)
+        self.TRACKER_MIN_IOU = tracker.get("min_iou", 0.3)
+        self.TRACKER_MAX_DISAPPEARED = tracker.get("max_disappeared", 5)
 
         self.DEVICE = self._config["app"]["device"]
         self.APP_VIDEO_PATH = self._config["app"]["video_path"]
         self.APP_VIDEO_RESOLUTION = self._config["app"]["resolution"]
         self.APP_HOST = self._config["app"]["host"]
         self.APP_PORT = self._config["app"]["port"]
+        # Optional profiling endpoints under /admin of the web gui
+        self.APP_ADMIN_ENDPOINTS = self._config["app"].get("admin_endpoints", False)
         
     def _file_loader(self) -> dict:
         """
@@ -1,6 +1,7 @@
 from configs.config_handler import Config
 import cv2 as cv
 import numpy as np
+from libs.utils.face_crops import FaceCropper
 from argparse import ArgumentParser
 import os
 
@@ -35,7 +36,6 @@ def main():
     print("INFO: The output images will be exported at: ", output_dir)
 
     detector_input_size = (cfg.DETECTOR_INPUT_SIZE[0], cfg.DETECTOR_INPUT_SIZE[1], 3)
-    classifier_img_size = (cfg.CLASSIFIER_INPUT_SIZE, cfg.CLASSIFIER_INPUT_SIZE, 3)
 
     device = cfg.DEVICE
     detector = None
@@ -53,34 +53,19 @@ def main():
 
     detector = Detector(cfg)
     classifier_model = Classifier(cfg)
+    face_cropper = FaceCropper(cfg.CLASSIFIER_INPUT_SIZE)
 
     print("INFO: Start inferencing")
     for filename in os.listdir(input_dir):
         image_path = os.path.join(input_dir, filename)
         raw_img = cv.imread(image_path)
         if np.shape(raw_img) != ():
-            height, width, _ = raw_img.shape
             resized_image = cv.resize(raw_img, tuple(detector_input_size[:2]))
             rgb_resized_image = cv.cvtColor(resized_image, cv.COLOR_BGR2RGB)
             objects_list = detector.inference(rgb_resized_image)
-            faces = []
-            cordinates = []
-            for obj in objects_list:
-                if 'bbox' in obj.keys():
-                    face_bbox = obj['bbox']  # [ymin, xmin, ymax, xmax]
-                    xmin, xmax = np.multiply([face_bbox[1], face_bbox[3]], width)
-                    ymin, ymax = np.multiply([face_bbox[0], face_bbox[2]], height)
-                    croped_face = raw_img[int(ymin):int(ymin) + (int(ymax) - int(ymin)),
-                                  int(xmin):int(xmin) + (int(xmax) - int(xmin))]
-                    # Resizing input image
-                    croped_face = cv.resize(croped_face, tuple(classifier_img_size[:2]))
-                    croped_face = cv.cvtColor(croped_face, cv.COLOR_BGR2RGB)
-                    # Normalizing input image to [0.0-1.0]
-                    croped_face = croped_face / 255.0
-                    faces.append(croped_face)
-                    cordinates.append([int(xmin), int(ymin), int(xmax), int(ymax)])
-
-            faces = np.array(faces)
+            bboxes = [obj['bbox'] for obj in objects_list if 'bbox' in obj.keys()]  # [ymin, xmin, ymax, xmax]
+            faces, rois, _ = face_cropper.crop(raw_img, bboxes)
+            cordinates = rois.tolist()  # [xmin, ymin, xmax, ymax]
             if np.shape(faces)[0] == 0:
                 print("can not find face at ".image_path)
                 continue
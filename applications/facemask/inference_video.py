@@ -1,6 +1,7 @@
 from configs.config_handler import Config
 import cv2 as cv
 import numpy as np
+from libs.utils.face_crops import FaceCropper
 from argparse import ArgumentParser
 import os
 
@@ -38,7 +39,6 @@ def main():
     print("INFO: The output video will be exported at: ", output_path)
 
     detector_input_size = (cfg.DETECTOR_INPUT_SIZE[0], cfg.DETECTOR_INPUT_SIZE[1], 3)
-    classifier_img_size = (cfg.CLASSIFIER_INPUT_SIZE, cfg.CLASSIFIER_INPUT_SIZE, 3)
 
     device = cfg.DEVICE
     detector = None
@@ -57,6 +57,7 @@ def main():
 
     detector = Detector(cfg)
     classifier_model = Classifier(cfg)
+    face_cropper = FaceCropper(cfg.CLASSIFIER_INPUT_SIZE)
     input_cap = cv.VideoCapture(input_path)
 
     print("INFO: Start inferencing")
@@ -75,24 +76,9 @@ def main():
             resized_image = cv.resize(cv_image, tuple(detector_input_size[:2]))
             rgb_resized_image = cv.cvtColor(resized_image, cv.COLOR_BGR2RGB)
             objects_list = detector.inference(rgb_resized_image)
-            faces = []
-            cordinates = []
-            for obj in objects_list:
-                if 'bbox' in obj.keys():
-                    face_bbox = obj['bbox']  # [ymin, xmin, ymax, xmax]
-                    xmin, xmax = np.multiply([face_bbox[1], face_bbox[3]], width)
-                    ymin, ymax = np.multiply([face_bbox[0], face_bbox[2]], height)
-                    croped_face = cv_image[int(ymin):int(ymin) + (int(ymax) - int(ymin)),
-                                  int(xmin):int(xmin) + (int(xmax) - int(xmin))]
-                    # Resizing input image
-                    croped_face = cv.resize(croped_face, tuple(classifier_img_size[:2]))
-                    croped_face = cv.cvtColor(croped_face, cv.COLOR_BGR2RGB)
-                    # Normalizing input image to [0.0-1.0]
-                    croped_face = croped_face / 255.0
-                    faces.append(croped_face)
-                    cordinates.append([int(xmin), int(ymin), int(xmax), int(ymax)])
-
-            faces = np.array(faces)
+            bboxes = [obj['bbox'] for obj in objects_list if 'bbox' in obj.keys()]  # [ymin, xmin, ymax, xmax]
+            faces, rois, _ = face_cropper.crop(cv_image, bboxes)
+            cordinates = rois.tolist()  # [xmin, ymin, xmax, ymax]
             face_mask_results, scores = classifier_model.inference(faces)
             for i, cor in enumerate(cordinates):
                 if face_mask_results[i] == 1:
@@ -104,7 +90,9 @@ def main():
 
                 cv.rectangle(raw_img, (cor[0], cor[1]), (cor[2], cor[3]), color, 2)
             output_vidwriter.write(raw_img)
-            print('{} Frames number are processed. {} fps'.format(frame_id, detector.fps))
+            classifier_latency = getattr(classifier_model, 'latency', None)
+            print('{} Frames number are processed. {} fps, classifier {} ms'.format(
+                frame_id, detector.fps, None if classifier_latency is None else round(1000 * classifier_latency, 1)))
             frame_id = frame_id + 1
         else:
             continue
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+class Classifier:
+    """
+    Classifies faces without a model: a face is a "Mask" (0) when the mean of its normalized crop is above 0.5,
+    otherwise a "Face" (1). It keeps the interface of the other classifiers so the app can run on machines
+    without the classifier runtimes.
+
+    :param config: Is a Config instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.name = self.config.CLASSIFIER_NAME
+        self.fps = None
+
+    def inference(self, resized_rgb_image):
+        """
+        Args:
+            resized_rgb_image: Array of images with shape (no_images, img_height, img_width, channels)
+        Returns:
+            result: List of class id for each input image. ex: [0, 0, 1, 1, 0]
+            scores: The classification confidence for each class. ex: [.99, .75, .80, 1.0]
+        """
+        if np.shape(resized_rgb_image)[0] == 0:
+            return [], []
+        means = np.asarray(resized_rgb_image, dtype=np.float32).reshape(len(resized_rgb_image), -1).mean(axis=1)
+        result = list(np.where(means > 0.5, 0, 1))
+        scores = list(0.5 + np.abs(means - 0.5))
+        return result, scores
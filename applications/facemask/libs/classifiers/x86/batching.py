@@ -0,0 +1,79 @@
+import abc
+import time
+from collections import deque
+
+import numpy as np
+from libs.utils.fps_calculator import convert_infr_time_to_fps
+
+# Batch sizes that the backends are built for, batches of faces are zero padded to the next bucket
+BATCH_BUCKETS = (1, 4, 16, 64)
+# Number of frames in the latency report
+LATENCY_WINDOW = 100
+
+
+class BucketedClassifier(abc.ABC):
+    """
+    Base class of the x86 classifier backends that run fixed size batches. A batch of faces is split into chunks
+    of the largest bucket and every chunk is padded to the smallest bucket that fits it, so a backend never has to
+    be traced or reallocated for a new batch size while the video is processed.
+
+    This module must not import TensorFlow, the TFLite backend is used on nodes where only tflite_runtime is
+    installed. A backend implements _run_bucket, a backend without it can not be created.
+    """
+
+    def __init__(self):
+        # Frames Per Second
+        self.fps = None
+        # Seconds of the last inference and of the last LATENCY_WINDOW frames
+        self.latency = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @abc.abstractmethod
+    def _run_bucket(self, bucket, chunk):
+        """
+        Copy a chunk of at most `bucket` images to the input batch of the bucket, run the model and return the
+        class probabilities of the whole batch. The rows after the chunk may keep older faces, their outputs are
+        dropped.
+        """
+        raise NotImplementedError
+
+    def predict(self, images):
+        """ Return the class probabilities of any number of images, in chunks of the largest bucket. """
+        outputs = []
+        largest_bucket = BATCH_BUCKETS[-1]
+        for begin in range(0, len(images), largest_bucket):
+            chunk = images[begin:begin + largest_bucket]
+            bucket = next(bucket for bucket in BATCH_BUCKETS if bucket >= len(chunk))
+            outputs.append(self._run_bucket(bucket, chunk)[:len(chunk)])
+        return np.concatenate(outputs)
+
+    def inference(self, resized_rgb_image):
+        """
+        Inference function sets input tensor to input image and gets the output.
+        The interpreter instance provides corresponding class id output which is used for creating result
+        Args:
+            resized_rgb_image: Array of images with shape (no_images, img_height, img_width, channels)
+        Returns:
+            result: Array of class id for each input image. ex: [0, 0, 1, 1, 0]
+            scores: The classification confidence for each class. ex: [.99, .75, .80, 1.0]
+        """
+        if np.shape(resized_rgb_image)[0] == 0:
+            return [], []
+        t_begin = time.perf_counter()
+        output = self.predict(resized_rgb_image)
+        inference_time = time.perf_counter() - t_begin  # Seconds
+        # Calculate Frames rate (fps)
+        self.fps = convert_infr_time_to_fps(inference_time)
+        self.latency = inference_time
+        self._latencies.append(inference_time)
+
+        result = np.argmax(output, axis=1)  # returns class id
+        scores = np.take_along_axis(output, result[:, np.newaxis], axis=1)[:, 0]
+        return result, scores
+
+    def latency_report(self):
+        """ Return the last, mean and 95th percentile classification latency per frame in milliseconds. """
+        if len(self._latencies) == 0:
+            return None
+        latencies = 1000 * np.array(self._latencies)
+        return {"last_ms": latencies[-1], "mean_ms": latencies.mean(), "p95_ms": np.percentile(latencies, 95)}
@@ -9,8 +9,16 @@ class Classifier:
     def __init__(self, config):
         self.config = config
         self.name = self.config.CLASSIFIER_NAME
+        # Seconds of the last inference
+        self.latency = None
 
-        if self.name == 'OFMClassifier':
+        if self.name == 'OFMClassifier' and self.config.CLASSIFIER_BACKEND == 'tflite':
+            # Does not import tensorflow when the converted model is already cached
+            from libs.classifiers.x86 import face_mask_tflite
+            self.net = face_mask_tflite.Classifier(self.config)
+        elif self.name == 'OFMClassifier' and self.config.CLASSIFIER_BACKEND != 'keras':
+            raise ValueError('Not supported classifier backend: ', self.config.CLASSIFIER_BACKEND)
+        elif self.name == 'OFMClassifier':
             from libs.classifiers.x86 import face_mask
             self.net = face_mask.Classifier(self.config)
         else:
@@ -19,4 +27,8 @@ class Classifier:
     def inference(self, resized_rgb_image):
         self.fps = self.net.fps
         output, scores = self.net.inference(resized_rgb_image)
+        self.latency = self.net.latency
         return output, scores
+
+    def latency_report(self):
+        return self.net.latency_report()
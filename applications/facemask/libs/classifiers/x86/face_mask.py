@@ -2,12 +2,11 @@ import tensorflow as tf
 import numpy as np
 import pathlib
 import os
-import time
 import wget
-from libs.utils.fps_calculator import convert_infr_time_to_fps
+from libs.classifiers.x86.batching import BATCH_BUCKETS, BucketedClassifier
 
 
-class Classifier:
+class Classifier(BucketedClassifier):
     """
     Perform image classification with the given model. The model is a .h5 file
     which if the classifier can not find it at the path it will download it
@@ -16,6 +15,7 @@ class Classifier:
     """
 
     def __init__(self, config):
+        super().__init__()
         self.config = config
         self.model_name = "OFMClassifier.h5"
 
@@ -32,33 +32,34 @@ class Classifier:
             print("model does not exist under: ", self.model_path, 'downloading from ', url)
             wget.download(url, self.model_path)
 
-        self.classifier_model = tf.keras.models.load_model(self.model_path)
-        # Frames Per Second
-        self.fps = None
+        self.classifier_model = tf.keras.models.load_model(self.model_path, compile=False)
 
-    def inference(self, resized_rgb_image) -> list:
-        """
-        Inference function sets input tensor to input image and gets the output.
-        The interpreter instance provides corresponding class id output which is used for creating result
-        Args:
-            resized_rgb_image: Array of images with shape (no_images, img_height, img_width, channels)
-        Returns:
-            result: List of class id for each input image. ex: [0, 0, 1, 1, 0]
-            scores: The classification confidence for each class. ex: [.99, .75, .80, 1.0]
-        """
-        if np.shape(resized_rgb_image)[0] == 0:
-            return [], []
-        # input_image = np.expand_dims(resized_rgb_image, axis=0)
-        t_begin = time.perf_counter()
-        output_dict = self.classifier_model.predict(resized_rgb_image)
-        inference_time = time.perf_counter() - t_begin  # Seconds
-        # Calculate Frames rate (fps)
-        self.fps = convert_infr_time_to_fps(inference_time)
-        result = list(np.argmax(output_dict, axis=1))  # returns class id
-
-        # TODO: optimized without for
-        scores = []
-        for i, itm in enumerate(output_dict):
-            scores.append(itm[result[i]])
+        # One input batch and one traced function per bucket, a batch of faces is padded to the smallest bucket
+        # that fits it, so the model is never traced again while the video is processed
+        input_size = config.CLASSIFIER_INPUT_SIZE
+        self._padded_batches = {bucket: np.zeros((bucket, input_size, input_size, 3), dtype=np.float32)
+                                for bucket in BATCH_BUCKETS}
+        self._eager = tf.executing_eagerly()
+        if self._eager:
+            serve = tf.function(lambda images: self.classifier_model(images, training=False))
+            self._functions = {bucket: serve.get_concrete_function(
+                tf.TensorSpec([bucket, input_size, input_size, 3], tf.float32)) for bucket in BATCH_BUCKETS}
+        else:
+            # Graph mode (TF 1.x): one placeholder and output tensor per bucket, run by the session of keras
+            self._session = tf.compat.v1.keras.backend.get_session()
+            self._graph_inputs = {}
+            self._graph_outputs = {}
+            for bucket in BATCH_BUCKETS:
+                self._graph_inputs[bucket] = tf.compat.v1.placeholder(
+                    tf.float32, [bucket, input_size, input_size, 3])
+                self._graph_outputs[bucket] = self.classifier_model(self._graph_inputs[bucket])
+        for bucket in BATCH_BUCKETS:
+            self._run_bucket(bucket, self._padded_batches[bucket])
 
-        return result, scores
+    def _run_bucket(self, bucket, chunk):
+        """ Run the model on the padded batch of a bucket and return the class probabilities. """
+        padded_batch = self._padded_batches[bucket]
+        padded_batch[:len(chunk)] = chunk
+        if self._eager:
+            return self._functions[bucket](tf.constant(padded_batch)).numpy()
+        return self._session.run(self._graph_outputs[bucket], feed_dict={self._graph_inputs[bucket]: padded_batch})
@@ -0,0 +1,119 @@
+import hashlib
+import os
+
+import wget
+from libs.classifiers.x86.batching import BucketedClassifier
+
+MODEL_URL = 'https://github.com/neuralet/neuralet-models/raw/master/amd64/OFMClassifier/OFMClassifier.h5'
+
+
+def file_hash(path):
+    """ Return a short sha256 hash of the content of a file. """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as model_file:
+        for chunk in iter(lambda: model_file.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()[:16]
+
+
+def convert_to_tflite(h5_path, cache_directory):
+    """
+    Convert a keras .h5 model to a float32 TFLite model and return the path of the .tflite file. The converted
+    model is cached under the hash of the .h5 file, so TensorFlow is only imported the first time a model is seen.
+    """
+    name = os.path.splitext(os.path.basename(h5_path))[0]
+    tflite_path = os.path.join(cache_directory, '%s_%s.tflite' % (name, file_hash(h5_path)))
+    if os.path.isfile(tflite_path):
+        return tflite_path
+
+    import tensorflow as tf
+    print('converting ', h5_path, ' to ', tflite_path)
+    if hasattr(tf.lite.TFLiteConverter, 'from_keras_model'):
+        model = tf.keras.models.load_model(h5_path, compile=False)
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    else:
+        converter = tf.lite.TFLiteConverter.from_keras_model_file(h5_path)
+    tflite_model = converter.convert()
+    if not os.path.isdir(cache_directory):
+        os.makedirs(cache_directory)
+    # Write to a temporary file first so a concurrent reader never sees a partial model
+    temporary_path = tflite_path + '.tmp%d' % os.getpid()
+    with open(temporary_path, 'wb') as tflite_file:
+        tflite_file.write(tflite_model)
+    os.replace(temporary_path, tflite_path)
+    return tflite_path
+
+
+def _create_interpreter(model_path, num_threads, use_xnnpack):
+    """
+    Create a multithreaded TFLite interpreter, from tflite_runtime when it is installed so TensorFlow is not
+    imported. Recent builds apply the XNNPACK delegate by default, older builds do not know about op resolver
+    types and run with the builtin kernels only.
+    """
+    try:
+        from tflite_runtime import interpreter as tflite
+    except ImportError:
+        import tensorflow.lite as tflite
+    if not hasattr(tflite, 'OpResolverType'):
+        return tflite.Interpreter(model_path, num_threads=num_threads)
+    resolver_type = tflite.OpResolverType.AUTO if use_xnnpack else \
+        tflite.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    return tflite.Interpreter(model_path, num_threads=num_threads, experimental_op_resolver_type=resolver_type)
+
+
+class Classifier(BucketedClassifier):
+    """
+    Perform image classification on CPU with the TFLite version of the .h5 model. A .tflite model_path is used
+    as it is, otherwise the .h5 model (downloaded from neuralet repository if it is missing) is converted once
+    and cached by its hash, so nodes that only run inference need tflite_runtime but not TensorFlow when the
+    cache is shipped with them.
+
+    The model is resized with resize_tensor_input to every batch bucket that is used, each bucket has its own
+    interpreter so the tensors are never reallocated while the video is processed.
+
+    :param config: Is a Config instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        self.model_name = "OFMClassifier.h5"
+        self.input_size = config.CLASSIFIER_INPUT_SIZE
+        self.num_threads = config.CLASSIFIER_NUM_THREADS or os.cpu_count()
+        self.use_xnnpack = config.CLASSIFIER_XNNPACK
+
+        if config.CLASSIFIER_MODEL_PATH.endswith('.tflite') and os.path.isfile(config.CLASSIFIER_MODEL_PATH):
+            self.model_path = config.CLASSIFIER_MODEL_PATH
+        else:
+            if os.path.isfile(config.CLASSIFIER_MODEL_PATH):
+                h5_path = config.CLASSIFIER_MODEL_PATH
+            else:
+                h5_path = 'data/classifiers/x86/' + self.model_name
+                if not os.path.isdir(os.path.dirname(h5_path)):
+                    os.makedirs(os.path.dirname(h5_path))
+                if not os.path.isfile(h5_path):
+                    print("model does not exist under: ", h5_path, 'downloading from ', MODEL_URL)
+                    wget.download(MODEL_URL, h5_path)
+            self.model_path = convert_to_tflite(h5_path, config.CLASSIFIER_CACHE_DIRECTORY)
+
+        self._interpreters = {}
+
+    def _interpreter(self, bucket):
+        """ Return the interpreter of a batch bucket, its input view and its output index. """
+        if bucket not in self._interpreters:
+            interpreter = _create_interpreter(self.model_path, self.num_threads, self.use_xnnpack)
+            input_index = interpreter.get_input_details()[0]['index']
+            interpreter.resize_tensor_input(input_index, [bucket, self.input_size, self.input_size, 3])
+            interpreter.allocate_tensors()
+            # `tensor()` returns a function that gives a numpy view on the interpreter's internal buffer,
+            # the view must not be kept alive across invoke() calls so only the function is stored.
+            self._interpreters[bucket] = (interpreter, interpreter.tensor(input_index),
+                                          interpreter.get_output_details()[0]['index'])
+        return self._interpreters[bucket]
+
+    def _run_bucket(self, bucket, chunk):
+        """ Run the interpreter of a bucket on a chunk and return the class probabilities of the whole batch. """
+        interpreter, input_tensor, output_index = self._interpreter(bucket)
+        input_tensor()[:len(chunk)] = chunk
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
@@ -1,5 +1,7 @@
 import cv2 as cv
 import numpy as np
+from libs.face_tracker import FaceTracker
+from libs.utils.face_crops import FaceCropper
 
 
 class FaceMaskAppEngine:
@@ -25,11 +27,28 @@ class FaceMaskAppEngine:
             from libs.classifiers.edgetpu.classifier import Classifier
             self.detector = Detector(self.config)
             self.classifier_model = Classifier(self.config)
+        elif self.device == "Dummy":
+            from libs.detectors.dummy.detector import Detector
+            from libs.classifiers.dummy.classifier import Classifier
+            self.detector = Detector(self.config)
+            self.classifier_model = Classifier(self.config)
         else:
             raise ValueError('Not supported device named: ', self.device)
 
         self.image_size = (self.config.DETECTOR_INPUT_SIZE[0], self.config.DETECTOR_INPUT_SIZE[1], 3)
         self.classifier_img_size = (self.config.CLASSIFIER_INPUT_SIZE, self.config.CLASSIFIER_INPUT_SIZE, 3)
+        # Crops all faces of a frame into one reusable classifier batch
+        self.face_cropper = FaceCropper(self.config.CLASSIFIER_INPUT_SIZE)
+        # Optional tracker that caches the labels of the faces between frames
+        self.face_tracker = None
+        if self.config.TRACKER_ENABLED:
+            self.face_tracker = FaceTracker(
+                reclassify_interval=self.config.TRACKER_RECLASSIFY_INTERVAL,
+                vote_window=self.config.TRACKER_VOTE_WINDOW,
+                appearance_threshold=self.config.TRACKER_APPEARANCE_THRESHOLD,
+                min_iou=self.config.TRACKER_MIN_IOU,
+                max_disappeared=self.config.TRACKER_MAX_DISAPPEARED,
+            )
 
     def set_ui(self, ui):
         self.ui = ui
@@ -42,42 +61,33 @@ class FaceMaskAppEngine:
         resized_image = cv.resize(cv_image, tuple(self.image_size[:2]))
         rgb_resized_image = cv.cvtColor(resized_image, cv.COLOR_BGR2RGB)
         objects_list = self.detector.inference(rgb_resized_image)
-        [w, h] = self.resolution
-        #objects_list = [{'id': '1-0', 'bbox': [.1, .2, .5, .5]}, {'id': '1-1', 'bbox': [.3, .1, .5, .5]}]
-        faces = []
-        for obj in objects_list:
-            if 'bbox' in obj.keys():
-                face_bbox = obj['bbox']  # [ymin, xmin, ymax, xmax]
-                xmin, xmax = np.multiply([face_bbox[1], face_bbox[3]], self.resolution[0])
-                ymin, ymax = np.multiply([face_bbox[0], face_bbox[2]], self.resolution[1])
-                croped_face = cv_image[int(ymin):int(ymin) + (int(ymax) - int(ymin)),
-                                      int(xmin):int(xmin) + (int(xmax) - int(xmin))]
-                # Resizing input image
-                croped_face = cv.resize(croped_face, tuple(self.classifier_img_size[:2]))
-                croped_face = cv.cvtColor(croped_face, cv.COLOR_BGR2RGB)
-                # Normalizing input image to [0.0-1.0]
-                croped_face = croped_face / 255.0
-                faces.append(croped_face)
-        
-        faces = np.array(faces)
-        face_mask_results, scores = self.classifier_model.inference(faces)
+        # Only the objects with a bbox are faces, the faces whose box is empty inside the frame are dropped
+        objects_list = [obj for obj in objects_list if 'bbox' in obj.keys()]
+        bboxes = [obj['bbox'] for obj in objects_list]  # [ymin, xmin, ymax, xmax]
+        faces, _, indices = self.face_cropper.crop(cv_image, bboxes)
+        objects_list = [objects_list[i] for i in indices]
+        if self.face_tracker is None:
+            face_mask_results, scores = self.classifier_model.inference(faces)
+        else:
+            # Only the new faces and the faces that are due or changed are classified
+            track_ids, pending = self.face_tracker.update([bboxes[i] for i in indices], faces)
+            labels, label_scores = [], []
+            if len(pending) > 0:
+                labels, label_scores = self.classifier_model.inference(faces[pending])
+            face_mask_results, scores = self.face_tracker.vote(track_ids, pending, labels, label_scores)
+            for idx, obj in enumerate(objects_list):
+                obj['track_id'] = track_ids[idx]
 
         # TODO: it could be optimized by the returned dictionary from openpifpaf (returining List instead dict)
-        [w, h] = self.resolution
-        
-        idx = 0
-        for obj in objects_list:
-            if 'bbox' in obj.keys():
-                obj['face_label'] = face_mask_results[idx] 
-                obj['score'] = scores[idx]
-                idx = idx + 1
-                box = obj["bbox"]
-                x0 = box[1]
-                y0 = box[0]
-                x1 = box[3]
-                y1 = box[2]
-                obj["bbox"] = [x0, y0, x1, y1]
-
+        for idx, obj in enumerate(objects_list):
+            obj['face_label'] = face_mask_results[idx]
+            obj['score'] = scores[idx]
+            box = obj["bbox"]
+            x0 = box[1]
+            y0 = box[0]
+            x1 = box[3]
+            y1 = box[2]
+            obj["bbox"] = [x0, y0, x1, y1]
 
         return cv_image, objects_list
 
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class Detector:
+    """
+    Detects synthetic faces moving across the frame.
+
+    Detector class generates a deterministic detection load without any model, so the cropping, the classifier
+    and the ui can be run and benchmarked on machines without the detector runtimes. The boxes only depend on
+    the seed and the frame number, not on the input image.
+    The number of faces is read from the optional "crowd_size" of the detector section of the config (default 10).
+
+    :param config: Is a Config instance which provides necessary parameters.
+    """
+
+    MIN_SIZE = 0.05
+    MAX_SIZE = 0.2
+
+    def __init__(self, config):
+        self.config = config
+        self.name = self.config.DETECTOR_NAME
+        self.fps = None
+        self.frame_number = 0
+        rng = np.random.RandomState(0)
+        count = self.config.DETECTOR_CROWD_SIZE
+        self._sizes = rng.uniform(self.MIN_SIZE, self.MAX_SIZE, size=count)
+        self._positions = rng.uniform(0.0, 1.0, size=(count, 2))
+        self._velocities = rng.uniform(-0.01, 0.01, size=(count, 2))
+        self._scores = rng.uniform(0.5, 1.0, size=count)
+
+    def inference(self, resized_rgb_image):
+        """
+        Returns:
+            A list of dictionaries with the id, the normalized [ymin, xmin, ymax, xmax] bbox and the score of
+            each face
+        """
+        # Faces bounce between the borders of the frame
+        positions = np.abs((self._positions + self.frame_number * self._velocities + 1.0) % 2.0 - 1.0)
+        self.frame_number += 1
+        half_sizes = self._sizes / 2
+        x = np.clip(positions[:, 0], half_sizes, 1 - half_sizes)
+        y = np.clip(positions[:, 1], half_sizes, 1 - half_sizes)
+        return [{"id": "0-" + str(i), "bbox": [y[i] - half_sizes[i], x[i] - half_sizes[i],
+                                               y[i] + half_sizes[i], x[i] + half_sizes[i]],
+                 "score": self._scores[i]} for i in range(len(self._scores))]
@@ -21,4 +21,12 @@ class Detector:
     def inference(self, resized_rgb_image):
         self.fps = self.net.fps
         output = self.net.inference(resized_rgb_image)
+        # Only the tinyface detector skips the scales of its pyramid
+        self.skipped_scales = getattr(self.net, 'skipped_scales', None)
+        self.saved_latency = getattr(self.net, 'saved_latency', None)
         return output
+
+    def scale_report(self):
+        if not hasattr(self.net, 'scale_report'):
+            return None
+        return self.net.scale_report()
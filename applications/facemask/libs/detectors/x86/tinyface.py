@@ -4,11 +4,33 @@ import time
 import os
 import wget
 import tensorflow as tf
+from collections import deque
 from scipy.special import expit
 from libs.detectors.x86 import tiny_face_model
 from libs.utils.fps_calculator import convert_infr_time_to_fps
+from libs.utils.nms import non_max_suppression
 
 MAX_INPUT_DIM = 5000.0
+NMS_IOU_THRESHOLD = 0.1
+# We don't run every template on every scale, the large templates only run on the upscaled images
+SMALL_TEMPLATES = np.arange(4, 12)
+ALL_TEMPLATES = np.concatenate((np.arange(4, 12), np.arange(18, 25)))
+
+
+class _ScaleStats:
+    """ Whether the recent runs of a scale produced a kept detection, and its runs, skips and run time. """
+
+    def __init__(self, window):
+        self.hits = deque(maxlen=window)
+        self.runs = 0
+        self.skips = 0
+        self.seconds = 0.0
+
+    def hit_rate(self):
+        return sum(self.hits) / len(self.hits) if len(self.hits) > 0 else None
+
+    def mean_seconds(self):
+        return self.seconds / self.runs if self.runs > 0 else 0.0
 
 
 class Detector:
@@ -17,6 +39,17 @@ class Detector:
     file which if the detector can not find it at the path it will download it
     from neuralet repository automatically.
 
+    The model is built in its own graph, which is finalized after the variables are initialized, so no op can be
+    added to it per frame. The scales of the pyramid and their templates are computed once per input size, and the
+    non maximum suppression runs in NumPy.
+
+    The templates of a scale that detect faces outside of the optional min_face_size and max_face_size of the
+    detector config (in pixels of the detector input) are not used, nor the scales without any template left.
+    With adaptive_scales, a scale whose runs produced a detection that survived the non maximum suppression in less
+    than min_scale_hit_rate of its last scale_window runs is only run every scale_probe_interval frames, no scale is
+    pruned when scale_probe_interval is 0. The skipped scales and the estimated time that they saved are reported by
+    scale_report.
+
     :param config: Is a Config instance which provides necessary parameters.
     """
 
@@ -25,10 +58,21 @@ class Detector:
         self.prob_thresh = 0.25
         self.fps = None
         self.score_final = None
+        # Adaptive pruning of the scales of the pyramid, checked before the model is built
+        self.adaptive_scales = config.DETECTOR_ADAPTIVE_SCALES
+        self.scale_window = config.DETECTOR_SCALE_WINDOW
+        self.scale_probe_interval = config.DETECTOR_SCALE_PROBE_INTERVAL
+        self.min_scale_hit_rate = config.DETECTOR_MIN_SCALE_HIT_RATE
+        if self.scale_window < 1:
+            raise ValueError('Not supported scale window: ', self.scale_window)
+        if self.scale_probe_interval < 0:
+            raise ValueError('Not supported scale probe interval: ', self.scale_probe_interval)
+        if not 0.0 <= self.min_scale_hit_rate <= 1.0:
+            raise ValueError('Not supported minimum scale hit rate: ', self.min_scale_hit_rate)
 
         self.model_name = "tiny_face_detector.pkl"
-        if os.path.isfile(config.CLASSIFIER_MODEL_PATH):
-            self.model_path = config.CLASSIFIER_MODEL_PATH
+        if os.path.isfile(config.DETECTOR_MODEL_PATH):
+            self.model_path = config.DETECTOR_MODEL_PATH
         else:
             self.model_path = 'data/detectors/x86/'
             if not os.path.isdir(self.model_path):
@@ -40,17 +84,31 @@ class Detector:
             print("model does not exist under: ", self.model_path, 'downloading from ', url)
             wget.download(url, self.model_path)
 
-        self.x = tf.placeholder(tf.float32, [1, None, None, 3])
-        self.model = self.load_model()
-
-        self.sess = tf.Session()
-        self.sess.run(tf.global_variables_initializer())
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            self.x = tf.placeholder(tf.float32, [1, None, None, 3])
+            self.model = self.load_model()
+            self.sess = tf.Session(graph=self.graph)
+            self.sess.run(tf.global_variables_initializer())
+        self.graph.finalize()
 
         self._clusters = self.model.get_data_by_key("clusters")
         self._average_image = self.model.get_data_by_key("average_image")
         self._clusters_h = self._clusters[:, 3] - self._clusters[:, 1] + 1
         self._clusters_w = self._clusters[:, 2] - self._clusters[:, 0] + 1
         self._normal_idx = np.where(self._clusters[:, 4] == 1)
+        # prob > prob_thresh is score > logit(prob_thresh), so the sigmoid only runs on the detections
+        self._score_thresh = np.log(self.prob_thresh / (1.0 - self.prob_thresh))
+        self._scale_plans = {}
+
+        self.min_face_size = config.DETECTOR_MIN_FACE_SIZE or 0
+        self.max_face_size = config.DETECTOR_MAX_FACE_SIZE or np.inf
+        self.frame_number = 0
+        self._scale_stats = {}
+        self._last_plan_key = None
+        # Number of scales that were skipped in the last frame and the seconds that they would have taken
+        self.skipped_scales = 0
+        self.saved_latency = 0.0
 
     def load_model(self):
         """Loads tiny face model from a pkl file and returns model"""
@@ -58,9 +116,7 @@ class Detector:
         self.score_final = model.tiny_face(self.x)
         return model
 
-    def _calc_scales(self, raw_img):
-
-        raw_h, raw_w = raw_img.shape[0], raw_img.shape[1]
+    def _calc_scales(self, raw_h, raw_w):
         min_scale = min(np.floor(np.log2(np.max(self._clusters_w[self._normal_idx] / raw_w))),
                         np.floor(np.log2(np.max(self._clusters_h[self._normal_idx] / raw_h))))
         max_scale = min(1.0, -np.log2(max(raw_h, raw_w) / MAX_INPUT_DIM))
@@ -70,81 +126,127 @@ class Detector:
         scales = np.power(2.0, scales_pow)
         return scales
 
+    def _scale_plan(self, raw_h, raw_w):
+        """
+        Return the scales of the pyramid of an input size and the ids of the templates that run at each. Only the
+        templates whose face height at the scale is within the configured face sizes are kept.
+        """
+        if (raw_h, raw_w) not in self._scale_plans:
+            plan = []
+            for s in self._calc_scales(raw_h, raw_w):
+                templates = SMALL_TEMPLATES if s <= 1.0 else ALL_TEMPLATES
+                face_heights = self._clusters_h[templates] / s
+                templates = templates[(face_heights >= self.min_face_size) & (face_heights <= self.max_face_size)]
+                if len(templates) > 0:
+                    plan.append((s, templates))
+            self._scale_plans[(raw_h, raw_w)] = plan
+            self._scale_stats[(raw_h, raw_w)] = [_ScaleStats(self.scale_window) for _ in plan]
+        return self._scale_plans[(raw_h, raw_w)]
+
+    def _skip_scale(self, stats, probe):
+        """ Whether a scale is skipped in this frame, the scales are always run while their window fills up. """
+        if not self.adaptive_scales or probe or len(stats.hits) < self.scale_window:
+            return False
+        return stats.hit_rate() < self.min_scale_hit_rate
+
+    def scale_report(self):
+        """
+        Returns:
+            A list with the scale, the templates, the runs, the skips, the recent hit rate, the mean milliseconds
+            of a run and the estimated milliseconds saved by the skips of every scale of the last input size
+        """
+        if self._last_plan_key is None:
+            return []
+        return [{
+            "scale": float(s),
+            "templates": len(templates),
+            "runs": stats.runs,
+            "skips": stats.skips,
+            "hit_rate": stats.hit_rate(),
+            "mean_ms": 1000 * stats.mean_seconds(),
+            "saved_ms": 1000 * stats.skips * stats.mean_seconds(),
+        } for (s, templates), stats in zip(self._scale_plans[self._last_plan_key],
+                                           self._scale_stats[self._last_plan_key])]
+
+    def _calc_bounding_boxes(self, score_final, s, templates):
+        """
+        Interpret the heatmap of one scale into [N, 5] boxes of [xmin, ymin, xmax, ymax, score] in input pixels.
+        Only the scores of the given templates are thresholded, the regression is read at the detections only.
+        """
+        nt = self._clusters.shape[0]
+        fy, fx, ft = np.nonzero(score_final[:, :, templates] > self._score_thresh)
+        fc = templates[ft]
+        scores = expit(score_final[fy, fx, fc])
+
+        # interpret heatmap into bounding boxes
+        cy = fy * 8 - 1
+        cx = fx * 8 - 1
+        ch = self._clusters_h[fc]
+        cw = self._clusters_w[fc]
+
+        # refine bounding boxes with the regression outputs tx, ty, tw, th of the templates
+        rcx = cx + cw * score_final[fy, fx, nt + fc]
+        rcy = cy + ch * score_final[fy, fx, 2 * nt + fc]
+        rcw = cw * np.exp(score_final[fy, fx, 3 * nt + fc])
+        rch = ch * np.exp(score_final[fy, fx, 4 * nt + fc])
+        return np.stack((rcx - rcw / 2, rcy - rch / 2, rcx + rcw / 2, rcy + rch / 2), axis=1) / s, scores
+
     def inference(self, resized_rgb_images):
         inp_h, inp_w = np.shape(resized_rgb_images)[:2]
 
-        scales = self._calc_scales(resized_rgb_images)
-        bboxes = np.empty(shape=(0, 5))
-
+        plan = self._scale_plan(inp_h, inp_w)
+        scale_stats = self._scale_stats[(inp_h, inp_w)]
+        self._last_plan_key = (inp_h, inp_w)
+        # All of the scales run on the probe frames, so the pruned scales can recover. A probe interval of 0
+        # makes every frame a probe, so no scale is pruned
+        probe = self.scale_probe_interval == 0 or self.frame_number % self.scale_probe_interval == 0
+        self.frame_number += 1
+        self.skipped_scales = 0
+        self.saved_latency = 0.0
+
+        boxes, scores, origins, ran_scales = [], [], [], []
         raw_img_f = resized_rgb_images.astype(np.float32)
         inference_time = 0
-        for s in scales:
-            # print("Processing frame {} at scale {:.4f}".format(frame_count, s))
+        for scale_id, ((s, templates), stats) in enumerate(zip(plan, scale_stats)):
+            if self._skip_scale(stats, probe):
+                stats.skips += 1
+                self.skipped_scales += 1
+                self.saved_latency += stats.mean_seconds()
+                continue
             img = cv2.resize(raw_img_f, (0, 0), fx=s, fy=s, interpolation=cv2.INTER_LINEAR)
             img = img - self._average_image
             img = img[np.newaxis, :]
 
-            # we don't run every template on every scale ids of templates to ignore
-            tids = list(range(4, 12)) + ([] if s <= 1.0 else list(range(18, 25)))
-            ignoredTids = list(set(range(0, self._clusters.shape[0])) - set(tids))
-
             # run through the net
             t_begin = time.perf_counter()
             score_final_tf = self.sess.run(self.score_final, feed_dict={self.x: img})
-            inference_time += time.perf_counter() - t_begin  # Seconds
-
-            # collect scores
-            score_cls_tf, score_reg_tf = score_final_tf[:, :, :, :25], score_final_tf[:, :, :, 25:125]
-            prob_cls_tf = expit(score_cls_tf)
-            prob_cls_tf[0, :, :, ignoredTids] = 0.0
-
-            def _calc_bounding_boxes():
-                # threshold for detection
-                _, fy, fx, fc = np.where(prob_cls_tf > self.prob_thresh)
-
-                # interpret heatmap into bounding boxes
-                cy = fy * 8 - 1
-                cx = fx * 8 - 1
-                ch = self._clusters[fc, 3] - self._clusters[fc, 1] + 1
-                cw = self._clusters[fc, 2] - self._clusters[fc, 0] + 1
-
-                # extract bounding box refinement
-                Nt = self._clusters.shape[0]
-                tx = score_reg_tf[0, :, :, 0:Nt]
-                ty = score_reg_tf[0, :, :, Nt:2 * Nt]
-                tw = score_reg_tf[0, :, :, 2 * Nt:3 * Nt]
-                th = score_reg_tf[0, :, :, 3 * Nt:4 * Nt]
-
-                # refine bounding boxes
-                dcx = cw * tx[fy, fx, fc]
-                dcy = ch * ty[fy, fx, fc]
-                rcx = cx + dcx
-                rcy = cy + dcy
-                rcw = cw * np.exp(tw[fy, fx, fc])
-                rch = ch * np.exp(th[fy, fx, fc])
-                scores = prob_cls_tf[0, fy, fx, fc]
-                tmp_bboxes = np.vstack((rcx - rcw / 2, rcy - rch / 2, rcx + rcw / 2, rcy + rch / 2))
-                tmp_bboxes = np.vstack((tmp_bboxes / s, scores))
-                tmp_bboxes = tmp_bboxes.transpose()
-                return tmp_bboxes
-
-            tmp_bboxes = _calc_bounding_boxes()
-            bboxes = np.vstack((bboxes, tmp_bboxes))  # <class 'tuple'>: (5265, 5)
+            run_time = time.perf_counter() - t_begin  # Seconds
+            inference_time += run_time
+            stats.runs += 1
+            stats.seconds += run_time
+            ran_scales.append(scale_id)
+
+            scale_boxes, scale_scores = self._calc_bounding_boxes(score_final_tf[0], s, templates)
+            boxes.append(scale_boxes)
+            scores.append(scale_scores)
+            origins.append(np.full(len(scale_scores), scale_id))
 
         self.fps = convert_infr_time_to_fps(inference_time)
+        boxes = np.concatenate(boxes) if boxes else np.empty((0, 4))
+        scores = np.concatenate(scores) if scores else np.empty(0)
+        origins = np.concatenate(origins) if origins else np.empty(0, dtype=np.int64)
         # non maximum suppression
-        refind_idx = tf.image.non_max_suppression(tf.convert_to_tensor(bboxes[:, :4], dtype=tf.float32),
-                                                  tf.convert_to_tensor(bboxes[:, 4], dtype=tf.float32),
-                                                  max_output_size=bboxes.shape[0], iou_threshold=0.1)
-        refind_idx = self.sess.run(refind_idx)
-        refined_bboxes = bboxes[refind_idx]
+        refind_idx = non_max_suppression(boxes, scores, NMS_IOU_THRESHOLD)
+
+        # A run of a scale is a hit when one of its boxes survived the non maximum suppression
+        hit_scales = set(origins[refind_idx].tolist())
+        for scale_id in ran_scales:
+            scale_stats[scale_id].hits.append(scale_id in hit_scales)
         nn_out = []
 
-        for r in refined_bboxes:
-            _score = expit(r[4])
-            _r = [int(x) for x in r[:4]]
+        for box, score in zip(boxes[refind_idx], scores[refind_idx]):
+            _r = [int(x) for x in box]
             nn_out.append(
                 {"bbox": [np.abs(_r[1]) / inp_h, np.abs(_r[0] / inp_w), np.abs(_r[3]) / inp_h, np.abs(_r[2]) / inp_w],
-                 "score": r[4]})
-            # cv2.rectangle(raw_img, (_r[0], _r[1]), (_r[2], _r[3]), rect_color, _lw)
+                 "score": score})
         return nn_out
@@ -0,0 +1,154 @@
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+def _iou(boxes_a, boxes_b):
+    """ Return the [len(boxes_a), len(boxes_b)] intersection over union matrix of [ymin, xmin, ymax, xmax] boxes. """
+    top_left = np.maximum(boxes_a[:, np.newaxis, :2], boxes_b[np.newaxis, :, :2])
+    bottom_right = np.minimum(boxes_a[:, np.newaxis, 2:], boxes_b[np.newaxis, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, np.newaxis] + area_b[np.newaxis, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+class _Track:
+    def __init__(self, vote_window):
+        self.bbox = None
+        self.disappeared = 0
+        # The appearance of the face when it was classified the last time
+        self.signature = None
+        self.frames_since_classified = 0
+        self.votes = deque(maxlen=vote_window)
+
+
+class FaceTracker:
+    """
+    Track the faces between frames and cache the labels of the classifier per track.
+
+    Faces are matched to the tracks of the previous frames by the greedy highest intersection over union of their
+    boxes. The classifier only has to run on the faces of new tracks, on the faces of a track that was not
+    classified for reclassify_interval frames and on the faces whose appearance changed since their last
+    classification. The appearance is a subsampled grayscale version of the classifier input, it changes when the
+    mean absolute difference is more than appearance_threshold. The label of a track is the majority of its last
+    vote_window classifications, so a single wrong classification does not make the label flicker.
+
+    :param reclassify_interval: Frames after which a tracked face is classified again
+    :param vote_window: Number of classifications of a track that vote for its label
+    :param appearance_threshold: Mean absolute difference of the [0.0-1.0] pixels that triggers a classification
+    :param min_iou: Minimum intersection over union of a face and the box of a track to match them
+    :param max_disappeared: Frames that a track is kept without a matching face
+    """
+
+    def __init__(self, reclassify_interval=5, vote_window=5, appearance_threshold=0.1, min_iou=0.3,
+                 max_disappeared=5):
+        self.reclassify_interval = reclassify_interval
+        self.vote_window = vote_window
+        self.appearance_threshold = appearance_threshold
+        self.min_iou = min_iou
+        self.max_disappeared = max_disappeared
+        self._tracks = OrderedDict()
+        self._next_id = 0
+        # Number of faces that were tracked and that had to be classified
+        self.faces_seen = 0
+        self.faces_classified = 0
+
+    @staticmethod
+    def _signatures(faces):
+        stride = max(1, faces.shape[1] // 8)
+        return faces[:, ::stride, ::stride].mean(axis=3)
+
+    def _match(self, bboxes):
+        """ Return the id of the matching track of every box, None for the boxes without a track. """
+        track_ids = [None] * len(bboxes)
+        ids = list(self._tracks.keys())
+        if len(ids) == 0 or len(bboxes) == 0:
+            return track_ids
+        iou = _iou(np.array([self._tracks[track_id].bbox for track_id in ids]), bboxes)
+        rows, cols = np.unravel_index(np.argsort(-iou, axis=None), iou.shape)
+        used_rows = set()
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            if iou[row, col] < self.min_iou:
+                break
+            if row in used_rows or track_ids[col] is not None:
+                continue
+            used_rows.add(row)
+            track_ids[col] = ids[row]
+        return track_ids
+
+    def update(self, bboxes, faces):
+        """
+        Match the faces of a frame to the tracks.
+
+        Args:
+            bboxes: [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes of the faces
+            faces: float32 array of shape [N, input_size, input_size, 3] with the classifier input of the faces
+
+        Returns:
+            track_ids: List of the track id of every face
+            pending: int array of the indices of the faces that have to be classified
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        signatures = self._signatures(faces)
+        track_ids = self._match(bboxes)
+        pending = []
+        for i, track_id in enumerate(track_ids):
+            if track_id is None:
+                track_id = self._next_id
+                self._next_id += 1
+                self._tracks[track_id] = _Track(self.vote_window)
+                track_ids[i] = track_id
+            track = self._tracks[track_id]
+            track.bbox = bboxes[i]
+            track.disappeared = 0
+            track.frames_since_classified += 1
+            if (track.signature is None or track.frames_since_classified >= self.reclassify_interval
+                    or np.mean(np.abs(signatures[i] - track.signature)) > self.appearance_threshold):
+                track.signature = signatures[i]
+                track.frames_since_classified = 0
+                pending.append(i)
+
+        matched = set(track_ids)
+        for track_id in list(self._tracks.keys()):
+            if track_id in matched:
+                continue
+            self._tracks[track_id].disappeared += 1
+            # Remove a track when its face is missing in the 'max_disappeared' previous frames
+            if self._tracks[track_id].disappeared > self.max_disappeared:
+                del self._tracks[track_id]
+
+        self.faces_seen += len(track_ids)
+        self.faces_classified += len(pending)
+        return track_ids, np.array(pending, dtype=np.int64)
+
+    def vote(self, track_ids, pending, labels, scores):
+        """
+        Add the classifier results of the pending faces to their tracks and return the voted labels of all faces.
+
+        Returns:
+            labels: List of the label of every face, the most frequent label of the votes of its track, the most
+                recent one of the tied labels
+            scores: List of the mean score of the votes for the label of every face
+        """
+        for i, label, score in zip(pending.tolist(), labels, scores):
+            self._tracks[track_ids[i]].votes.append((int(label), float(score)))
+        voted_labels, voted_scores = [], []
+        for track_id in track_ids:
+            votes = self._tracks[track_id].votes
+            counts = {}
+            for label, _ in votes:
+                counts[label] = counts.get(label, 0) + 1
+            best_count = max(counts.values())
+            # Walk back from the most recent vote so ties go to the most recent label
+            best_label = next(label for label, _ in reversed(votes) if counts[label] == best_count)
+            voted_labels.append(best_label)
+            voted_scores.append(float(np.mean([score for label, score in votes if label == best_label])))
+        return voted_labels, voted_scores
+
+    def classified_ratio(self):
+        """ Return the fraction of the tracked faces that were classified, None before the first face. """
+        if self.faces_seen == 0:
+            return None
+        return self.faces_classified / self.faces_seen
@@ -0,0 +1,78 @@
+"""
+Batched cropping of the detected faces into the input tensor of the classifier.
+"""
+import cv2 as cv
+import numpy as np
+
+
+def face_rois(bboxes, width, height):
+    """
+    Convert normalized boxes to integer pixel regions that are clipped to the frame.
+
+    Args:
+        bboxes: [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes
+        width, height: size of the frame in pixels
+
+    Returns:
+        rois: [N, 4] int array of [xmin, ymin, xmax, ymax] pixel coordinates
+        valid: [N] bool array, False for boxes that are empty after clipping
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    scale = np.array([width, height, width, height], dtype=np.float64)
+    rois = np.minimum(np.maximum(bboxes[:, [1, 0, 3, 2]] * scale, 0), scale).astype(np.int64)
+    valid = (rois[:, 2] > rois[:, 0]) & (rois[:, 3] > rois[:, 1])
+    return rois, valid
+
+
+class FaceCropper:
+    """
+    Crop the faces of a frame into one float32 batch of RGB images normalized to [0.0-1.0].
+
+    All regions are computed at once by face_rois. Every valid face is resized straight into a preallocated uint8
+    batch, and the color conversion and normalization run once for the whole batch. The batches are reused
+    between frames and grow only when a frame has more faces than any frame before, so the returned batch is a
+    view that is overwritten by the next call.
+
+    :param input_size: Width and height of the classifier input
+    :param capacity: Number of faces that the batches are allocated for initially
+    """
+
+    def __init__(self, input_size, capacity=16):
+        self.input_size = int(input_size)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        shape = (capacity, self.input_size, self.input_size, 3)
+        self._crops = np.empty(shape, dtype=np.uint8)
+        self._batch = np.empty(shape, dtype=np.float32)
+
+    def crop(self, bgr_image, bboxes):
+        """
+        Args:
+            bgr_image: uint8 numpy array with shape (img_height, img_width, 3)
+            bboxes: [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes
+
+        Returns:
+            batch: float32 array of shape [M, input_size, input_size, 3] with the M valid faces
+            rois: [M, 4] int array of the [xmin, ymin, xmax, ymax] pixel regions of the faces
+            indices: [M] indices of the valid faces in bboxes
+        """
+        height, width = bgr_image.shape[:2]
+        rois, valid = face_rois(bboxes, width, height)
+        indices = np.flatnonzero(valid)
+        rois = rois[indices]
+        count = len(indices)
+        if count > len(self._batch):
+            self._allocate(max(count, 2 * len(self._batch)))
+        size = (self.input_size, self.input_size)
+        for i, (xmin, ymin, xmax, ymax) in enumerate(rois.tolist()):
+            cv.resize(bgr_image[ymin:ymax, xmin:xmax], size, dst=self._crops[i])
+        # BGR to RGB and [0-255] to [0.0-1.0] for all of the faces at once, the faces are stacked into one image
+        # so a single in-place cvtColor converts them
+        crops = self._crops[:count]
+        if count > 0:
+            stacked = crops.reshape(count * self.input_size, self.input_size, 3)
+            cv.cvtColor(stacked, cv.COLOR_BGR2RGB, dst=stacked)
+        batch = self._batch[:count]
+        np.multiply(crops, np.float32(1 / 255.0), out=batch)
+        return batch, rois, indices
@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def non_max_suppression(boxes, scores, iou_threshold, max_output_size=None):
+    """
+    Greedy non maximum suppression in NumPy with the semantics of tf.image.non_max_suppression: the boxes are
+    visited from the highest score and a box is dropped when its intersection over union with a kept box is more
+    than iou_threshold.
+
+    Args:
+        boxes: [N, 4] array of boxes given by two opposite corners, in any order of the coordinates
+        scores: [N] array of the scores of the boxes
+        iou_threshold: Boxes that overlap a kept box by more than this are suppressed
+        max_output_size: Maximum number of kept boxes, all of them if None
+
+    Returns:
+        The indices of the kept boxes, the highest score first
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    low = np.minimum(boxes[:, :2], boxes[:, 2:])
+    high = np.maximum(boxes[:, :2], boxes[:, 2:])
+    areas = np.prod(high - low, axis=1)
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    keep = []
+    while order.size > 0 and (max_output_size is None or len(keep) < max_output_size):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        intersection = np.prod(np.clip(np.minimum(high[best], high[rest]) - np.maximum(low[best], low[rest]), 0, None),
+                               axis=1)
+        union = areas[best] + areas[rest] - intersection
+        iou = np.where(union > 0, intersection / np.maximum(union, 1e-12), 0.0)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
@@ -0,0 +1,122 @@
+from configs.config_handler import Config
+import cv2 as cv
+import numpy as np
+from argparse import ArgumentParser
+import os
+import resource
+import time
+
+
+def current_rss_mb():
+    """ Return the current resident set size of the process in megabytes. """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+    except (OSError, IOError):
+        # Without procfs only the peak is known, which still grows when the memory leaks
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def looped_frames(video_path):
+    """ Yield the frames of a video forever, the video is reopened at its end. """
+    while True:
+        input_cap = cv.VideoCapture(video_path)
+        if not input_cap.isOpened():
+            print('failed to load video ', video_path)
+            exit(1)
+        frame_count = 0
+        while True:
+            ret, frame = input_cap.read()
+            if not ret:
+                break
+            frame_count += 1
+            yield frame
+        input_cap.release()
+        if frame_count == 0:
+            print('no frames in video ', video_path)
+            exit(1)
+
+
+def main():
+    """
+    Run the detector and the classifier of the config on many frames and report the memory and the latency,
+    e.g. to check that a detector does not grow its graph or its caches per frame. The input video is looped
+    until the given number of frames is processed. The soak fails (exit code 1) when the slope of the resident
+    memory of the reports after the warm up is more than max_slope_mb per 1000 frames. The warm up covers the
+    growth of the allocator arenas to the peak of the frames, which is a step and not a leak. The latency window of
+    the classifier and the scale report of the detector are printed at the end when they are available.
+    Example: python soak.py --config configs/config-tinyface-x86.json --frames 10000
+    """
+    argparse = ArgumentParser()
+    argparse.add_argument('--config', type=str, help='json config file path')
+    argparse.add_argument('--input_video_path', type=str, help='the path of input video', default='')
+    argparse.add_argument('--frames', type=int, default=10000, help='the number of processed frames')
+    argparse.add_argument('--report_every', type=int, default=500, help='frames between two reports')
+    argparse.add_argument('--warmup', type=int, default=1000, help='frames that are not part of the memory slope')
+    argparse.add_argument('--max_slope_mb', type=float, default=1.0,
+                          help='allowed slope of the resident memory after the warm up in MB per 1000 frames')
+    args = argparse.parse_args()
+
+    cfg = Config(path=args.config)
+    input_path = args.input_video_path or cfg.APP_VIDEO_PATH
+    print("INFO: Soaking %s with %d frames of %s" % (args.config, args.frames, input_path))
+
+    from libs.core import FaceMaskAppEngine
+    engine = FaceMaskAppEngine(cfg)
+    process = engine._FaceMaskAppEngine__process
+
+    print('%10s %10s %12s %12s' % ('frame', 'rss_mb', 'mean_ms', 'p95_ms'))
+    baseline_rss = None
+    reports = []
+    latencies = []
+    for frame_id, frame in enumerate(looped_frames(input_path), 1):
+        t_begin = time.perf_counter()
+        process(frame)
+        latencies.append(1000 * (time.perf_counter() - t_begin))
+        if frame_id == args.warmup:
+            baseline_rss = current_rss_mb()
+        if frame_id % args.report_every == 0 or frame_id == args.frames:
+            rss = current_rss_mb()
+            reports.append((frame_id, rss, np.mean(latencies), np.percentile(latencies, 95)))
+            print('%10d %10.1f %12.2f %12.2f' % reports[-1])
+            latencies = []
+        if frame_id == args.frames:
+            break
+
+    if baseline_rss is None:
+        baseline_rss = reports[0][1]
+    growth = reports[-1][1] - baseline_rss
+    # The slopes of the reports after the warm up, a leak shows as a steady slope rather than a single step
+    steady = [report for report in reports if report[0] > args.warmup]
+    rss_slope = None
+    if len(steady) > 1:
+        frame_ids = np.array([report[0] for report in steady], dtype=np.float64)
+        rss_slope = 1000 * np.polyfit(frame_ids, [report[1] for report in steady], 1)[0]
+        latency_slope = 1000 * np.polyfit(frame_ids, [report[2] for report in steady], 1)[0]
+        print('INFO: RSS slope %.3f MB per 1000 frames, latency slope %.3f ms per 1000 frames' % (
+            rss_slope, latency_slope))
+    latency_report = getattr(engine.classifier_model, 'latency_report', None)
+    latency = latency_report() if latency_report is not None else None
+    if latency is not None:
+        print('INFO: classifier latency of the last frames: %.2f ms mean, %.2f ms p95, %.2f ms last' % (
+            latency["mean_ms"], latency["p95_ms"], latency["last_ms"]))
+    scale_report = getattr(engine.detector, 'scale_report', None)
+    if scale_report is not None and scale_report():
+        print('%10s %10s %8s %8s %10s %10s %10s' % ('scale', 'templates', 'runs', 'skips', 'hit_rate', 'mean_ms',
+                                                    'saved_ms'))
+        for scale in scale_report():
+            print('%10.3f %10d %8d %8d %10s %10.2f %10.1f' % (
+                scale["scale"], scale["templates"], scale["runs"], scale["skips"],
+                '-' if scale["hit_rate"] is None else '%.3f' % scale["hit_rate"], scale["mean_ms"], scale["saved_ms"]))
+    print('INFO: RSS grew by %.1f MB after %d warm up frames' % (growth, args.warmup))
+    if rss_slope is None:
+        print('FAIL: less than two reports after the warm up, process more frames or report more often')
+        exit(1)
+    if rss_slope > args.max_slope_mb:
+        print('FAIL: the memory grows by %.3f MB per 1000 frames (allowed %.3f MB)' % (rss_slope, args.max_slope_mb))
+        exit(1)
+    print('PASS')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+import os
+import sys
 import threading
 import cv2 as cv
 import numpy as np
@@ -5,6 +7,9 @@ import time
 from flask import Flask
 from flask import render_template
 from flask import Response
+# The profiling endpoints are shared by the applications under applications/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from common.profiler import register_admin_routes  # noqa: E402
 from libs.utils import visualization_utils as vis_util
 
 
@@ -82,6 +87,25 @@ class WebGUI:
         # -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_-
         # endregion
 
+        # Put the classification latency of the frame to the frame
+        classifier_latency = getattr(self.__ENGINE_INSTANCE.classifier_model, 'latency', None)
+        if classifier_latency is not None:
+            txt_latency = 'Classifier = %.1f ms' % (1000 * classifier_latency)
+            vis_util.text_putter(input_frame, txt_latency, (0.05, 0.88))
+
+        # Put the fraction of the tracked faces that were classified to the frame
+        face_tracker = self.__ENGINE_INSTANCE.face_tracker
+        if face_tracker is not None and face_tracker.classified_ratio() is not None:
+            txt_classified = 'Classified faces = %d%%' % (100 * face_tracker.classified_ratio())
+            vis_util.text_putter(input_frame, txt_classified, (0.05, 0.83))
+
+        # Put the scales that the detector skipped in this frame to the frame
+        skipped_scales = getattr(self.__ENGINE_INSTANCE.detector, 'skipped_scales', None)
+        if skipped_scales is not None:
+            txt_scales = 'Skipped scales = %d, saved %.1f ms' % (skipped_scales,
+                                                                 1000 * self.__ENGINE_INSTANCE.detector.saved_latency)
+            vis_util.text_putter(input_frame, txt_scales, (0.05, 0.78))
+
         # Lock the main thread and copy input_frame to output_frame
         with self._lock:
             self._output_frame = input_frame.copy()
@@ -103,6 +127,9 @@ class WebGUI:
                 self._generate(1), mimetype="multipart/x-mixed-replace; boundary=frame"
             )
 
+        if self.config.APP_ADMIN_ENDPOINTS:
+            register_admin_routes(app)
+
         return app
 
     def _generate(self, out_frame: int):
@@ -58,13 +58,17 @@ class ConfigEngine:
     def get_section_dict(self, section):
         return self.section_options_dict[section]
 
-    def get_boolean(self, section, option):
+    def has_section(self, section):
+        return section in self.section_options_dict
+
+    def get_boolean(self, section, option, fallback=None):
         result = None
         self.lock.acquire()
         try:
-            result = self.config.getboolean(section, option)
+            result = self.config.getboolean(section, option, fallback=fallback)
         finally:
             self.lock.release()
+        return result
 
     def toggle_boolean(self, section, option):
         self.lock.acquire()
@@ -78,5 +82,6 @@ class ConfigEngine:
         self.lock.acquire()
         try:
             self.config.set(section, option, value)
+            self.section_options_dict[section][option] = value
         finally:
             self.lock.release()
@@ -2,36 +2,135 @@ import time
 import cv2 as cv
 import numpy as np
 import math
+import os
 from libs.centroid_object_tracker import CentroidTracker
 from scipy.spatial import distance as dist
 from libs.loggers.loggers import Logger
+from libs.environment_statistics import EnvironmentStatistics
+from libs.heatmap import OccupancyHeatmap
+from libs.frame_reader import LatestFrameReader, is_live_source
+from libs.thread_budget import ThreadBudget
+
+
+def load_detector(config):
+    """
+    Create the Detector of the device that is set in the Detector section of the config.
+    """
+    device = config.get_section_dict('Detector')['Device']
+    if device == 'Jetson':
+        from libs.detectors.jetson.detector import Detector
+    elif device == 'EdgeTPU':
+        from libs.detectors.edgetpu.detector import Detector
+    elif device == 'Dummy':
+        from libs.detectors.dummy.detector import Detector
+    elif device == 'x86':
+        from libs.detectors.x86.detector import Detector
+    elif device == 'CPU-TFLite':
+        from libs.detectors.tflite.detector import Detector
+    else:
+        raise ValueError('Not supported device named: ', device)
+    return Detector(config)
+
+
+def run_detection(detector, tiled_detector, image_size, cv_image):
+    """
+    Run the detector on a BGR image. The image is either resized to the detector's input size or
+    cut into tiles when a tiled_detector is given.
+
+    returns:
+    boxes: a [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes
+    scores: a [N] array of the score of each box
+    """
+    if tiled_detector is not None:
+        return tiled_detector.inference(cv.cvtColor(cv_image, cv.COLOR_BGR2RGB))
+    resized_image = cv.resize(cv_image, tuple(image_size[:2]))
+    rgb_resized_image = cv.cvtColor(resized_image, cv.COLOR_BGR2RGB)
+    return detector.inference(rgb_resized_image)
 
 
 class Distancing:
 
     def __init__(self, config):
         self.config = config
+        # Split the cores between the inference, decode and web threads before any of the pools is created
+        self.thread_budget = ThreadBudget(self.config)
+        self.thread_budget.apply()
+        self.thread_budget.print_report()
         self.ui = None
         self.detector = None
         self.device = self.config.get_section_dict('Detector')['Device']
         self.running_video = False
+        self.frame_reader = None
         self.tracker = CentroidTracker(
             max_disappeared=int(self.config.get_section_dict("PostProcessor")["MaxTrackFrame"]))
-        self.logger = Logger(self.config)
-        if self.device == 'Jetson':
-            from libs.detectors.jetson.detector import Detector
-            self.detector = Detector(self.config)
-        elif self.device == 'EdgeTPU':
-            from libs.detectors.edgetpu.detector import Detector
-            self.detector = Detector(self.config)
-        elif self.device == 'Dummy':
-            from libs.detectors.dummy.detector import Detector
-            self.detector = Detector(self.config)
-        elif self.device == 'x86':
-            from libs.detectors.x86.detector import Detector
-            self.detector = Detector(self.config)
-
+        # Statistics of every frame, shared by the logger and the ui
+        self.statistics = EnvironmentStatistics(self.config)
+        self.logger = Logger(self.config, self.statistics)
+        self.heatmap = OccupancyHeatmap(self.config)
         self.image_size = [int(i) for i in self.config.get_section_dict('Detector')['ImageSize'].split(',')]
+        self.class_id = int(self.config.get_section_dict('Detector')['ClassID'])
+
+        # Run the detectors in separate processes when a pool of workers is configured
+        self.detector_pool = None
+        self.tiled_detector = None
+        pool_workers = int(self.config.get_section_dict('Detector').get('PoolWorkers', 0) or 0)
+        # Record the detections of the video or replay them instead of running the detector
+        self.detection_cache = None
+        self.detection_recorder = None
+        self.cache_frame_index = 0
+        cache_mode = self.config.get_section_dict('App').get('DetectionCache', 'off').strip().lower()
+        if cache_mode not in ('off', 'record', 'replay'):
+            raise ValueError('Not supported DetectionCache mode: ', cache_mode)
+        if cache_mode != 'off' and pool_workers > 0:
+            print('the DetectionCache is not supported together with PoolWorkers, it is disabled')
+            cache_mode = 'off'
+        video_path = self.config.get_section_dict('App')['VideoPath']
+        if cache_mode != 'off' and (is_live_source(video_path, self.config) or not os.path.isfile(video_path)):
+            print('the DetectionCache is only supported for video files, it is disabled for', video_path)
+            cache_mode = 'off'
+        if cache_mode == 'replay':
+            from libs.detection_cache import DetectionCache, cache_path
+            path = cache_path(self.config, video_path)
+            self.detection_cache = DetectionCache(path, self.config.get_section_dict('Detector')['Name'])
+            self.detector = self.detection_cache
+            print('replaying the detections of', path)
+        elif pool_workers > 0:
+            from libs.detector_pool import DetectorPool
+            self.detector_pool = DetectorPool(self.config, pool_workers)
+            self.detector = self.detector_pool
+        else:
+            self.detector = load_detector(self.config)
+            # Run the detector over overlapping tiles of the display resolution frame instead of the resized frame
+            if self.config.get_boolean('Detector', 'Tiling', fallback=False):
+                from libs.tiled_detector import TiledDetector
+                self.tiled_detector = TiledDetector(self.config, self.detector)
+            if cache_mode == 'record':
+                from libs.detection_cache import DetectionRecorder, cache_path
+                self.detection_recorder = DetectionRecorder(cache_path(self.config, video_path))
+        # Switch between operating points of the detector to keep a target fps
+        self.scheduler = None
+        self.frame_count = 0
+        if self.config.has_section('Scheduler'):
+            if self.detector_pool is not None or self.detection_cache is not None:
+                print('the Scheduler is not supported together with PoolWorkers or a replayed DetectionCache, '
+                      'it is disabled')
+            else:
+                from libs.latency_scheduler import LatencyScheduler
+                self.scheduler = LatencyScheduler(self.config)
+                self._detectors = {(self.detector.name, tuple(self.image_size)): self.detector}
+                self.__apply_operating_point()
+        # Skip the detector on frames without motion
+        self.motion_gate = None
+        if self.config.has_section('MotionGate'):
+            from libs.motion_gate import MotionGate
+            self.motion_gate = MotionGate(self.config)
+        self.last_objects = []
+        self.last_distancings = np.zeros((0, 0), dtype=np.float32)
+        # Only the crop of the region of interest is sent to the detector
+        self.region_of_interest = None
+        if self.config.has_section('RegionOfInterest'):
+            from libs.region_of_interest import RegionOfInterest
+            self.region_of_interest = RegionOfInterest(self.config)
 
         if self.device != 'Dummy':
             print('Device is: ', self.device)
@@ -40,41 +139,135 @@ class Distancing:
 
         self.dist_method = self.config.get_section_dict("PostProcessor")["DistMethod"]
         self.dist_threshold = self.config.get_section_dict("PostProcessor")["DistThreshold"]
+        # With calibration points the distances are measured on the ground plane instead of by DistMethod
+        self.ground_plane = None
+        if self.config.has_section('GroundPlane'):
+            from libs.ground_plane import GroundPlane
+            self.ground_plane = GroundPlane(self.config)
 
     def set_ui(self, ui):
         self.ui = ui
 
+    def __apply_operating_point(self):
+        """
+        Use the detector, the input size and the stride of the current operating point of the scheduler.
+        The detectors are loaded once and kept for later switches.
+        """
+        from libs.latency_scheduler import DetectorConfig
+        point = self.scheduler.operating_point
+        detector_config = DetectorConfig(self.config, point)
+        key = (point.name, tuple(point.image_size))
+        if key not in self._detectors:
+            self._detectors[key] = load_detector(detector_config)
+        self.detector = self._detectors[key]
+        self.image_size = point.image_size
+        if self.tiled_detector is not None:
+            from libs.tiled_detector import TiledDetector
+            self.tiled_detector = TiledDetector(detector_config, self.detector)
+
     def __process(self, cv_image):
         """
         return object_list list of  dict for each obj,
         obj["bbox"] is normalized coordinations for [x0, y0, x1, y1] of box
         """
+        cv_image, detector_input = self.__preprocess(cv_image)
+        if self.detection_cache is not None:
+            boxes, scores = None, None
+            if self.cache_frame_index < len(self.detection_cache):
+                boxes, scores = self.detection_cache[self.cache_frame_index]
+            self.cache_frame_index += 1
+            if boxes is None:
+                return cv_image, self.last_objects, self.last_distancings
+            return self.__postprocess(cv_image, boxes, scores)
+        if self.scheduler is not None:
+            # Only every stride-th frame of the operating point goes through the detector
+            self.frame_count += 1
+            if self.frame_count % self.scheduler.operating_point.stride != 0:
+                return self.__skip_detection(cv_image)
+        if self.motion_gate is not None and not self.motion_gate.should_detect(cv_image):
+            # Nothing moved, keep the objects of the last processed frame
+            return self.__skip_detection(cv_image)
+        if self.detector_pool is not None:
+            self.detector_pool.submit(detector_input, cv_image)
+            cv_image, boxes, scores = self.detector_pool.flush()[-1]
+        else:
+            t_begin = time.perf_counter()
+            boxes, scores = run_detection(self.detector, self.tiled_detector, self.image_size, detector_input)
+            if self.motion_gate is not None:
+                self.motion_gate.add_detection_time(time.perf_counter() - t_begin)
+        if self.detection_recorder is not None:
+            self.detection_recorder.add(boxes, scores)
+        return self.__postprocess(cv_image, boxes, scores)
+
+    def __skip_detection(self, cv_image):
+        """
+        Return the objects of the last processed frame for a frame that is not sent to the detector.
+        """
+        if self.detection_recorder is not None:
+            self.detection_recorder.add_skipped()
+        return cv_image, self.last_objects, self.last_distancings
 
+    def __preprocess(self, cv_image):
+        """
+        Resize the frame to the display resolution and return it with the part of it that is sent to the detector.
+        """
         # Resize input image to resolution
         resolution = [int(i) for i in self.config.get_section_dict('App')['Resolution'].split(',')]
         cv_image = cv.resize(cv_image, tuple(resolution))
 
-        resized_image = cv.resize(cv_image, tuple(self.image_size[:2]))
-        rgb_resized_image = cv.cvtColor(resized_image, cv.COLOR_BGR2RGB)
-        tmp_objects_list = self.detector.inference(rgb_resized_image)
-        [w,h] = resolution
-
-        for obj in tmp_objects_list:
-            box = obj["bbox"]
-            x0 = box[1]
-            y0 = box[0]
-            x1 = box[3]
-            y1 = box[2]
-            obj["centroid"] = [(x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0]
-            obj["bbox"] = [x0, y0, x1, y1]
-            obj["centroidReal"]=[(x0 + x1)*w / 2, (y0 + y1)*h / 2, (x1 - x0)*w, (y1 - y0)*h]
-            obj["bboxReal"]=[x0*w,y0*h,x1*w,y1*h]
- 
+        detector_input = cv_image
+        if self.region_of_interest is not None:
+            detector_input = self.region_of_interest.crop(cv_image)
+        return cv_image, detector_input
+
+    def __postprocess(self, cv_image, boxes, scores):
+        """
+        Map the detector output to the frame, track the objects and calculate their distances.
+        """
+        if self.region_of_interest is not None:
+            boxes = self.region_of_interest.to_frame_coordinates(boxes)
+            boxes, scores = self.region_of_interest.filter(boxes, scores)
+        h, w = cv_image.shape[:2]
+        tmp_objects_list = self.detections_to_objects(boxes, scores, [w, h])
+
         objects_list, distancings = self.calculate_distancing(tmp_objects_list)
+        self.last_objects, self.last_distancings = objects_list, distancings
         return cv_image, objects_list, distancings
 
+    def detections_to_objects(self, boxes, scores, resolution):
+        """
+        Build the objects list from the output arrays of the detector. All of the coordinates are
+        computed for the whole array at once and only the final dictionaries are built per object.
+
+        params:
+        boxes: a [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes
+        scores: a [N] array of the score of each box
+        resolution: (w, h) of the frame that is used for the real coordinates
+
+        returns:
+        object_list: a list of dictionaries with "id", "bbox", "score", "centroid", "bboxReal" and "centroidReal" keys
+        """
+        [w, h] = resolution
+        # Reorder [ymin, xmin, ymax, xmax] to [x0, y0, x1, y1]
+        bboxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[:, [1, 0, 3, 2]]
+        x0, y0, x1, y1 = bboxes.T
+        centroids = np.stack(((x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0), axis=1)
+        scale = np.array([w, h, w, h], dtype=np.float32)
+        objects_list = []
+        for i, (bbox, centroid, bbox_real, centroid_real, score) in enumerate(zip(
+                bboxes.tolist(), centroids.tolist(), (bboxes * scale).tolist(), (centroids * scale).tolist(),
+                np.asarray(scores).tolist())):
+            objects_list.append({"id": str(self.class_id) + "-" + str(i), "bbox": bbox, "score": score,
+                                 "centroid": centroid, "bboxReal": bbox_real, "centroidReal": centroid_real})
+        return objects_list
+
     def process_video(self, video_uri):
-        input_cap = cv.VideoCapture(video_uri)
+        if is_live_source(video_uri, self.config):
+            # Only the newest frame of a live source is processed, the frames in between are dropped
+            input_cap = LatestFrameReader(video_uri, thread_budget=self.thread_budget)
+            self.frame_reader = input_cap
+        else:
+            input_cap = cv.VideoCapture(video_uri)
 
         if (input_cap.isOpened()):
             print('opened video ', video_uri)
@@ -83,21 +276,99 @@ class Distancing:
             return
 
         self.running_video = True
-        while input_cap.isOpened() and self.running_video:
-            _, cv_image = input_cap.read()
-            if np.shape(cv_image) != ():
-                cv_image, objects, distancings = self.__process(cv_image)
-            else:
-                continue
-            self.logger.update(objects, distancings)
-            self.ui.update(cv_image, objects, distancings)
+        if self.detector_pool is not None:
+            self.__process_video_with_pool(input_cap)
+        else:
+            while input_cap.isOpened() and self.running_video:
+                _, cv_image = input_cap.read()
+                t_begin = time.perf_counter()
+                if np.shape(cv_image) != ():
+                    cv_image, objects, distancings = self.__process(cv_image)
+                elif self.frame_reader is None:
+                    # The end of a video file, so the recorded detections and open episodes are written
+                    break
+                else:
+                    continue
+                self.__publish(cv_image, objects, distancings)
+                if self.scheduler is not None and self.scheduler.record(time.perf_counter() - t_begin):
+                    self.__apply_operating_point()
         input_cap.release()
         self.running_video = False
+        if self.detection_recorder is not None:
+            self.detection_recorder.save()
+        self.logger.flush()
+        if self.motion_gate is not None:
+            self.motion_gate.print_report()
+
+    def __publish(self, cv_image, objects, distancings):
+        """
+        Update the statistics and the heatmap with a processed frame and pass it to the logger and the ui.
+        """
+        self.statistics.update(objects, distancings)
+        foot_points = None
+        if self.ground_plane is not None:
+            foot_points = self.ground_plane.normalize([obj["groundPoint"] for obj in objects])
+        self.heatmap.update(objects, self.statistics.violating_objects, foot_points)
+        self.logger.update(objects, distancings)
+        self.ui.update(cv_image, objects, distancings)
+
+    def __process_video_with_pool(self, input_cap):
+        """
+        Keep the workers of the detector pool busy with the next frames while the results of the previous
+        frames are post-processed. The results are returned by the pool in frame order.
+        """
+        def _publish(results):
+            for cv_image, boxes, scores in results:
+                if boxes is None:
+                    # The frame was skipped by the motion gate
+                    objects, distancings = self.last_objects, self.last_distancings
+                else:
+                    cv_image, objects, distancings = self.__postprocess(cv_image, boxes, scores)
+                self.__publish(cv_image, objects, distancings)
+            if self.motion_gate is not None:
+                self.motion_gate.detection_time = self.detector_pool.total_busy_time()
+
+        try:
+            while input_cap.isOpened() and self.running_video:
+                _, cv_image = input_cap.read()
+                if np.shape(cv_image) == ():
+                    if self.frame_reader is None:
+                        break
+                    continue
+                cv_image, detector_input = self.__preprocess(cv_image)
+                if self.motion_gate is not None and not self.motion_gate.should_detect(cv_image):
+                    self.detector_pool.skip(cv_image)
+                else:
+                    self.detector_pool.submit(detector_input, cv_image)
+                _publish(self.detector_pool.get_results())
+            _publish(self.detector_pool.flush())
+        finally:
+            self.detector_pool.close()
+
+    def process_detection_cache(self):
+        """
+        Run the post-processing on all of the frames of the replayed detection cache without reading the video,
+        e.g. to evaluate post-processing parameters.
+
+        Yields:
+            objects, distancings: The objects list and the distances of every frame
+        """
+        resolution = [int(i) for i in self.config.get_section_dict('App')['Resolution'].split(',')]
+        cv_image = np.zeros((resolution[1], resolution[0], 3), dtype=np.uint8)
+        if self.region_of_interest is not None:
+            self.region_of_interest.crop(cv_image)
+        for boxes, scores in self.detection_cache:
+            if boxes is None:
+                objects, distancings = self.last_objects, self.last_distancings
+            else:
+                _, objects, distancings = self.__postprocess(cv_image, boxes, scores)
+            yield objects, distancings
 
     def process_image(self, image_path):
         # Process and pass the image to ui modules
         cv_image = cv.imread(image_path)
         cv_image, objects, distancings = self.__process(cv_image)
+        self.statistics.update(objects, distancings)
         self.ui.update(cv_image, objects, distancings)
 
     def calculate_distancing(self, objects_list):
@@ -125,8 +396,10 @@ class Distancing:
                                                                    "NMSThreshold"]))
         tracked_boxes = self.tracker.update(new_objects_list)
         new_objects_list = [tracked_boxes[i] for i in tracked_boxes.keys()]
-        for i, item in enumerate(new_objects_list):
+        for i, (track_id, item) in enumerate(zip(tracked_boxes.keys(), new_objects_list)):
             item["id"] = item["id"].split("-")[0] + "-" + str(i)
+            # The key of the tracker stays the same while the object is tracked
+            item["trackId"] = track_id
 
         centroids = np.array( [obj["centroid"] for obj in new_objects_list] )
         distances = self.calculate_box_distances(new_objects_list)
@@ -255,6 +528,12 @@ class Distancing:
         distances: a NxN ndarray which i,j element is estimated distance between i-th and j-th bounding box in real scene (cm)
 
         """
+        if self.ground_plane is not None:
+            # Project all of the foot points at once and keep them for the bird's eye view and the heatmap
+            ground_points = self.ground_plane.project(self.ground_plane.foot_points(nn_out))
+            for item, ground_point in zip(nn_out, ground_points.tolist()):
+                item["groundPoint"] = ground_point
+            return self.ground_plane.distances(ground_points)
 
         distances = []
         for i in range(len(nn_out)):
@@ -0,0 +1,105 @@
+import hashlib
+import os
+
+import numpy as np
+
+
+def video_hash(video_uri, chunk_size=4 * 1024 * 1024):
+    """
+    Return a short hash of a video file from its size and its first and last chunk, so large files do not have
+    to be read completely.
+    """
+    sha1 = hashlib.sha1()
+    size = os.path.getsize(video_uri)
+    sha1.update(str(size).encode())
+    with open(video_uri, 'rb') as video_file:
+        sha1.update(video_file.read(chunk_size))
+        if size > chunk_size:
+            video_file.seek(max(size - chunk_size, chunk_size))
+            sha1.update(video_file.read(chunk_size))
+    return sha1.hexdigest()[:16]
+
+
+def cache_path(config, video_uri):
+    """
+    Return the path of the detection cache of a video and the configured detector. The cache files are stored
+    in the CacheDirectory of the App section.
+    """
+    cache_directory = config.get_section_dict('App').get('CacheDirectory', 'data/detection_cache')
+    detector_name = config.get_section_dict('Detector')['Name']
+    file_name = '%s_%s.npz' % (video_hash(video_uri), detector_name)
+    return os.path.join(cache_directory, file_name)
+
+
+class DetectionRecorder:
+    """
+    Record the raw output of the detector for every frame of a video.
+
+    The boxes and scores of all frames are concatenated into two arrays with the offset of every frame, and
+    frames that were not sent to the detector (e.g. skipped by the motion gate) are marked, so a replay
+    reproduces the same sequence. The arrays are written as one compressed .npz file by save.
+
+    :param path: Path of the cache file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._boxes = []
+        self._scores = []
+        self._detected = []
+
+    def add(self, boxes, scores):
+        """ Record the boxes and scores that the detector returned for a frame. """
+        self._boxes.append(np.asarray(boxes, dtype=np.float32).reshape(-1, 4))
+        self._scores.append(np.asarray(scores, dtype=np.float32).reshape(-1))
+        self._detected.append(True)
+
+    def add_skipped(self):
+        """ Record a frame that was not sent to the detector. """
+        self._boxes.append(np.zeros((0, 4), dtype=np.float32))
+        self._scores.append(np.zeros(0, dtype=np.float32))
+        self._detected.append(False)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        offsets = np.cumsum([0] + [len(scores) for scores in self._scores]).astype(np.int64)
+        boxes = np.concatenate(self._boxes) if self._boxes else np.zeros((0, 4), dtype=np.float32)
+        scores = np.concatenate(self._scores) if self._scores else np.zeros(0, dtype=np.float32)
+        np.savez_compressed(self.path, boxes=boxes, scores=scores, offsets=offsets,
+                            detected=np.array(self._detected, dtype=bool))
+        print('recorded the detections of %d frames to %s' % (len(self._detected), self.path))
+
+
+class DetectionCache:
+    """
+    Replay the detections of a video that were recorded by a DetectionRecorder. It can be used in place of a
+    detector, cache[i] returns the boxes and scores of the i-th frame or (None, None) if the frame was skipped.
+
+    :param path: Path of the cache file
+    :param name: Name of the detector that produced the cache
+    """
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.fps = None
+        with np.load(path) as cache:
+            self._boxes = cache['boxes']
+            self._scores = cache['scores']
+            self._offsets = cache['offsets']
+            self._detected = cache['detected']
+
+    def __len__(self):
+        return len(self._detected)
+
+    def __getitem__(self, frame_index):
+        if not self._detected[frame_index]:
+            return None, None
+        begin, end = self._offsets[frame_index], self._offsets[frame_index + 1]
+        return self._boxes[begin:end], self._scores[begin:end]
+
+    def __iter__(self):
+        for frame_index in range(len(self)):
+            yield self[frame_index]
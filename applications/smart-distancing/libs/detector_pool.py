@@ -0,0 +1,187 @@
+import multiprocessing as mp
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _worker(worker_id, config_path, shm_name, buffer_shape, task_queue, result_queue):
+    """
+    Load the configured detector and run it on the frames of the shared memory ring buffer until a None task
+    is received. Only the slot index and the frame size travel through the task queue.
+    """
+    from libs.config_engine import ConfigEngine
+    from libs.core import load_detector, run_detection
+    from libs.thread_budget import ThreadBudget
+
+    config = ConfigEngine(config_path)
+    # Every worker gets its share of the inference threads of the budget
+    ThreadBudget(config).apply('inference')
+    image_size = [int(i) for i in config.get_section_dict('Detector')['ImageSize'].split(',')]
+    detector = load_detector(config)
+    tiled_detector = None
+    if config.get_boolean('Detector', 'Tiling', fallback=False):
+        from libs.tiled_detector import TiledDetector
+        tiled_detector = TiledDetector(config, detector)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray(buffer_shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            frame_index, slot, height, width = task
+            t_begin = time.perf_counter()
+            boxes, scores = run_detection(detector, tiled_detector, image_size, slots[slot, :height, :width])
+            busy_time = time.perf_counter() - t_begin
+            result_queue.put((frame_index, slot, worker_id, np.asarray(boxes, dtype=np.float32),
+                              np.asarray(scores, dtype=np.float32), busy_time))
+    finally:
+        del slots
+        shm.close()
+
+
+class DetectorPool:
+    """
+    Run the configured Detector in several worker processes, so inference is not limited by the GIL of the
+    main process.
+
+    Frames are copied into a ring buffer of shared memory slots instead of being pickled, each worker loads
+    its own copy of the detector and returns the boxes and scores of a frame as compact arrays. Results are
+    handed back in the same order as the frames were submitted. The ring has two slots per worker, so every
+    worker can have one frame queued while it works on another one.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    :param num_workers: Number of worker processes.
+    """
+
+    def __init__(self, config, num_workers):
+        self.config = config
+        self.num_workers = num_workers
+        self.name = self.config.get_section_dict('Detector')['Name']
+        self.fps = None
+        resolution = [int(i) for i in self.config.get_section_dict('App')['Resolution'].split(',')]
+        self._buffer_shape = (2 * num_workers, resolution[1], resolution[0], 3)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self._buffer_shape)))
+        self._slots = np.ndarray(self._buffer_shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._free_slots = deque(range(self._buffer_shape[0]))
+
+        # Spawn instead of fork, the main process may already run threads (the ui) and hold framework state
+        context = mp.get_context('spawn')
+        self._task_queue = context.Queue()
+        self._result_queue = context.Queue()
+        self._workers = [
+            context.Process(target=_worker, daemon=True,
+                            args=(worker_id, self.config.config_file_path, self._shm.name, self._buffer_shape,
+                                  self._task_queue, self._result_queue))
+            for worker_id in range(num_workers)]
+        for worker in self._workers:
+            worker.start()
+
+        self._next_frame = 0
+        self._next_result = 0
+        self._contexts = {}
+        self._done = {}
+        self._busy_time = np.zeros(num_workers)
+        self._frames_per_worker = np.zeros(num_workers, dtype=np.int64)
+        self._completion_times = deque(maxlen=30)
+        self._start_time = time.perf_counter()
+
+    def _receive(self, block):
+        """ Move one result from the result queue to the done dictionary, returns False if nothing arrived. """
+        while True:
+            try:
+                frame_index, slot, worker_id, boxes, scores, busy_time = self._result_queue.get(
+                    block=block, timeout=1.0 if block else None)
+                break
+            except queue.Empty:
+                if not block:
+                    return False
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError('A detector pool worker has stopped unexpectedly')
+        self._free_slots.append(slot)
+        self._busy_time[worker_id] += busy_time
+        self._frames_per_worker[worker_id] += 1
+        self._done[frame_index] = (self._contexts.pop(frame_index), boxes, scores)
+        self._completion_times.append(time.perf_counter())
+        if len(self._completion_times) > 1:
+            elapsed = self._completion_times[-1] - self._completion_times[0]
+            if elapsed > 0:
+                self.fps = int((len(self._completion_times) - 1) / elapsed)
+        return True
+
+    def submit(self, image, context=None):
+        """
+        Queue a BGR image for detection, it blocks while all of the ring buffer slots are in use.
+
+        Args:
+            image: uint8 numpy array with shape (img_height, img_width, 3), not larger than the App resolution
+            context: Any object that is returned with the result of this image, e.g. the frame to display
+        """
+        while len(self._free_slots) == 0:
+            self._receive(block=True)
+        slot = self._free_slots.popleft()
+        height, width = image.shape[:2]
+        self._slots[slot, :height, :width] = image
+        self._contexts[self._next_frame] = context
+        self._task_queue.put((self._next_frame, slot, height, width))
+        self._next_frame += 1
+
+    def skip(self, context=None):
+        """
+        Add a frame that is not sent to the detector, its result is returned in frame order with None boxes and scores.
+        """
+        self._done[self._next_frame] = (context, None, None)
+        self._next_frame += 1
+
+    def get_results(self):
+        """
+        Return the finished results that are next in frame order without waiting.
+
+        Returns:
+            results: list of (context, boxes, scores) tuples
+        """
+        while self._receive(block=False):
+            pass
+        results = []
+        while self._next_result in self._done:
+            results.append(self._done.pop(self._next_result))
+            self._next_result += 1
+        return results
+
+    def flush(self):
+        """
+        Wait for all of the submitted images and return their results in frame order.
+        """
+        while self._next_result + len(self._done) < self._next_frame:
+            self._receive(block=True)
+        return self.get_results()
+
+    def total_busy_time(self):
+        """ Return the total time in seconds that the workers spent on inference. """
+        return float(self._busy_time.sum())
+
+    def utilization(self):
+        """
+        Return the fraction of the time each worker spent on inference since the pool was started.
+        """
+        elapsed = time.perf_counter() - self._start_time
+        return self._busy_time / elapsed if elapsed > 0 else np.zeros(self.num_workers)
+
+    def close(self):
+        """ Stop the workers and release the shared memory. """
+        if self._shm is None:
+            return
+        for worker_id, (utilization, frames) in enumerate(zip(self.utilization(), self._frames_per_worker)):
+            print('detector pool worker %d: %d frames, %.0f%% utilization' % (worker_id, frames, 100 * utilization))
+        for _ in self._workers:
+            self._task_queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+        del self._slots
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
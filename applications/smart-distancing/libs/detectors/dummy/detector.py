@@ -1,29 +1,127 @@
-import numpy as np
 import time
 
+import numpy as np
+
+from ..utils.fps_calculator import convert_infr_time_to_fps
+
+
 class Detector:
     """
-    Detects Random bounding boxes
+    Detects synthetic pedestrians walking across the frame.
+
+    Detector class is a high level class for generating a deterministic detection load without any model.
+    Each pedestrian keeps its position between frames and walks with a constant velocity, when it leaves
+    the frame a new one enters from the opposite side, so the number of people in the scene stays constant.
+    The generated boxes only depend on the seed and the frame number, not on the input image, which
+    makes it useful for load-testing the tracker, the loggers and the ui.
 
-    Detector class is a high level class for detecting object using edgetpu devices.
-    When an instance of the Detector is created you can call inference method and feed your
-    input image in order to get the detection results.
+    The following optional parameters are read from the Detector section of the config:
+        CrowdSize: number of pedestrians in the scene (default 20)
+        Seed: seed of the random generators (default 0)
+        LatencyDistribution: none, constant, normal or exponential (default none, the detector never sleeps)
+        LatencyMean: mean of the simulated inference latency in milliseconds (default 0)
+        LatencyStd: standard deviation of the normal latency distribution in milliseconds (default 0)
 
     :param config: Is a ConfigEngine instance which provides necessary parameters.
     """
 
+    # Pedestrians are taller when they are closer to the bottom of the frame
+    MIN_HEIGHT = 0.1
+    MAX_HEIGHT = 0.4
+    ASPECT_RATIO = 0.4  # width / height
+    # Range of the walking speed in normalized frame width per frame
+    MIN_SPEED = 0.001
+    MAX_SPEED = 0.006
+
     def __init__(self, config):
         self.config = config
-        self.name = self.config.get_section_dict('Detector')['Name']
-        self.class_id = self.config.get_section_dict('Detector')['ClassID']
+        section = self.config.get_section_dict('Detector')
+        self.name = section['Name']
+        self.class_id = int(section['ClassID'])
+        self.crowd_size = int(section.get('CrowdSize', 20))
+        self.seed = int(section.get('Seed', 0))
+        self.latency_distribution = section.get('LatencyDistribution', 'none').strip().lower()
+        self.latency_mean = float(section.get('LatencyMean', 0)) / 1000.0  # Seconds
+        self.latency_std = float(section.get('LatencyStd', 0)) / 1000.0  # Seconds
+        if self.latency_distribution not in ('none', 'constant', 'normal', 'exponential'):
+            raise ValueError('Not supported latency distribution: ', self.latency_distribution)
+        self.fps = None
+        self.frame_number = 0
+
+        # Separate generators keep the walking pedestrians independent of the latency settings
+        self._rng = np.random.RandomState(self.seed)
+        self._latency_rng = np.random.RandomState(self.seed + 1)
+        # Foot point (x, y), velocity (vx, vy) and score of each pedestrian
+        self._positions = np.zeros((self.crowd_size, 2), dtype=np.float32)
+        self._velocities = np.zeros((self.crowd_size, 2), dtype=np.float32)
+        self._scores = np.zeros(self.crowd_size, dtype=np.float32)
+        self._spawn(np.arange(self.crowd_size), initial=True)
+
+    def _spawn(self, indices, initial=False):
+        """
+        Place new pedestrians at the given indices. At start up they are scattered over the whole frame,
+        afterwards they enter from the left or the right edge of the frame.
+        """
+        count = len(indices)
+        if count == 0:
+            return
+        directions = self._rng.choice([-1.0, 1.0], size=count)
+        speeds = self._rng.uniform(self.MIN_SPEED, self.MAX_SPEED, size=count)
+        y = self._rng.uniform(0.3, 1.0, size=count)
+        if initial:
+            x = self._rng.uniform(0.0, 1.0, size=count)
+        else:
+            x = np.where(directions > 0, 0.0, 1.0)
+        self._positions[indices, 0] = x
+        self._positions[indices, 1] = y
+        self._velocities[indices, 0] = directions * speeds
+        self._velocities[indices, 1] = self._rng.uniform(-0.2, 0.2, size=count) * speeds
+        self._scores[indices] = self._rng.uniform(0.5, 1.0, size=count)
+
+    def _step(self):
+        """ Move every pedestrian one frame forward. """
+        self._positions += self._velocities
+        # Bounce on the top and bottom of the walking area
+        out_of_rows = (self._positions[:, 1] < 0.3) | (self._positions[:, 1] > 1.0)
+        self._velocities[out_of_rows, 1] *= -1
+        np.clip(self._positions[:, 1], 0.3, 1.0, out=self._positions[:, 1])
+        # Replace the pedestrians which have left the frame
+        left_frame = np.flatnonzero((self._positions[:, 0] < 0.0) | (self._positions[:, 0] > 1.0))
+        self._spawn(left_frame)
+
+    def _simulated_latency(self):
+        if self.latency_distribution == 'constant':
+            return self.latency_mean
+        elif self.latency_distribution == 'normal':
+            return max(0.0, self._latency_rng.normal(self.latency_mean, self.latency_std))
+        elif self.latency_distribution == 'exponential':
+            return self._latency_rng.exponential(self.latency_mean) if self.latency_mean > 0 else 0.0
+        return 0.0
 
     def inference(self, resized_rgb_image):
-        self.fps = np.random.choice([0.5, 1, 2])
-        time.sleep(1.0 / self.fps)
-        bbox_transform = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 1]]) * 0.5
-        class_id = self.class_id
-        return [{
-            'id': str(class_id)+"-"+str(i),
-            'bbox': (bbox_transform @ np.random.rand(4)).tolist(),
-            'cls': class_id
-        } for i in range(np.random.randint(5))]
+        """
+        Generate the detections of the next frame. The input image is ignored.
+
+        Args:
+            resized_rgb_image: uint8 numpy array with shape (img_height, img_width, channels)
+
+        Returns:
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
+        """
+        t_begin = time.perf_counter()
+        self._step()
+        self.frame_number += 1
+        x, y = self._positions[:, 0], self._positions[:, 1]
+        heights = self.MIN_HEIGHT + (self.MAX_HEIGHT - self.MIN_HEIGHT) * (y - 0.3) / 0.7
+        half_widths = heights * self.ASPECT_RATIO / 2
+        boxes = np.stack((y - heights, x - half_widths, y, x + half_widths), axis=1)
+        boxes = np.clip(boxes, 0.0, 1.0).astype(np.float32)
+        scores = self._scores.copy()
+
+        latency = self._simulated_latency()
+        if latency > 0:
+            time.sleep(latency)
+        inference_time = max(time.perf_counter() - t_begin, 1e-6)  # Seconds
+        self.fps = convert_infr_time_to_fps(inference_time)
+        return boxes, scores
@@ -6,6 +6,7 @@ import wget
 from tflite_runtime.interpreter import load_delegate
 from tflite_runtime.interpreter import Interpreter
 from ..utils.fps_calculator import convert_infr_time_to_fps
+from ..utils.decoding import decode_ssd_output
 
 
 class Detector:
@@ -59,7 +60,8 @@ class Detector:
             resized_rgb_image: uint8 numpy array with shape (img_height, img_width, channels)
 
         Returns:
-            result: a dictionary contains of [{"id": 0, "bbox": [x1, y1, x2, y2], "score":s%}, {...}, {...}, ...]
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
         """
         input_image = np.expand_dims(resized_rgb_image, axis=0)
         # Fill input tensor with input_image
@@ -76,9 +78,4 @@ class Detector:
         # TODO: will be used for getting number of objects
         # num = self.interpreter.get_tensor(self.output_details[3]['index'])
 
-        result = []
-        for i in range(boxes.shape[1]):  # number of boxes
-            if labels[0, i] == self.class_id and scores[0, i] > self.score_threshold:
-                result.append({"id": str(self.class_id) + '-' + str(i), "bbox": boxes[0, i, :], "score": scores[0, i]})
-
-        return result
+        return decode_ssd_output(boxes, labels, scores, self.class_id, self.score_threshold)
@@ -27,9 +27,9 @@ class Detector:
             resized_rgb_image: A numpy array with shape [height, width, channels]
 
         Returns:
-            output: List of objects, each obj is a dict with two keys "id" and "bbox" and "score"
-            e.g. [{"id": 0, "bbox": [x1, y1, x2, y2], "score":s%}, {...}, {...}, ...]
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
         """
         self.fps = self.net.fps
-        output = self.net.inference(resized_rgb_image)
-        return output
+        boxes, scores = self.net.inference(resized_rgb_image)
+        return boxes, scores
@@ -4,6 +4,7 @@ import tensorrt as trt
 import pycuda.driver as cuda
 import time
 from ..utils.fps_calculator import convert_infr_time_to_fps
+from ..utils.decoding import decode_detection_out
 import pycuda.autoinit  # Required for initializing CUDA driver
 
 
@@ -78,24 +79,10 @@ class Detector:
         img = (2.0 / 255.0) * img - 1.0
         return img
 
-    def _postprocess_trt(self, img, output):
-        """ Postprocess TRT SSD output. """
-        img_h, img_w, _ = img.shape
-        boxes, confs, clss = [], [], []
-        for prefix in range(0, len(output), self.output_layout):
-            # index = int(output[prefix+0])
-            conf = float(output[prefix + 2])
-            if conf < float(self.conf_threshold):
-                continue
-            x1 = (output[prefix + 3])  # * img_w)
-            y1 = (output[prefix + 4])  # * img_h)
-            x2 = (output[prefix + 5])  # * img_w)
-            y2 = (output[prefix + 6])  # * img_h)
-            cls = int(output[prefix + 1])
-            boxes.append((y1, x1, y2, x2))
-            confs.append(conf)
-            clss.append(cls)
-        return boxes, confs, clss
+    def _postprocess_trt(self, output):
+        """ Postprocess TRT SSD output. The TRT engine uses 1-based class ids, a score equal to MinScore is kept. """
+        return decode_detection_out(output, self.class_id + 1, float(self.conf_threshold), self.output_layout,
+                                    inclusive=True)
 
     def inference(self, img):
         """
@@ -105,7 +92,8 @@ class Detector:
             img: uint8 numpy array with shape (img_height, img_width, channels)
 
         Returns:
-            result: a dictionary contains of [{"id": 0, "bbox": [x1, y1, x2, y2], "score": s% }, {...}, {...}, ...]
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
         """
         img_resized = self._preprocess_trt(img)
         # transfer the data to the GPU, run inference and the copy the results back
@@ -129,10 +117,4 @@ class Detector:
         # Calculate Frames rate (fps)
         self.fps = convert_infr_time_to_fps(inference_time)
         output = self.host_outputs[0]
-        boxes, scores, classes = self._postprocess_trt(img, output)
-        result = []
-        for i in range(len(boxes)):  # number of boxes
-            if classes[i] == self.class_id + 1:
-                result.append({"id": str(classes[i] - 1) + '-' + str(i), "bbox": boxes[i], "score": scores[i]})
-
-        return result
+        return self._postprocess_trt(output)
@@ -0,0 +1,35 @@
+class Detector:
+    """
+    Detector class is a high level class for detecting object using the TFLite runtime on CPU.
+    When an instance of the Detector is created you can call inference method and feed your
+    input image in order to get the detection results.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.net = None
+        self.fps = None
+        # Get model name from the config
+        self.name = self.config.get_section_dict('Detector')['Name']
+        if self.name in ('mobilenet_ssd_v2', 'pedestrian_ssd_mobilenet_v2', 'pedestrian_ssdlite_mobilenet_v2'):
+            from . import mobilenet_ssd
+            self.net = mobilenet_ssd.Detector(self.config)
+        else:
+            raise ValueError('Not supported network named: ', self.name)
+
+    def inference(self, resized_rgb_image):
+        """
+        Run inference on an image and get Frames rate (fps)
+
+        Args:
+            resized_rgb_image: A numpy array with shape [height, width, channels]
+
+        Returns:
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
+        """
+        self.fps = self.net.fps
+        boxes, scores = self.net.inference(resized_rgb_image)
+        return boxes, scores
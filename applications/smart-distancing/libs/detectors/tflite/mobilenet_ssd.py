@@ -0,0 +1,106 @@
+import os
+import time
+import numpy as np
+import wget
+
+from tflite_runtime.interpreter import Interpreter
+from ..utils.fps_calculator import convert_infr_time_to_fps
+from ..utils.decoding import decode_ssd_output
+
+# The CPU (non EdgeTPU-compiled) version of each supported quantized SSD model
+MODEL_FILES = {
+    'mobilenet_ssd_v2': 'mobilenet_ssd_v2_coco_quant_postprocess.tflite',
+    'pedestrian_ssd_mobilenet_v2': 'ped_ssd_mobilenet_v2_quantized.tflite',
+    'pedestrian_ssdlite_mobilenet_v2': 'ped_ssdlite_mobilenet_v2_quantized.tflite',
+}
+
+
+def _create_interpreter(model_path, num_threads, use_xnnpack):
+    """
+    Create a multithreaded TFLite interpreter. Recent tflite_runtime builds apply the XNNPACK delegate
+    by default; older builds do not know about op resolver types and run with the builtin kernels only.
+    """
+    try:
+        from tflite_runtime.interpreter import OpResolverType
+    except ImportError:
+        return Interpreter(model_path, num_threads=num_threads)
+    resolver_type = OpResolverType.AUTO if use_xnnpack else OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    return Interpreter(model_path, num_threads=num_threads, experimental_op_resolver_type=resolver_type)
+
+
+class Detector:
+    """
+    Perform object detection on CPU with the given model. The model is a quantized tflite
+    file which if the detector can not find it at the path it will download it
+    from neuralet repository automatically.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        # Get the model name from the config
+        self.model_name = self.config.get_section_dict('Detector')['Name']
+        # Frames Per Second
+        self.fps = None
+        self.model_file = MODEL_FILES[self.model_name]
+        self.model_path = 'libs/detectors/tflite/data/' + self.model_file
+
+        # Get the model .tflite file path from the config.
+        # If there is no .tflite file in the path it will be downloaded automatically from base_url
+        user_model_path = self.config.get_section_dict('Detector')['ModelPath']
+        if len(user_model_path) > 0:
+            print('using %s as model' % user_model_path)
+            self.model_path = user_model_path
+        else:
+            base_url = 'https://raw.githubusercontent.com/neuralet/neuralet-models/master/amd64/'
+            url = base_url + self.model_name + '/' + self.model_file
+
+            if not os.path.isfile(self.model_path):
+                print('model does not exist under: ', self.model_path, 'downloading from ', url)
+                wget.download(url, self.model_path)
+
+        # Number of CPU threads used by the interpreter, all of the available cores by default
+        num_threads = self.config.get_section_dict('Detector').get('NumThreads', '')
+        self.num_threads = int(num_threads) if num_threads else os.cpu_count()
+        self.use_xnnpack = self.config.get_boolean('Detector', 'XNNPACK', fallback=True)
+
+        # Load TFLite model and allocate tensors
+        self.interpreter = _create_interpreter(self.model_path, self.num_threads, self.use_xnnpack)
+        self.interpreter.allocate_tensors()
+        # Get the model input and output tensor details
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        # `tensor()` returns a function that gives a numpy view on the interpreter's internal buffer,
+        # the views must not be kept alive across invoke() calls so only the functions are stored.
+        self._input_tensor = self.interpreter.tensor(self.input_details[0]['index'])
+        self._boxes_tensor = self.interpreter.tensor(self.output_details[0]['index'])
+        self._labels_tensor = self.interpreter.tensor(self.output_details[1]['index'])
+        self._scores_tensor = self.interpreter.tensor(self.output_details[2]['index'])
+
+        # Get class id from config
+        self.class_id = int(self.config.get_section_dict('Detector')['ClassID'])
+        self.score_threshold = float(self.config.get_section_dict('Detector')['MinScore'])
+
+    def inference(self, resized_rgb_image):
+        """
+        inference function writes input image directly into the input tensor and reads the output tensors
+        without copying them.
+        The interpreter instance provides corresponding detection output which is used for creating result
+        Args:
+            resized_rgb_image: uint8 numpy array with shape (img_height, img_width, channels)
+
+        Returns:
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
+        """
+        # Fill input tensor with input_image in place
+        np.copyto(self._input_tensor()[0], resized_rgb_image)
+        t_begin = time.perf_counter()
+        self.interpreter.invoke()
+        inference_time = time.perf_counter() - t_begin  # Second
+        self.fps = convert_infr_time_to_fps(inference_time)
+        # The decoder gathers the kept boxes into new arrays, so nothing refers to the interpreter
+        # buffers after this call.
+        return decode_ssd_output(self._boxes_tensor(), self._labels_tensor(), self._scores_tensor(),
+                                 self.class_id, self.score_threshold)
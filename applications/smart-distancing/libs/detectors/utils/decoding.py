@@ -0,0 +1,69 @@
+"""A set of function(s) that are used for decoding the raw output of the detectors.
+
+These function(s) receive the whole output tensors of a detector, filter them by class and score
+and return the remaining boxes as arrays. Every box is normalized [ymin, xmin, ymax, xmax] and
+clipped to the image.
+
+"""
+import numpy as np
+
+
+def filter_detections(boxes, classes, scores, class_id, score_threshold, inclusive=False):
+    """
+    Keep the boxes of the given class whose score is above the threshold.
+
+    Args:
+        boxes: Array of normalized [ymin, xmin, ymax, xmax] boxes with any leading batch dimensions.
+        classes: Array of class ids with the same leading dimensions as boxes.
+        scores: Array of scores with the same leading dimensions as boxes.
+        class_id: The class id that should be kept.
+        score_threshold: Boxes with a score lower than or equal to this value are dropped.
+        inclusive: Keep the boxes whose score is equal to score_threshold as well.
+
+    Returns:
+        boxes: A float32 array of shape [N, 4] with the clipped boxes.
+        scores: A float32 array of shape [N] with the score of each box.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    classes = np.asarray(classes).reshape(-1)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    keep = (classes == class_id) & ((scores >= score_threshold) if inclusive else (scores > score_threshold))
+    return np.clip(boxes[keep], 0.0, 1.0), scores[keep]
+
+
+def decode_ssd_output(boxes, classes, scores, class_id, score_threshold):
+    """
+    Decode the output of a TensorFlow Object Detection API SSD model (TF saved model or TFLite with the
+    detection postprocess op), which already stores boxes as [ymin, xmin, ymax, xmax].
+
+    Args:
+        boxes: Array of shape [1, num_boxes, 4].
+        classes: Array of shape [1, num_boxes].
+        scores: Array of shape [1, num_boxes].
+        class_id: The class id that should be kept.
+        score_threshold: The minimum score of a box.
+
+    Returns:
+        boxes, scores: See filter_detections.
+    """
+    return filter_detections(boxes, classes, scores, class_id, score_threshold)
+
+
+def decode_detection_out(output, class_id, score_threshold, output_layout=7, inclusive=False):
+    """
+    Decode the output of a DetectionOutput layer, used by OpenVINO and TensorRT SSD models.
+    Each detection is stored as [image_id, label, confidence, xmin, ymin, xmax, ymax].
+
+    Args:
+        output: Array of detections with any shape, which is flattened into rows of output_layout values.
+        class_id: The class id that should be kept.
+        score_threshold: The minimum score of a box.
+        output_layout: Number of values stored for each detection.
+        inclusive: Keep the boxes whose score is equal to score_threshold as well.
+
+    Returns:
+        boxes, scores: See filter_detections.
+    """
+    output = np.asarray(output, dtype=np.float32).reshape(-1, output_layout)
+    return filter_detections(output[:, [4, 3, 6, 5]], output[:, 1], output[:, 2], class_id, score_threshold,
+                             inclusive)
@@ -0,0 +1,146 @@
+"""
+Parity of the vectorized decoding with the per-box loops that the detector backends used before.
+
+The outputs below have the layout of the raw outputs of each detector family, shortened to a few boxes. They
+include boxes of other classes, scores equal to the threshold, coordinates outside of the image and padding rows.
+The vectorized decoding clips the boxes to the image, so the loops are compared after clipping.
+
+    python -m pytest libs/detectors/utils/test_decoding.py
+"""
+import unittest
+
+import numpy as np
+
+from libs.detectors.utils.decoding import decode_detection_out, decode_ssd_output
+
+CLASS_ID = 0
+SCORE_THRESHOLD = 0.25
+
+# TFLite / EdgeTPU / TF saved model SSD: boxes [1, N, 4] as [ymin, xmin, ymax, xmax], classes [1, N], scores [1, N]
+SSD_BOXES = np.array([[
+    [0.1218, 0.5032, 0.6127, 0.6259],
+    [0.2281, 0.1375, 0.8846, 0.3117],
+    [0.0423, 0.8514, 0.3392, 0.9418],
+    [0.5527, 0.4456, 0.9981, 0.5743],
+    [-0.0117, 0.7215, 0.4176, 1.0094],
+    [0.3012, 0.2987, 0.4021, 0.3569],
+    [0.6623, 0.0012, 0.9877, 0.0984],
+    [0.0000, 0.0000, 0.0000, 0.0000],
+]], dtype=np.float32)
+SSD_CLASSES = np.array([[0., 0., 2., 0., 0., 61., 0., 0.]], dtype=np.float32)
+SSD_SCORES = np.array([[0.8906, 0.7422, 0.6133, 0.4219, 0.3047, 0.2852, 0.25, 0.0]], dtype=np.float32)
+
+# OpenVINO DetectionOutput [1, 1, N, 7]: image_id, label, confidence, xmin, ymin, xmax, ymax
+OPENVINO_OUTPUT = np.array([[[
+    [0., 0., 0.9512, 0.5041, 0.1207, 0.6266, 0.6135],
+    [0., 0., 0.7630, 0.1369, 0.2273, 0.3125, 0.8851],
+    [0., 2., 0.5911, 0.8509, 0.0417, 0.9421, 0.3386],
+    [0., 0., 0.3344, -0.0213, 0.5519, 0.0978, 1.0036],
+    [0., 0., 0.25, 0.7209, 0.0098, 1.0021, 0.4170],
+    [0., 0., 0.1023, 0.2991, 0.3017, 0.3572, 0.4019],
+    [-1., 0., 0., 0., 0., 0., 0.],
+]]], dtype=np.float32)
+
+# TensorRT DetectionOutput flattened, with 1-based class ids: image_id, label, confidence, xmin, ymin, xmax, ymax
+TRT_OUTPUT = np.array([
+    0., 1., 0.9438, 0.5036, 0.1211, 0.6262, 0.6130,
+    0., 1., 0.7715, 0.1371, 0.2277, 0.3121, 0.8849,
+    0., 3., 0.6035, 0.8511, 0.0420, 0.9420, 0.3389,
+    0., 1., 0.25, -0.0207, 0.5522, 0.0981, 1.0032,
+    0., 1., 0.2441, 0.7212, 0.0101, 1.0018, 0.4173,
+    -1., 0., 0., 0., 0., 0., 0.,
+], dtype=np.float32)
+
+
+def ssd_loop(boxes, labels, scores, class_id, score_threshold):
+    # The loop of the TFLite, EdgeTPU and x86 SSD detectors
+    result = []
+    for i in range(boxes.shape[1]):  # number of boxes
+        if labels[0, i] == class_id and scores[0, i] > score_threshold:
+            result.append({"id": str(class_id) + '-' + str(i), "bbox": boxes[0, i, :], "score": scores[0, i]})
+    return result
+
+
+def openvino_loop(output, class_id, score_threshold):
+    # The loop of the x86 OpenVINO detector
+    result = []
+    for i, (_, label, score, x_min, y_min, x_max, y_max) in enumerate(output[0][0]):
+        box = [y_min, x_min, y_max, x_max]
+        if label == class_id and score > score_threshold:
+            result.append({"id": str(class_id) + '-' + str(i), "bbox": box, "score": score})
+    return result
+
+
+def trt_loop(output, class_id, conf_threshold, output_layout=7):
+    # The _postprocess_trt loop and the class filter of the Jetson detector
+    boxes, confs, clss = [], [], []
+    for prefix in range(0, len(output), output_layout):
+        conf = float(output[prefix + 2])
+        if conf < float(conf_threshold):
+            continue
+        x1 = (output[prefix + 3])
+        y1 = (output[prefix + 4])
+        x2 = (output[prefix + 5])
+        y2 = (output[prefix + 6])
+        cls = int(output[prefix + 1])
+        boxes.append((y1, x1, y2, x2))
+        confs.append(conf)
+        clss.append(cls)
+    result = []
+    for i in range(len(boxes)):  # number of boxes
+        if clss[i] == class_id + 1:
+            result.append({"id": str(clss[i] - 1) + '-' + str(i), "bbox": boxes[i], "score": confs[i]})
+    return result
+
+
+class DecodingParityTest(unittest.TestCase):
+
+    def assert_same_detections(self, loop_result, boxes, scores):
+        expected_boxes = np.clip(np.array([obj["bbox"] for obj in loop_result], dtype=np.float32).reshape(-1, 4),
+                                 0.0, 1.0)
+        expected_scores = np.array([obj["score"] for obj in loop_result], dtype=np.float32)
+        self.assertEqual(boxes.shape, (len(loop_result), 4))
+        self.assertEqual(scores.shape, (len(loop_result),))
+        np.testing.assert_allclose(boxes, expected_boxes, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(scores, expected_scores, rtol=0, atol=1e-6)
+
+    def test_ssd_output(self):
+        boxes, scores = decode_ssd_output(SSD_BOXES, SSD_CLASSES, SSD_SCORES, CLASS_ID, SCORE_THRESHOLD)
+        self.assertEqual(len(scores), 4)
+        self.assert_same_detections(ssd_loop(SSD_BOXES, SSD_CLASSES, SSD_SCORES, CLASS_ID, SCORE_THRESHOLD),
+                                    boxes, scores)
+
+    def test_ssd_output_other_class(self):
+        boxes, scores = decode_ssd_output(SSD_BOXES, SSD_CLASSES, SSD_SCORES, 2, SCORE_THRESHOLD)
+        self.assert_same_detections(ssd_loop(SSD_BOXES, SSD_CLASSES, SSD_SCORES, 2, SCORE_THRESHOLD), boxes, scores)
+
+    def test_ssd_output_empty(self):
+        empty_boxes = np.zeros((1, 0, 4), dtype=np.float32)
+        empty = np.zeros((1, 0), dtype=np.float32)
+        boxes, scores = decode_ssd_output(empty_boxes, empty, empty, CLASS_ID, SCORE_THRESHOLD)
+        self.assert_same_detections(ssd_loop(empty_boxes, empty, empty, CLASS_ID, SCORE_THRESHOLD), boxes, scores)
+
+    def test_openvino_detection_out(self):
+        boxes, scores = decode_detection_out(OPENVINO_OUTPUT, CLASS_ID, SCORE_THRESHOLD)
+        self.assertEqual(len(scores), 3)
+        self.assert_same_detections(openvino_loop(OPENVINO_OUTPUT, CLASS_ID, SCORE_THRESHOLD), boxes, scores)
+
+    def test_openvino_detection_out_empty(self):
+        empty = np.zeros((1, 1, 0, 7), dtype=np.float32)
+        boxes, scores = decode_detection_out(empty, CLASS_ID, SCORE_THRESHOLD)
+        self.assert_same_detections(openvino_loop(empty, CLASS_ID, SCORE_THRESHOLD), boxes, scores)
+
+    def test_trt_detection_out(self):
+        # The Jetson detector keeps a score equal to the threshold
+        boxes, scores = decode_detection_out(TRT_OUTPUT, CLASS_ID + 1, SCORE_THRESHOLD, inclusive=True)
+        self.assertEqual(len(scores), 3)
+        self.assert_same_detections(trt_loop(TRT_OUTPUT, CLASS_ID, SCORE_THRESHOLD), boxes, scores)
+
+    def test_trt_detection_out_empty(self):
+        empty = np.zeros(0, dtype=np.float32)
+        boxes, scores = decode_detection_out(empty, CLASS_ID + 1, SCORE_THRESHOLD, inclusive=True)
+        self.assert_same_detections(trt_loop(empty, CLASS_ID, SCORE_THRESHOLD), boxes, scores)
+
+
+if __name__ == '__main__':
+    unittest.main()
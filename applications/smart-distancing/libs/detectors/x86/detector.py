@@ -23,7 +23,34 @@ class Detector:
             raise ValueError('Not supported network named: ', self.name)
 
     def inference(self, resized_rgb_image):
+        """
+        Run inference on an image and get Frames rate (fps)
+
+        Args:
+            resized_rgb_image: A numpy array with shape [height, width, channels]
+
+        Returns:
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
+        """
         self.fps = self.net.fps
-        output = self.net.inference(resized_rgb_image)
-        return output
+        boxes, scores = self.net.inference(resized_rgb_image)
+        return boxes, scores
+
+
+    def batch_inference(self, resized_rgb_images):
+        """
+        Run inference on a batch of images, the images are passed to the network at once if it supports batches.
 
+        Args:
+            resized_rgb_images: A numpy array with shape [no_images, height, width, channels]
+
+        Returns:
+            output: List of (boxes, scores) for each image, see inference
+        """
+        if hasattr(self.net, 'batch_inference'):
+            output = self.net.batch_inference(resized_rgb_images)
+        else:
+            output = [self.net.inference(image) for image in resized_rgb_images]
+        self.fps = self.net.fps
+        return output
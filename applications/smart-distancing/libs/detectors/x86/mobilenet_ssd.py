@@ -6,6 +6,7 @@ import numpy as np
 import tensorflow as tf
 
 from libs.detectors.utils.fps_calculator import convert_infr_time_to_fps
+from libs.detectors.utils.decoding import decode_ssd_output
 
 
 def load_model(model_name):
@@ -40,6 +41,14 @@ class Detector:
         # Frames Per Second
         self.fps = None
 
+        # The thread pools of TensorFlow can only be sized before the first model is loaded
+        num_threads = self.config.get_section_dict('Detector').get('NumThreads', '')
+        inter_op_threads = self.config.get_section_dict('Detector').get('InterOpThreads', '')
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(int(num_threads))
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(int(inter_op_threads))
+
         self.detection_model = load_model('ssd_mobilenet_v2_coco_2018_03_29')
 
     def inference(self, resized_rgb_image):
@@ -50,7 +59,8 @@ class Detector:
             resized_rgb_image: uint8 numpy array with shape (img_height, img_width, channels)
 
         Returns:
-            result: a dictionary contains of [{"id": 0, "bbox": [x1, y1, x2, y2], "score":s%}, {...}, {...}, ...]
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
         """
         input_image = np.expand_dims(resized_rgb_image, axis=0)
         input_tensor = tf.convert_to_tensor(input_image)
@@ -61,15 +71,35 @@ class Detector:
         # Calculate Frames rate (fps)
         self.fps = convert_infr_time_to_fps(inference_time)
 
-        boxes = output_dict['detection_boxes']
-        labels = output_dict['detection_classes']
-        scores = output_dict['detection_scores']
+        boxes = output_dict['detection_boxes'].numpy()
+        labels = output_dict['detection_classes'].numpy()
+        scores = output_dict['detection_scores'].numpy()
 
         class_id = int(self.config.get_section_dict('Detector')['ClassID'])
         score_threshold = float(self.config.get_section_dict('Detector')['MinScore'])
-        result = []
-        for i in range(boxes.shape[1]):  # number of boxes
-            if labels[0, i] == class_id and scores[0, i] > score_threshold:
-                result.append({"id": str(class_id) + '-' + str(i), "bbox": boxes[0, i, :], "score": scores[0, i]})
+        return decode_ssd_output(boxes, labels, scores, class_id, score_threshold)
+
+    def batch_inference(self, resized_rgb_images):
+        """
+        Run the model once on a batch of images of the same size.
+
+        Args:
+            resized_rgb_images: uint8 numpy array with shape (no_images, img_height, img_width, channels)
 
-        return result
+        Returns:
+            result: list of (boxes, scores) arrays for each image, see inference
+        """
+        input_tensor = tf.convert_to_tensor(resized_rgb_images)
+        t_begin = time.perf_counter()
+        output_dict = self.detection_model(input_tensor)
+        inference_time = time.perf_counter() - t_begin  # Seconds
+        self.fps = convert_infr_time_to_fps(inference_time)
+
+        boxes = output_dict['detection_boxes'].numpy()
+        labels = output_dict['detection_classes'].numpy()
+        scores = output_dict['detection_scores'].numpy()
+
+        class_id = int(self.config.get_section_dict('Detector')['ClassID'])
+        score_threshold = float(self.config.get_section_dict('Detector')['MinScore'])
+        return [decode_ssd_output(boxes[i], labels[i], scores[i], class_id, score_threshold)
+                for i in range(len(boxes))]
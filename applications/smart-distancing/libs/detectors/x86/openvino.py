@@ -5,6 +5,7 @@ import numpy as np
 import cv2 as cv
 
 from libs.detectors.utils.fps_calculator import convert_infr_time_to_fps
+from libs.detectors.utils.decoding import decode_detection_out
 
 from openvino.inference_engine import IECore
 
@@ -27,6 +28,16 @@ class Detector:
         model_path = 'libs/detectors/x86/data'
 
         core = IECore()
+        # Size the CPU plugin by the NumThreads and OpenVINOStreams of the Detector section (see ThreadBudget)
+        num_threads = self.config.get_section_dict('Detector').get('NumThreads', '')
+        streams = self.config.get_section_dict('Detector').get('OpenVINOStreams', '')
+        cpu_config = {}
+        if num_threads:
+            cpu_config['CPU_THREADS_NUM'] = str(num_threads)
+        if streams:
+            cpu_config['CPU_THROUGHPUT_STREAMS'] = str(streams)
+        if cpu_config:
+            core.set_config(cpu_config, 'CPU')
         network = core.read_network(
             model='{}/person-detection-retail-0013.xml'.format(model_path),
             weights='{}/person-detection-retail-0013.bin'.format(model_path)
@@ -42,7 +53,8 @@ class Detector:
             resized_rgb_image: uint8 numpy array with shape (img_height, img_width, channels)
 
         Returns:
-            result: a dictionary contains of [{"id": 0, "bbox": [x1, y1, x2, y2], "score":s%}, {...}, {...}, ...]
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
         """
 
         required_image_size = (544, 320)
@@ -62,12 +74,5 @@ class Detector:
 
         class_id = int(self.config.get_section_dict('Detector')['ClassID'])
         score_threshold = float(self.config.get_section_dict('Detector')['MinScore'])
-        result = []
-
-        for i, (_, label, score, x_min, y_min, x_max, y_max) in enumerate(output[0][0]):
-            box = [y_min, x_min, y_max, x_max]
-            if label == class_id and score > score_threshold:
-                result.append({"id": str(class_id) + '-' + str(i), "bbox": box, "score": score})
-
-        return result
+        return decode_detection_out(output, class_id, score_threshold)
 
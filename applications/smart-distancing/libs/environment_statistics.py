@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from tools.environment_score import mx_environment_scoring_consider_crowd
+from tools.objects_post_process import extract_violating_objects
+
+
+class _Bucket:
+    """ Aggregates of the values that arrived in one bucket_length long time span. """
+    __slots__ = ("start", "count", "total", "maximum", "histogram")
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.total = 0.0
+        self.maximum = -np.inf
+        self.histogram = {}  # bin -> number of values
+
+
+class _Window:
+    """ Running sum, count, histogram and monotonic maximum queue of the buckets inside one sliding window. """
+
+    def __init__(self, length, num_bins):
+        self.length = length
+        self.buckets = deque()
+        self.maxima = deque()  # (start, maximum) of buckets with decreasing maxima
+        self.count = 0
+        self.total = 0.0
+        self.histogram = np.zeros(num_bins, dtype=np.int64)
+
+    def push(self, bucket):
+        self.buckets.append(bucket)
+        self.count += bucket.count
+        self.total += bucket.total
+        for value_bin, count in bucket.histogram.items():
+            self.histogram[value_bin] += count
+        while len(self.maxima) > 0 and self.maxima[-1][1] <= bucket.maximum:
+            self.maxima.pop()
+        self.maxima.append((bucket.start, bucket.maximum))
+
+    def expire(self, oldest_start):
+        while len(self.buckets) > 0 and self.buckets[0].start < oldest_start:
+            bucket = self.buckets.popleft()
+            self.count -= bucket.count
+            self.total -= bucket.total
+            for value_bin, count in bucket.histogram.items():
+                self.histogram[value_bin] -= count
+        while len(self.maxima) > 0 and self.maxima[0][0] < oldest_start:
+            self.maxima.popleft()
+
+
+class SlidingWindowStatistics:
+    """
+    Mean, maximum and percentiles of a stream of values over several sliding time windows.
+
+    Values are first aggregated into buckets of bucket_length seconds. A finished bucket is added to every window
+    and the buckets that fell out of a window are subtracted from it, so an update costs O(1) amortized and the
+    memory is bounded by the number of buckets of the longest window. Percentiles are read from a histogram of
+    the values quantized by resolution, values beyond the last bin are counted in the last bin.
+
+    :param windows: A dictionary of window name to window length in seconds
+    :param resolution: Width of the histogram bins
+    :param num_bins: Number of histogram bins
+    :param bucket_length: Length of the aggregation buckets in seconds
+    """
+
+    def __init__(self, windows, resolution=1.0, num_bins=1024, bucket_length=1.0):
+        self.resolution = resolution
+        self.num_bins = num_bins
+        self.bucket_length = bucket_length
+        self._windows = {name: _Window(length, num_bins) for name, length in windows.items()}
+        self._bucket = None
+
+    def _bin(self, value):
+        return min(max(int(round(value / self.resolution)), 0), self.num_bins - 1)
+
+    def update(self, timestamp, value):
+        """ Add a value that was measured at timestamp (seconds). """
+        if self._bucket is None or timestamp - self._bucket.start >= self.bucket_length:
+            if self._bucket is not None:
+                for window in self._windows.values():
+                    window.push(self._bucket)
+            self._bucket = _Bucket(timestamp)
+            for window in self._windows.values():
+                window.expire(timestamp - window.length)
+        bucket = self._bucket
+        bucket.count += 1
+        bucket.total += value
+        bucket.maximum = max(bucket.maximum, value)
+        value_bin = self._bin(value)
+        bucket.histogram[value_bin] = bucket.histogram.get(value_bin, 0) + 1
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        Return a dictionary with the count, mean, max and the requested percentiles of every window. The current
+        bucket is included in all of the windows.
+        """
+        result = {}
+        bucket = self._bucket
+        for name, window in self._windows.items():
+            count, total, histogram = window.count, window.total, window.histogram.copy()
+            maximum = window.maxima[0][1] if len(window.maxima) > 0 else -np.inf
+            if bucket is not None:
+                count += bucket.count
+                total += bucket.total
+                maximum = max(maximum, bucket.maximum)
+                for value_bin, bin_count in bucket.histogram.items():
+                    histogram[value_bin] += bin_count
+            window_summary = {"count": int(count), "mean": None, "max": None}
+            window_summary.update({"p%d" % q: None for q in percentiles})
+            if count > 0:
+                window_summary["mean"] = round(total / count, 4)
+                window_summary["max"] = round(float(maximum), 4)
+                cumulative = np.cumsum(histogram)
+                for q in percentiles:
+                    value_bin = int(np.searchsorted(cumulative, q / 100 * count))
+                    window_summary["p%d" % q] = round(min(value_bin, self.num_bins - 1) * self.resolution, 4)
+            result[name] = window_summary
+        return result
+
+
+class EnvironmentStatistics:
+    """
+    Streaming statistics of the detected objects, the violating objects and the environment score.
+
+    The engine feeds it once per frame, the violating objects and the environment score of the frame are computed
+    only here and read by the logger, the ui overlay and the statistics endpoint of the ui.
+    Sliding window means, maxima and percentiles are kept for the last 1 minute, 15 minutes and 1 hour.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    WINDOWS = {"1min": 60, "15min": 15 * 60, "1h": 60 * 60}
+
+    def __init__(self, config):
+        self.config = config
+        section = self.config.get_section_dict("PostProcessor")
+        self.dist_threshold = float(section["DistThreshold"])
+        self.max_capacity = int(section.get("MaxCapacity", 60))
+        self.max_acceptable_capacity = int(section.get("MaxAcceptableCapacity", 20))
+        self._lock = threading.Lock()
+        self._detected_objects = SlidingWindowStatistics(self.WINDOWS, resolution=1)
+        self._violating_objects = SlidingWindowStatistics(self.WINDOWS, resolution=1)
+        self._environment_score = SlidingWindowStatistics(self.WINDOWS, resolution=0.01, num_bins=101)
+
+        self.violating_objects = np.zeros((0, 2), dtype=np.int64)
+        self.detected_count = 0
+        self.violating_count = 0
+        self.environment_score = None
+
+    def update(self, objects_list, distances, timestamp=None):
+        """
+        Compute the statistics of a frame and add them to the sliding windows.
+
+        Args:
+            objects_list: A list of dictionary where each dictionary stores information of an object (person) in a frame.
+            distances: A 2-d numpy array that stores distance between each pair of objects.
+            timestamp: Time of the frame in seconds, the current time by default
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        violating_objects = extract_violating_objects(distances, self.dist_threshold)
+        detected_count = len(objects_list)
+        violating_count = len(violating_objects)
+        environment_score = mx_environment_scoring_consider_crowd(
+            detected_count, violating_count, self.max_capacity, self.max_acceptable_capacity)
+        with self._lock:
+            self.violating_objects = violating_objects
+            self.detected_count = detected_count
+            self.violating_count = violating_count
+            self.environment_score = environment_score
+            self._detected_objects.update(timestamp, detected_count)
+            self._violating_objects.update(timestamp, violating_count)
+            self._environment_score.update(timestamp, environment_score)
+
+    def summary(self):
+        """ Return the values of the last frame and the sliding window statistics as a json serializable dictionary. """
+        with self._lock:
+            return {
+                "DetectedObjects": self.detected_count,
+                "ViolatingObjects": self.violating_count,
+                "EnvironmentScore": None if self.environment_score is None else float(self.environment_score),
+                "windows": {
+                    "DetectedObjects": self._detected_objects.summary(),
+                    "ViolatingObjects": self._violating_objects.summary(),
+                    "EnvironmentScore": self._environment_score.summary(),
+                },
+            }
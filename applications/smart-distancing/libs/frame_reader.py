@@ -0,0 +1,141 @@
+import threading
+import time
+
+import cv2 as cv
+
+LIVE_SOURCE_PREFIXES = ("rtsp://", "rtmp://", "http://", "https://")
+
+
+def is_live_source(video_uri, config):
+    """
+    Return True if the frames of video_uri should be read by a LatestFrameReader. The LiveSource option of the App
+    section (yes/no) overrides the detection by the uri scheme.
+    """
+    live_source = config.get_boolean('App', 'LiveSource', fallback=None)
+    if live_source is not None:
+        return live_source
+    return str(video_uri).lower().startswith(LIVE_SOURCE_PREFIXES)
+
+
+class LatestFrameReader:
+    """
+    Read a live video source on a separate thread and keep only the newest frame.
+
+    When the inference is slower than the camera the internal buffer of cv.VideoCapture fills up and the processed
+    frames lag behind reality. This reader drains the source continuously, so read() always returns the newest
+    frame and the frames that arrived in between are dropped. When the stream is lost it is reopened with an
+    exponential backoff. It has the isOpened, read and release methods of cv.VideoCapture so it can replace it.
+
+    :param video_uri: The uri of the video source
+    :param min_backoff: Seconds to wait before the first reconnection attempt
+    :param max_backoff: Maximum seconds between two reconnection attempts
+    :param report_interval: Number of read frames between two printed reports, 0 disables them
+    :param thread_budget: Optional ThreadBudget, the reader thread is pinned to its decode cores
+    """
+
+    def __init__(self, video_uri, min_backoff=0.5, max_backoff=30.0, report_interval=1000, thread_budget=None):
+        self.video_uri = video_uri
+        self.thread_budget = thread_budget
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.report_interval = report_interval
+        self._condition = threading.Condition()
+        self._frame = None
+        self._capture_time = None
+        self._frame_index = 0  # Index of the newest captured frame
+        self._read_index = 0  # Index of the last frame that was returned by read
+        self.captured_frames = 0
+        self.read_frames = 0
+        self.dropped_frames = 0
+        self.reconnections = 0
+        self.frame_age = None  # Seconds between capturing and reading the last read frame
+        self._max_frame_age = 0.0
+        self._total_frame_age = 0.0
+
+        self._capture = cv.VideoCapture(video_uri)
+        self._running = self._capture.isOpened()
+        self._thread = None
+        if self._running:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _reconnect(self):
+        """ Reopen the source until it succeeds or the reader is released. """
+        self._capture.release()
+        backoff = self.min_backoff
+        while self._running:
+            print('lost video source %s, reconnecting in %.1f s' % (self.video_uri, backoff))
+            time.sleep(backoff)
+            self._capture = cv.VideoCapture(self.video_uri)
+            if self._capture.isOpened():
+                self.reconnections += 1
+                return
+            self._capture.release()
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _run(self):
+        if self.thread_budget is not None:
+            self.thread_budget.pin('decode')
+        while self._running:
+            ok, frame = self._capture.read()
+            if not ok or frame is None:
+                self._reconnect()
+                continue
+            with self._condition:
+                self._frame = frame
+                self._capture_time = time.time()
+                self._frame_index += 1
+                self.captured_frames += 1
+                self._condition.notify_all()
+        self._capture.release()
+
+    def isOpened(self):
+        return self._running
+
+    def read(self, timeout=1.0):
+        """
+        Wait for a frame that is newer than the last returned one and return it.
+
+        Returns:
+            ok, frame: ok is False and frame is None if no new frame arrived within timeout seconds
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frame_index > self._read_index or not self._running,
+                                            timeout=timeout) or self._frame_index == self._read_index:
+                return False, None
+            self.dropped_frames += self._frame_index - self._read_index - 1
+            self._read_index = self._frame_index
+            frame, capture_time = self._frame, self._capture_time
+        self.read_frames += 1
+        self.frame_age = time.time() - capture_time
+        self._total_frame_age += self.frame_age
+        self._max_frame_age = max(self._max_frame_age, self.frame_age)
+        if self.report_interval > 0 and self.read_frames % self.report_interval == 0:
+            self.print_report()
+        return True, frame
+
+    def report(self):
+        """ Return the frame counts and the mean and maximum age of the read frames. """
+        return {
+            "captured_frames": self.captured_frames,
+            "read_frames": self.read_frames,
+            "dropped_frames": self.dropped_frames,
+            "reconnections": self.reconnections,
+            "mean_frame_age": self._total_frame_age / self.read_frames if self.read_frames > 0 else None,
+            "max_frame_age": self._max_frame_age,
+        }
+
+    def print_report(self):
+        report = self.report()
+        print('frame reader: read %d of %d frames, dropped %d, %d reconnections, frame age mean %.0f ms max %.0f ms' % (
+            report["read_frames"], report["captured_frames"], report["dropped_frames"], report["reconnections"],
+            1000 * (report["mean_frame_age"] or 0), 1000 * report["max_frame_age"]))
+
+    def release(self):
+        """ Stop the reader thread and release the source. """
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self.print_report()
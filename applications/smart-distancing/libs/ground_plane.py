@@ -0,0 +1,64 @@
+import cv2 as cv
+import numpy as np
+
+from libs.region_of_interest import parse_polygon
+
+
+class GroundPlane:
+    """
+    Project the foot points of the detected objects from the camera view to the ground plane.
+
+    A homography is computed once from calibration points: ImagePoints are normalized x,y points of the frame and
+    GroundPoints are the x,y positions of the same points on the ground in centimeters, at least 4 pairs are needed.
+    All of the foot points of a frame are projected with one cv.perspectiveTransform call and the distances are
+    computed on the projected points with one array operation. The same points are used for the bird's eye view.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    # Margin around the calibration points of the bird's eye view as a fraction of their extent
+    VIEW_MARGIN = 0.1
+
+    def __init__(self, config):
+        self.config = config
+        section = self.config.get_section_dict('GroundPlane')
+        image_points = parse_polygon(section['ImagePoints'])
+        ground_points = parse_polygon(section['GroundPoints'])
+        if image_points is None or ground_points is None or len(image_points) < 4 \
+                or len(image_points) != len(ground_points):
+            raise ValueError('GroundPlane needs at least 4 pairs of ImagePoints and GroundPoints')
+        self.homography, _ = cv.findHomography(image_points, ground_points)
+        if self.homography is None:
+            raise ValueError('The GroundPlane calibration points are degenerate: ', section['ImagePoints'])
+        extent = ground_points.max(axis=0) - ground_points.min(axis=0)
+        self._view_origin = ground_points.min(axis=0) - extent * self.VIEW_MARGIN
+        self._view_size = np.maximum(extent * (1 + 2 * self.VIEW_MARGIN), 1e-6)
+
+    @staticmethod
+    def foot_points(objects_list):
+        """ Return the normalized bottom centers of the boxes of the objects as an [N, 2] array. """
+        if len(objects_list) == 0:
+            return np.zeros((0, 2), dtype=np.float32)
+        bboxes = np.array([object_item["bbox"] for object_item in objects_list], dtype=np.float32)
+        return np.stack(((bboxes[:, 0] + bboxes[:, 2]) / 2, bboxes[:, 3]), axis=1)
+
+    def project(self, points):
+        """
+        Project normalized [N, 2] image points to [N, 2] ground plane points in centimeters.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if len(points) == 0:
+            return np.zeros((0, 2), dtype=np.float32)
+        return cv.perspectiveTransform(points, self.homography).reshape(-1, 2)
+
+    @staticmethod
+    def distances(ground_points):
+        """ Return the NxN matrix of the euclidean distances between ground plane points. """
+        difference = ground_points[:, np.newaxis, :] - ground_points[np.newaxis, :, :]
+        return np.sqrt((difference ** 2).sum(axis=-1)).astype(np.float32)
+
+    def normalize(self, ground_points):
+        """
+        Map ground plane points to [0, 1] coordinates of the bird's eye view, which covers the calibration points.
+        """
+        return (np.asarray(ground_points, dtype=np.float32).reshape(-1, 2) - self._view_origin) / self._view_size
@@ -0,0 +1,89 @@
+import threading
+from datetime import date
+
+import cv2 as cv
+import numpy as np
+
+
+class OccupancyHeatmap:
+    """
+    Accumulate where people stand and where they violate the distancing into two fixed size grids.
+
+    The foot point (bottom center of the box, or its ground plane projection) of every object is added to its grid
+    cell with one np.add.at call per frame, the foot points of the objects that are part of a violating pair are
+    added to a second grid.
+    The memory does not depend on the number of processed frames. When the day changes the grids are multiplied
+    by Decay, so 0 starts every day from an empty heatmap.
+
+    The following parameters are read from the optional Heatmap section of the config:
+        GridSize: w,h number of cells of the grids (default 64,48)
+        Decay: factor that the grids are multiplied by at the start of a new day (default 0)
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        section = self.config.get_section_dict('Heatmap') if self.config.has_section('Heatmap') else {}
+        self.grid_size = [int(i) for i in section.get('GridSize', '64,48').split(',')]
+        self.decay = float(section.get('Decay', 0))
+        self.occupancy = np.zeros(self.grid_size[::-1], dtype=np.float32)
+        self.violations = np.zeros(self.grid_size[::-1], dtype=np.float32)
+        self._day = date.today()
+        self._lock = threading.Lock()
+
+    def _cells(self, points):
+        """ Map normalized [N, 2] x,y points to the row and column indices of the grid cells. """
+        w, h = self.grid_size
+        columns = np.clip((points[:, 0] * w).astype(np.int64), 0, w - 1)
+        rows = np.clip((points[:, 1] * h).astype(np.int64), 0, h - 1)
+        return rows, columns
+
+    def update(self, objects_list, violating_objects, foot_points=None):
+        """
+        Add the objects of a frame to the grids.
+
+        Args:
+            objects_list: A list of dictionary where each dictionary stores information of an object (person) in a frame.
+            violating_objects: A 2-d numpy array where each row is the indices of two violating objects
+            foot_points: Optional [N, 2] array of normalized foot points, e.g. on the ground plane. By default the
+                bottom centers of the boxes in the frame are used.
+        """
+        today = date.today()
+        if len(objects_list) > 0:
+            if foot_points is None:
+                bboxes = np.array([object_item["bbox"] for object_item in objects_list], dtype=np.float32)
+                foot_points = np.stack(((bboxes[:, 0] + bboxes[:, 2]) / 2, bboxes[:, 3]), axis=1)
+            violating = np.unique(np.asarray(violating_objects, dtype=np.int64).ravel())
+        with self._lock:
+            if today != self._day:
+                self.occupancy *= self.decay
+                self.violations *= self.decay
+                self._day = today
+            if len(objects_list) > 0:
+                np.add.at(self.occupancy, self._cells(foot_points), 1)
+                if len(violating) > 0:
+                    np.add.at(self.violations, self._cells(foot_points[violating]), 1)
+
+    def get_grid(self, name):
+        """ Return a copy of the 'occupancy' or the 'violations' grid. """
+        if name not in ('occupancy', 'violations'):
+            raise ValueError('Not supported heatmap: ', name)
+        with self._lock:
+            return getattr(self, name).copy()
+
+    def render(self, name, resolution=None):
+        """
+        Render a grid as a color mapped BGR image, the cells are normalized by the maximum of the grid.
+
+        Args:
+            name: 'occupancy' or 'violations'
+            resolution: (w, h) of the image, the grid size by default
+        """
+        grid = self.get_grid(name)
+        maximum = grid.max()
+        normalized = (grid * (255.0 / maximum) if maximum > 0 else grid).astype(np.uint8)
+        image = cv.applyColorMap(normalized, cv.COLORMAP_JET)
+        if resolution is not None:
+            image = cv.resize(image, tuple(resolution), interpolation=cv.INTER_NEAREST)
+        return image
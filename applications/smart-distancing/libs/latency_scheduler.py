@@ -0,0 +1,128 @@
+import time
+from collections import deque, namedtuple
+
+OperatingPoint = namedtuple("OperatingPoint", ["name", "image_size", "stride"])
+
+
+def parse_operating_points(operating_points):
+    """
+    Parse the operating points of the config. Each point is "Name ImageSize Stride", e.g.
+    "pedestrian_ssd_mobilenet_v2 300,300,3 1", and the points are separated by |.
+    """
+    points = []
+    for point in operating_points.split('|'):
+        if not point.strip():
+            continue
+        fields = point.split()
+        if len(fields) != 3:
+            raise ValueError('An operating point needs a Name, an ImageSize and a Stride: ', point)
+        points.append(OperatingPoint(fields[0], [int(i) for i in fields[1].split(',')], max(int(fields[2]), 1)))
+    if len(points) == 0:
+        raise ValueError('No operating points are configured: ', operating_points)
+    return points
+
+
+class DetectorConfig:
+    """
+    A view on a ConfigEngine whose Detector section has the Name and ImageSize of an operating point,
+    all of the other sections and methods are the ones of the wrapped config.
+    """
+
+    def __init__(self, config, operating_point):
+        self._config = config
+        self._detector_section = dict(config.get_section_dict('Detector'))
+        self._detector_section['Name'] = operating_point.name
+        self._detector_section['ImageSize'] = ','.join(str(i) for i in operating_point.image_size)
+
+    def get_section_dict(self, section):
+        if section == 'Detector':
+            return self._detector_section
+        return self._config.get_section_dict(section)
+
+    def __getattr__(self, name):
+        return getattr(self._config, name)
+
+
+class LatencyScheduler:
+    """
+    Switch between operating points of the detector (model, input size and frame stride) to keep the processing
+    rate at a target fps.
+
+    The operating points are ordered from the most accurate to the fastest one. The mean processing time of the
+    last Window frames is measured, when the rate falls below TargetFPS * (1 - Hysteresis) the next faster point is
+    used. The previous more accurate point is used again when its last measured rate is above
+    TargetFPS * (1 + Hysteresis), or when it was measured more than ProbeInterval seconds ago. At most one switch
+    happens every MinSwitchInterval seconds and every switch is printed and kept in the switches list.
+
+    The following parameters are read from the Scheduler section of the config:
+        TargetFPS: the processing rate to keep
+        OperatingPoints: the operating points, see parse_operating_points
+        Hysteresis: relative band around TargetFPS without switches (default 0.15)
+        Window: number of frames that are averaged (default 30)
+        MinSwitchInterval: minimum seconds between two switches (default 10)
+        ProbeInterval: seconds after which a more accurate point is tried again (default 300)
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        section = self.config.get_section_dict('Scheduler')
+        self.target_fps = float(section['TargetFPS'])
+        self.operating_points = parse_operating_points(section['OperatingPoints'])
+        self.hysteresis = float(section.get('Hysteresis', 0.15))
+        self.window = int(section.get('Window', 30))
+        self.min_switch_interval = float(section.get('MinSwitchInterval', 10))
+        self.probe_interval = float(section.get('ProbeInterval', 300))
+
+        self.index = 0
+        self._frame_times = deque(maxlen=self.window)
+        # Last measured mean frame time and the time of the measurement of every operating point
+        self._measured = [None] * len(self.operating_points)
+        self._last_switch = time.time()
+        self.switches = deque(maxlen=100)
+
+    @property
+    def operating_point(self):
+        return self.operating_points[self.index]
+
+    def _switch(self, index, fps, now):
+        print('scheduler: switching from %s to %s, measured %.1f fps, target %.1f fps' % (
+            self._describe(self.index), self._describe(index), fps, self.target_fps))
+        self.switches.append({"time": now, "from": self._describe(self.index), "to": self._describe(index),
+                              "fps": fps})
+        self.index = index
+        self._frame_times.clear()
+        self._last_switch = now
+
+    def _describe(self, index):
+        point = self.operating_points[index]
+        return '%s@%s/%d' % (point.name, 'x'.join(str(i) for i in point.image_size[:2]), point.stride)
+
+    def record(self, frame_time):
+        """
+        Record the processing time of a frame in seconds.
+
+        Returns:
+            True if the operating point has changed and the new one has to be applied
+        """
+        self._frame_times.append(frame_time)
+        if len(self._frame_times) < self.window:
+            return False
+        now = time.time()
+        mean_frame_time = sum(self._frame_times) / len(self._frame_times)
+        fps = 1.0 / mean_frame_time if mean_frame_time > 0 else float('inf')
+        self._measured[self.index] = (mean_frame_time, now)
+        if now - self._last_switch < self.min_switch_interval:
+            return False
+
+        if fps < self.target_fps * (1 - self.hysteresis) and self.index < len(self.operating_points) - 1:
+            self._switch(self.index + 1, fps, now)
+            return True
+        if fps > self.target_fps * (1 + self.hysteresis) and self.index > 0:
+            measured = self._measured[self.index - 1]
+            if measured is None or now - measured[1] > self.probe_interval \
+                    or 1.0 / max(measured[0], 1e-9) > self.target_fps * (1 + self.hysteresis):
+                self._switch(self.index - 1, fps, now)
+                return True
+        return False
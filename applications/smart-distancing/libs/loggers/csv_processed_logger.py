@@ -1,8 +1,7 @@
 import csv
 import os
 from datetime import date, datetime
-from tools.environment_score import mx_environment_scoring_consider_crowd
-from tools.objects_post_process import extract_violating_objects
+from libs.loggers.csv_logger import log_episodes
 
 import numpy as np
 
@@ -10,20 +9,26 @@ import numpy as np
 class Logger:
     """A CSV logger class that store objects information and violated distances information into csv files.
 
-    This logger creates two csv file every day in two different directory, one for logging detected objects
-    and violated social distancing incidents. The file names are the same as recording date.
+    This logger creates csv files every day in different directories, one for logging detected objects, one for
+    the aggregates of the logging intervals and one for the contact episodes. The aggregates have more columns than
+    the object rows, so both never share a file. The file names are the same as recording date.
 
     :param config: A ConfigEngine object which store all of the config parameters. Access to any parameter
         is possible by calling get_section_dict method.
+    :param statistics: An EnvironmentStatistics object that holds the counts and the environment score of the frame.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, statistics):
         self.config = config
+        self.statistics = statistics
         # The parent directory that stores all log file.
         self.log_directory = config.get_section_dict("Logger")["LogDirectory"]
         # A directory inside the log_directory that stores object log files.
         self.objects_log_directory = os.path.join(self.log_directory, "objects_log")
-        self.dist_threshold = config.get_section_dict("PostProcessor")["DistThreshold"]
+        # A directory inside the log_directory that stores the aggregates of the logging intervals.
+        self.aggregates_log_directory = os.path.join(self.log_directory, "aggregates_log")
+        # A directory inside the log_directory that stores closed contact episodes.
+        self.contacts_log_directory = os.path.join(self.log_directory, "contacts_log")
 
         if not os.path.exists(self.log_directory):
             os.mkdir(self.log_directory)
@@ -31,6 +36,12 @@ class Logger:
         if not os.path.exists(self.objects_log_directory):
             os.mkdir(self.objects_log_directory)
 
+        if not os.path.exists(self.aggregates_log_directory):
+            os.mkdir(self.aggregates_log_directory)
+
+        if not os.path.exists(self.contacts_log_directory):
+            os.mkdir(self.contacts_log_directory)
+
     def update(self, objects_list, distances):
         """Write the object and violated distances information of a frame into log files.
 
@@ -42,6 +53,15 @@ class Logger:
         objects_log_file_path = os.path.join(self.objects_log_directory, file_name + ".csv")
         self.log_objects(objects_list, distances, objects_log_file_path)
 
+    def log_episodes(self, episodes):
+        """Write closed contact episodes into the contacts log file of the day.
+
+        Args:
+            episodes: A list of ContactEpisode tuples
+        """
+        file_path = os.path.join(self.contacts_log_directory, str(date.today()) + ".csv")
+        log_episodes(episodes, file_path)
+
     def log_objects(self, objects_list, distances, file_path):
         """Write objects information of a frame into the object log file.
         Each row of the object log file consist of a detected object (person) information such as
@@ -54,13 +74,10 @@ class Logger:
 
         """
 
-        violating_objects = extract_violating_objects(distances, self.dist_threshold)
-        # Get the number of violating objects (people)
-        no_violating_objects = len(violating_objects)
-        # Get the number of detected objects (people)
-        no_detected_objects = len(objects_list)
-        # Get environment score
-        environment_score = mx_environment_scoring_consider_crowd(no_detected_objects, no_violating_objects)
+        # The counts and the environment score of the frame are computed once by the statistics
+        no_violating_objects = self.statistics.violating_count
+        no_detected_objects = self.statistics.detected_count
+        environment_score = self.statistics.environment_score
         # Get timeline which is used for as Timestamp
         now = datetime.now()
         current_time = now.strftime("%Y-%m-%d %H:%M:%S")
@@ -76,3 +93,22 @@ class Logger:
 
                 {'Timestamp': current_time, 'DetectedObjects': no_detected_objects,
                  'ViolatingObjects': no_violating_objects, 'EnvironmentScore': environment_score})
+
+    def log_aggregates(self, row):
+        """Write the aggregates of a logging interval into the aggregates log file of the day.
+
+        Args:
+            row: A dictionary of interval aggregates, see IntervalAggregator.pop
+        """
+        file_path = os.path.join(self.aggregates_log_directory, str(date.today()) + ".csv")
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        file_exists = os.path.isfile(file_path)
+        with open(file_path, "a") as csvfile:
+            headers = ["Timestamp", "DetectedObjects", "ViolatingObjects", "EnvironmentScore", "Frames",
+                       "MaxDetectedObjects", "MaxViolatingObjects", "TotalViolatingObjects", "MinEnvironmentScore"]
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+
+            if not file_exists:
+                writer.writeheader()
+
+            writer.writerow(dict(row, Timestamp=current_time))
@@ -0,0 +1,130 @@
+"""
+Change-driven logging of object tracks. Instead of writing every object of every frame, a record is written only
+when a track appears, disappears or its box moves more than an epsilon. Keyframes with all of the tracks are
+written periodically so a log can be read from any keyframe, and read_track_log reconstructs the state of every frame.
+"""
+import csv
+import os
+
+import numpy as np
+
+KEYFRAME = "K"
+APPEAR = "A"
+MOVE = "M"
+DISAPPEAR = "D"
+
+FIELD_NAMES = ["frame_number", "event", "track_id", "x0", "y0", "x1", "y1", "score"]
+
+
+class DeltaTrackWriter:
+    """Write the tracks of each frame as delta records.
+
+    The last written box of every track is kept as the reference, a track is written again when any coordinate
+    of its box is more than epsilon away from the reference, so the error of the reconstructed boxes is bounded
+    by epsilon.
+
+    :param epsilon: Maximum change of a normalized box coordinate that is not logged
+    :param keyframe_interval: Number of frames between two keyframes
+    """
+
+    def __init__(self, epsilon=0.01, keyframe_interval=300):
+        self.epsilon = float(epsilon)
+        self.keyframe_interval = int(keyframe_interval)
+        self._reference = {}  # track_id -> last written bbox
+        self._file_path = None
+        self._last_keyframe = None
+
+    @staticmethod
+    def _row(frame_number, event, track_id, bbox=None, score=None):
+        row = {"frame_number": frame_number, "event": event, "track_id": track_id}
+        if bbox is not None:
+            row.update({"x0": round(float(bbox[0]), 4), "y0": round(float(bbox[1]), 4),
+                        "x1": round(float(bbox[2]), 4), "y1": round(float(bbox[3]), 4),
+                        "score": round(float(score), 4)})
+        return row
+
+    def write(self, frame_number, objects_list, file_path):
+        """Write the changes of a frame to the log file.
+
+        Args:
+            frame_number: current frame number
+            objects_list: A list of dictionary where each dictionary stores information of an object (person) in a frame.
+            file_path: The path of the log file, a keyframe is written first when it changes (e.g. every day)
+
+        Returns:
+            The number of written records
+        """
+        tracks = {object_item.get("trackId", object_item["id"]): object_item for object_item in objects_list}
+        keyframe = (file_path != self._file_path or self._last_keyframe is None
+                    or frame_number - self._last_keyframe >= self.keyframe_interval)
+        rows = []
+        if keyframe:
+            self._reference = {}
+            # A keyframe without tracks still needs a record so the reader clears its state
+            if len(tracks) == 0:
+                rows.append(self._row(frame_number, KEYFRAME, ""))
+            for track_id, object_item in tracks.items():
+                bbox = np.asarray(object_item["bbox"], dtype=np.float32)
+                rows.append(self._row(frame_number, KEYFRAME, track_id, bbox, object_item["score"]))
+                self._reference[track_id] = bbox
+            self._last_keyframe = frame_number
+        else:
+            for track_id in [track_id for track_id in self._reference if track_id not in tracks]:
+                rows.append(self._row(frame_number, DISAPPEAR, track_id))
+                del self._reference[track_id]
+            for track_id, object_item in tracks.items():
+                bbox = np.asarray(object_item["bbox"], dtype=np.float32)
+                reference = self._reference.get(track_id)
+                if reference is None:
+                    event = APPEAR
+                elif np.abs(bbox - reference).max() > self.epsilon:
+                    event = MOVE
+                else:
+                    continue
+                rows.append(self._row(frame_number, event, track_id, bbox, object_item["score"]))
+                self._reference[track_id] = bbox
+
+        if len(rows) > 0:
+            file_exists = os.path.isfile(file_path)
+            with open(file_path, "a", newline="") as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=FIELD_NAMES)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerows(rows)
+        self._file_path = file_path
+        return len(rows)
+
+
+def read_track_log(file_path):
+    """Reconstruct the tracks of every frame from a delta track log.
+
+    Frames without records had the same tracks as the previous frame, they are yielded as well, from the first
+    keyframe up to the last frame that has a record.
+
+    Args:
+        file_path: The path of the log file
+
+    Yields:
+        frame_number, tracks: tracks is a dictionary of track id to (x0, y0, x1, y1, score)
+    """
+    state = None
+    current_frame = None
+    with open(file_path, newline="") as csvfile:
+        for row in csv.DictReader(csvfile):
+            frame_number = int(row["frame_number"])
+            if state is None and row["event"] != KEYFRAME:
+                # Records before the first keyframe can not be reconstructed
+                continue
+            if current_frame is not None and frame_number != current_frame:
+                yield current_frame, dict(state)
+                for skipped_frame in range(current_frame + 1, frame_number):
+                    yield skipped_frame, dict(state)
+            if row["event"] == KEYFRAME and frame_number != current_frame:
+                state = {}
+            current_frame = frame_number
+            if row["event"] == DISAPPEAR:
+                state.pop(row["track_id"], None)
+            elif row["track_id"] != "":
+                state[row["track_id"]] = tuple(float(row[key]) for key in ("x0", "y0", "x1", "y1", "score"))
+    if current_frame is not None:
+        yield current_frame, dict(state)
@@ -0,0 +1,58 @@
+class IntervalAggregator:
+    """Accumulate the statistics of every processed frame during a logging interval.
+
+    Instead of keeping only the frame that arrives after the time interval, every frame is added to a few
+    running counters and one row with the aggregates of the whole interval is emitted, so the log has the full
+    statistics at the same number of writes.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear the counters for the next interval."""
+        self.frames = 0
+        self.detected_sum = 0
+        self.detected_max = 0
+        self.violating_sum = 0
+        self.violating_max = 0
+        self.environment_score_sum = 0.0
+        self.environment_score_min = None
+
+    def add(self, detected_objects, violating_objects, environment_score):
+        """Add the statistics of a frame to the interval.
+
+        Args:
+            detected_objects: Number of detected objects (people) in the frame
+            violating_objects: Number of violating object pairs in the frame
+            environment_score: The environment score of the frame
+        """
+        self.frames += 1
+        self.detected_sum += detected_objects
+        self.detected_max = max(self.detected_max, detected_objects)
+        self.violating_sum += violating_objects
+        self.violating_max = max(self.violating_max, violating_objects)
+        self.environment_score_sum += float(environment_score)
+        if self.environment_score_min is None or environment_score < self.environment_score_min:
+            self.environment_score_min = float(environment_score)
+
+    def pop(self):
+        """Return the aggregates of the interval as a dictionary and reset the counters.
+
+        The DetectedObjects, ViolatingObjects and EnvironmentScore items are the means over the frames of the interval
+        so the rows can be read like the rows of a single frame.
+        """
+        if self.frames == 0:
+            return None
+        row = {
+            "Frames": self.frames,
+            "DetectedObjects": round(self.detected_sum / self.frames, 2),
+            "MaxDetectedObjects": self.detected_max,
+            "ViolatingObjects": round(self.violating_sum / self.frames, 2),
+            "MaxViolatingObjects": self.violating_max,
+            "TotalViolatingObjects": self.violating_sum,
+            "EnvironmentScore": round(self.environment_score_sum / self.frames, 2),
+            "MinEnvironmentScore": self.environment_score_min,
+        }
+        self.reset()
+        return row
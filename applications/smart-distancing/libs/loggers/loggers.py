@@ -1,5 +1,8 @@
 import time
 
+from tools.contact_episodes import ContactEpisodeTracker
+from .interval_aggregator import IntervalAggregator
+
 
 class Logger:
     """logger layer to build a logger and pass data to it for logging
@@ -9,29 +12,41 @@ class Logger:
 
         :param config: a ConfigEngine object which store all of the config parameters. Access  to any parameter
         is possible by calling get_section_dict method.
+        :param statistics: an EnvironmentStatistics object which is updated with every frame before the logger.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, statistics):
         """build the logger and initialize the frame number and set attributes"""
         self.config = config
+        self.statistics = statistics
         # Logger name, at this time only csv_logger is supported. You can implement your own logger
         # by following csv_logger implementation as an example.
         self.name = self.config.get_section_dict("Logger")["Name"]
         if self.name == "csv_logger":
             from . import csv_processed_logger
-            self.logger = csv_processed_logger.Logger(self.config)
+            self.logger = csv_processed_logger.Logger(self.config, self.statistics)
 
-            # For Logger instance from loggers/csv_logger
-            # region csv_logger
-            # from . import csv_logger
-            # self.logger = csv_logger.Logger(self.config)
-            # end region
+        # The tracks of every frame are written by the csv_logger, it only writes the changes of the tracks.
+        self.track_logger = None
+        if self.config.get_boolean("Logger", "TrackLog", fallback=False):
+            from . import csv_logger
+            self.track_logger = csv_logger.Logger(self.config)
+        self.frame_number = 0
 
         # Specifies how often the logger should log information. For example with time_interval of 0.5
         # the logger log the information every 0.5 seconds.
         self.time_interval = float(self.config.get_section_dict("Logger")["TimeInterval"])  # Seconds
         self.submited_time = 0
-        # self.frame_number = 0  # For Logger instance from loggers/csv_logger
+        # With Aggregate every frame is added to the counters of the interval and one row per interval is logged
+        self.interval_aggregator = None
+        if self.config.get_boolean("Logger", "Aggregate", fallback=False):
+            self.interval_aggregator = IntervalAggregator()
+        # Contact episodes are updated on every frame, closed episodes are passed to the logger when they end.
+        logger_section = self.config.get_section_dict("Logger")
+        self.contact_episodes = ContactEpisodeTracker(
+            self.config.get_section_dict("PostProcessor")["DistThreshold"],
+            max_gap=float(logger_section.get("ContactMaxGap", 1.0)),
+            max_open_episodes=int(logger_section.get("MaxOpenContacts", 10000)))
 
     def update(self, objects_list, distances):
         """call the update method of the logger.
@@ -43,13 +58,30 @@ class Logger:
             objects_list: a list of dictionary where each dictionary stores information of an object (person) in a frame.
             distances: a 2-d numpy array that stores distance between each pair of objects.
         """
+        track_ids = [object_item.get("trackId", i) for i, object_item in enumerate(objects_list)]
+        closed_episodes = self.contact_episodes.update(time.time(), track_ids, distances,
+                                                       self.statistics.violating_objects)
+        if len(closed_episodes) > 0:
+            self.logger.log_episodes(closed_episodes)
+        if self.track_logger is not None:
+            self.track_logger.update(self.frame_number, objects_list, distances)
+        self.frame_number += 1
 
-        if time.time() - self.submited_time > self.time_interval:
+        if self.interval_aggregator is not None:
+            self.interval_aggregator.add(self.statistics.detected_count, self.statistics.violating_count,
+                                         self.statistics.environment_score)
+            if time.time() - self.submited_time > self.time_interval:
+                self.logger.log_aggregates(self.interval_aggregator.pop())
+                self.submited_time = time.time()
+        elif time.time() - self.submited_time > self.time_interval:
             self.logger.update(objects_list, distances)
             self.submited_time = time.time()
-            # For Logger instance from loggers/csv_logger
-            # region
-            # self.logger.update(self.frame_number, objects_list, distances)
-            # self.frame_number += 1
-            # end region
 
+    def flush(self):
+        """close the open contact episodes and the last interval and pass them to the logger, e.g. at the end of a
+        video."""
+        if self.interval_aggregator is not None and self.interval_aggregator.frames > 0:
+            self.logger.log_aggregates(self.interval_aggregator.pop())
+        closed_episodes = self.contact_episodes.flush()
+        if len(closed_episodes) > 0:
+            self.logger.log_episodes(closed_episodes)
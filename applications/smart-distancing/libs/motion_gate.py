@@ -0,0 +1,105 @@
+import cv2 as cv
+import numpy as np
+
+
+class MotionGate:
+    """
+    Decide whether a frame has to go through the detector by measuring the motion on a downscaled copy of it.
+
+    The motion energy of a frame is the fraction of its pixels that are marked as foreground, either by a
+    MOG2 background subtractor or by differencing with the previous frame. When the energy is below the
+    threshold the detector can be skipped and the last detections reused. A detection is forced every
+    RefreshInterval frames so slowly changing scenes are still updated.
+
+    The following parameters are read from the MotionGate section of the config:
+        Method: mog2 or diff (default mog2)
+        Scale: downscale factor of the frames before measuring the motion (default 0.25)
+        Threshold: minimum fraction of foreground pixels that counts as motion (default 0.002)
+        RefreshInterval: maximum number of consecutive skipped frames (default 30)
+        ReportInterval: number of frames between two printed reports, 0 disables them (default 1000)
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    # Gray level change that counts as a foreground pixel for the frame differencing method
+    DIFF_THRESHOLD = 25
+
+    def __init__(self, config):
+        self.config = config
+        section = self.config.get_section_dict('MotionGate')
+        self.method = section.get('Method', 'mog2').strip().lower()
+        self.scale = float(section.get('Scale', 0.25))
+        self.threshold = float(section.get('Threshold', 0.002))
+        self.refresh_interval = int(section.get('RefreshInterval', 30))
+        self.report_interval = int(section.get('ReportInterval', 1000))
+        if self.method == 'mog2':
+            self.background_subtractor = cv.createBackgroundSubtractorMOG2(detectShadows=False)
+        elif self.method == 'diff':
+            self.background_subtractor = None
+        else:
+            raise ValueError('Not supported motion gate method: ', self.method)
+
+        self._previous_gray = None
+        self._consecutive_skips = 0
+        self.energy = None
+        self.frames = 0
+        self.skipped_frames = 0
+        self.detection_time = 0.0  # Seconds spent in the detector for the frames that were not skipped
+
+    def _motion_energy(self, cv_image):
+        small = cv.resize(cv_image, (0, 0), fx=self.scale, fy=self.scale, interpolation=cv.INTER_AREA)
+        gray = cv.cvtColor(small, cv.COLOR_BGR2GRAY)
+        if self.background_subtractor is not None:
+            foreground = self.background_subtractor.apply(gray)
+            return np.count_nonzero(foreground) / foreground.size
+        previous_gray, self._previous_gray = self._previous_gray, gray
+        if previous_gray is None or previous_gray.shape != gray.shape:
+            return 1.0
+        return np.count_nonzero(cv.absdiff(gray, previous_gray) > self.DIFF_THRESHOLD) / gray.size
+
+    def should_detect(self, cv_image):
+        """
+        Update the motion model with a frame and return True if the detector has to run on it.
+
+        Args:
+            cv_image: uint8 numpy array with shape (img_height, img_width, 3) in BGR
+        """
+        self.energy = self._motion_energy(cv_image)
+        self.frames += 1
+        detect = self.frames == 1 or self.energy >= self.threshold or self._consecutive_skips >= self.refresh_interval
+        if detect:
+            self._consecutive_skips = 0
+        else:
+            self._consecutive_skips += 1
+            self.skipped_frames += 1
+        if self.report_interval > 0 and self.frames % self.report_interval == 0:
+            self.print_report()
+        return detect
+
+    def add_detection_time(self, seconds):
+        """ Record the time that the detector spent on a frame that was not skipped. """
+        self.detection_time += seconds
+
+    def report(self):
+        """
+        Return the fraction of skipped frames and an estimate of the detector time that was saved, based on
+        the mean detection time of the processed frames.
+        """
+        detected_frames = self.frames - self.skipped_frames
+        mean_detection_time = self.detection_time / detected_frames if detected_frames > 0 else 0.0
+        saved_time = mean_detection_time * self.skipped_frames
+        total_time = self.detection_time + saved_time
+        return {
+            "frames": self.frames,
+            "skipped_frames": self.skipped_frames,
+            "skipped_fraction": self.skipped_frames / self.frames if self.frames > 0 else 0.0,
+            "mean_detection_time": mean_detection_time,
+            "saved_detection_time": saved_time,
+            "saved_detection_fraction": saved_time / total_time if total_time > 0 else 0.0,
+        }
+
+    def print_report(self):
+        report = self.report()
+        print('motion gate: skipped %d of %d frames (%.1f%%), saved %.1f s of detector time (%.1f%%)' % (
+            report["skipped_frames"], report["frames"], 100 * report["skipped_fraction"],
+            report["saved_detection_time"], 100 * report["saved_detection_fraction"]))
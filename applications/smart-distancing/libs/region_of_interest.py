@@ -0,0 +1,100 @@
+import cv2 as cv
+import numpy as np
+
+
+def parse_polygon(polygon):
+    """
+    Parse a polygon from the config. The points are normalized x,y pairs separated by spaces,
+    e.g. "0.1,0.2 0.9,0.2 0.9,1.0 0.1,1.0".
+
+    Returns:
+        points: A float32 array of shape [N, 2] or None for an empty polygon
+    """
+    points = [point.split(',') for point in polygon.split()]
+    if len(points) == 0:
+        return None
+    if len(points) < 3 or any(len(point) != 2 for point in points):
+        raise ValueError('A polygon needs at least 3 points of x,y pairs: ', polygon)
+    return np.array(points, dtype=np.float32)
+
+
+class RegionOfInterest:
+    """
+    Restrict the detection to a region of the camera view.
+
+    The region polygon and the exclusion zones are read from the RegionOfInterest section of the config
+    and rasterized once per frame resolution into a mask and a bounding crop. Only the crop of the frame
+    is sent to the detector and detections whose foot point (bottom center of the box) is outside the region
+    or inside an exclusion zone are dropped with one mask lookup per detection.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        section = self.config.get_section_dict('RegionOfInterest')
+        self.polygon = parse_polygon(section.get('Polygon', ''))
+        self.exclusion_zones = [parse_polygon(zone) for zone in section.get('ExclusionZones', '').split('|')
+                                if zone.strip()]
+        self._resolution = None
+        self.mask = None
+        self.crop_box = None
+
+    def _prepare(self, resolution):
+        """
+        Rasterize the region and the exclusion zones for a (w, h) resolution.
+        The mask is 1 where detections are kept and crop_box is [x0, y0, x1, y1] in pixels.
+        """
+        if self._resolution == resolution:
+            return
+        w, h = resolution
+        scale = np.array([w, h], dtype=np.float32)
+        if self.polygon is None:
+            self.mask = np.ones((h, w), dtype=np.uint8)
+            self.crop_box = (0, 0, w, h)
+        else:
+            self.mask = np.zeros((h, w), dtype=np.uint8)
+            points = np.round(self.polygon * scale).astype(np.int32)
+            cv.fillPoly(self.mask, [points], 1)
+            x, y, box_w, box_h = cv.boundingRect(points)
+            x0, y0 = max(x, 0), max(y, 0)
+            self.crop_box = (x0, y0, min(x + box_w, w), min(y + box_h, h))
+        for zone in self.exclusion_zones:
+            cv.fillPoly(self.mask, [np.round(zone * scale).astype(np.int32)], 0)
+        self._resolution = resolution
+
+    def crop(self, cv_image):
+        """
+        Return the bounding crop of the region of interest. The crop is a view on the input frame.
+        """
+        h, w = cv_image.shape[:2]
+        self._prepare((w, h))
+        x0, y0, x1, y1 = self.crop_box
+        return cv_image[y0:y1, x0:x1]
+
+    def to_frame_coordinates(self, boxes):
+        """
+        Map normalized [ymin, xmin, ymax, xmax] boxes of the crop to normalized boxes of the frame.
+        """
+        w, h = self._resolution
+        x0, y0, x1, y1 = self.crop_box
+        scale = np.array([(y1 - y0) / h, (x1 - x0) / w] * 2, dtype=np.float32)
+        offset = np.array([y0 / h, x0 / w] * 2, dtype=np.float32)
+        return np.asarray(boxes, dtype=np.float32).reshape(-1, 4) * scale + offset
+
+    def filter(self, boxes, scores):
+        """
+        Drop the detections whose foot point is outside the region or inside an exclusion zone.
+
+        Args:
+            boxes: [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes in frame coordinates
+            scores: [N] array of scores
+
+        Returns:
+            boxes, scores: The kept detections
+        """
+        w, h = self._resolution
+        foot_x = np.clip(((boxes[:, 1] + boxes[:, 3]) / 2 * w).astype(np.int64), 0, w - 1)
+        foot_y = np.clip((boxes[:, 2] * h).astype(np.int64), 0, h - 1)
+        keep = self.mask[foot_y, foot_x].astype(bool)
+        return boxes[keep], np.asarray(scores)[keep]
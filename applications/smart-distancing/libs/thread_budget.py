@@ -0,0 +1,123 @@
+import os
+
+import cv2 as cv
+
+
+def available_cpus():
+    """ Return the sorted ids of the CPUs that the process may run on. """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ThreadBudget:
+    """
+    Split a budget of CPU cores between the thread pools of the application, so the inference runtime, OpenCV and
+    the web server do not each start one thread per core and oversubscribe the machine.
+
+    The cores are divided into three groups:
+        inference: the intra-op threads of TensorFlow / TFLite and the threads of OpenVINO, split evenly between the
+            detector processes when PoolWorkers is set
+        decode: the threads of OpenCV (cv.setNumThreads) and the frame reader
+        web: the number of frames that the web server encodes concurrently
+    With Affinity the engine thread (and the inference threads it starts) is pinned to the inference and decode
+    cores, the frame reader to the decode cores and the web server threads to the web cores. Threads inherit the
+    affinity of the thread that created them, so the groups are pinned before the pools are created.
+
+    The following parameters are read from the optional ThreadBudget section of the config:
+        Cores: number of cores of the budget (default all of the available cores)
+        DecodeThreads: cores of the decode group (default 1)
+        WebThreads: cores of the web group (default 1)
+        InterOpThreads: inter-op threads of TensorFlow (default 1)
+        OpenVINOStreams: CPU throughput streams of OpenVINO (default 1)
+        Affinity: pin the thread groups to disjoint cores (yes/no, default no)
+    Without the section every runtime keeps its own default.
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.enabled = self.config.has_section('ThreadBudget')
+        section = self.config.get_section_dict('ThreadBudget') if self.enabled else {}
+        cpus = available_cpus()
+        self.cores = min(int(section.get('Cores', 0) or len(cpus)), len(cpus))
+        self.decode_threads = int(section.get('DecodeThreads', 1))
+        self.web_threads = int(section.get('WebThreads', 1))
+        self.inter_op_threads = int(section.get('InterOpThreads', 1))
+        self.openvino_streams = int(section.get('OpenVINOStreams', 1))
+        self.affinity = self.enabled and self.config.get_boolean('ThreadBudget', 'Affinity', fallback=False)
+        if self.decode_threads < 1 or self.web_threads < 1:
+            raise ValueError('DecodeThreads and WebThreads of the ThreadBudget must be at least 1: ',
+                             (self.decode_threads, self.web_threads))
+
+        self.inference_threads = max(self.cores - self.decode_threads - self.web_threads, 1)
+        pool_workers = int(self.config.get_section_dict('Detector').get('PoolWorkers', 0) or 0)
+        self.processes = max(pool_workers, 1)
+        self.threads_per_detector = max(self.inference_threads // self.processes, 1)
+
+        # The groups get consecutive cores of the budget, when the budget is smaller than the sum of the groups
+        # the inference group shares the cores of the decode group
+        cpus = cpus[:self.cores]
+        self.cpus = {
+            'web': cpus[:self.web_threads],
+            'decode': cpus[self.web_threads:self.web_threads + self.decode_threads] or cpus[-1:],
+        }
+        self.cpus['inference'] = cpus[self.web_threads + self.decode_threads:] or self.cpus['decode']
+        self.cpus['engine'] = sorted(set(self.cpus['inference']) | set(self.cpus['decode']))
+
+    def detector_options(self):
+        """ Return the options of the Detector section that pass the budget to the detectors. """
+        return {
+            'NumThreads': str(self.threads_per_detector),
+            'InterOpThreads': str(self.inter_op_threads),
+            'OpenVINOStreams': str(self.openvino_streams),
+        }
+
+    def apply(self, group='engine'):
+        """
+        Apply the budget in the current process before the detector is loaded: set the options of the Detector
+        section that are not set explicitly, the OpenCV and OpenMP thread counts and the affinity of the calling
+        thread.
+        """
+        if not self.enabled:
+            return
+        detector_section = self.config.get_section_dict('Detector')
+        for option, value in self.detector_options().items():
+            if not detector_section.get(option):
+                self.config.set_option_in_section('Detector', option, value)
+        os.environ.setdefault('OMP_NUM_THREADS', str(self.threads_per_detector))
+        cv.setNumThreads(self.decode_threads)
+        self.pin(group)
+
+    def pin(self, group):
+        """ Pin the calling thread (and the threads it creates later) to the cores of a group when Affinity is set. """
+        if self.affinity and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, self.cpus[group])
+
+    def report(self):
+        """ Return the effective allocation of the budget. """
+        return {
+            "cores": self.cores,
+            "inference_threads": self.inference_threads,
+            "detector_processes": self.processes,
+            "threads_per_detector": self.threads_per_detector,
+            "inter_op_threads": self.inter_op_threads,
+            "openvino_streams": self.openvino_streams,
+            "decode_threads": self.decode_threads,
+            "web_threads": self.web_threads,
+            "affinity": {group: cpus for group, cpus in self.cpus.items()} if self.affinity else None,
+        }
+
+    def print_report(self):
+        if not self.enabled:
+            return
+        report = self.report()
+        print('thread budget: %d cores, inference %d threads (%d x %d, inter-op %d, openvino streams %d), '
+              'decode %d, web %d' % (
+                  report["cores"], report["inference_threads"], report["detector_processes"],
+                  report["threads_per_detector"], report["inter_op_threads"], report["openvino_streams"],
+                  report["decode_threads"], report["web_threads"]))
+        if report["affinity"] is not None:
+            print('thread budget affinity: ' + ', '.join(
+                '%s %s' % (group, ','.join(str(cpu) for cpu in cpus)) for group, cpus in report["affinity"].items()))
@@ -0,0 +1,173 @@
+import cv2 as cv
+import numpy as np
+
+
+class TiledDetector:
+    """
+    Run a detector over overlapping tiles of a high resolution frame instead of the whole downscaled frame,
+    so distant pedestrians keep enough pixels to be detected.
+
+    The tile layout is computed once for each frame resolution. All of the tiles of a frame are passed to
+    the detector as one batch (detectors without batch support get them one by one), the boxes are mapped
+    back to normalized frame coordinates and duplicates that are cut by the tile seams are merged.
+    Tiles without motion since the previous frame can be skipped, their previous detections are reused.
+
+    The following parameters are read from the Detector section of the config:
+        TileOverlap: overlap between neighbouring tiles as a fraction of the tile size (default 0.2)
+        TileSize: w,h of the tiles in frame pixels (default the detector's ImageSize)
+        TileMotionThreshold: mean absolute gray level difference under which a tile is skipped (default 0, never skip)
+        TileRefreshInterval: maximum number of frames a tile can be skipped (default 30)
+        TileMergeThreshold: minimum intersection over the smaller box for merging two boxes of different tiles
+            (default 0.6)
+
+    :param config: Is a ConfigEngine instance which provides necessary parameters.
+    :param detector: A Detector instance which runs on the tiles.
+    """
+
+    def __init__(self, config, detector):
+        self.config = config
+        self.detector = detector
+        section = self.config.get_section_dict('Detector')
+        self.image_size = [int(i) for i in section['ImageSize'].split(',')]
+        tile_size = section.get('TileSize', '')
+        self.tile_size = [int(i) for i in tile_size.split(',')] if tile_size else self.image_size[:2]
+        self.overlap = float(section.get('TileOverlap', 0.2))
+        self.motion_threshold = float(section.get('TileMotionThreshold', 0))
+        self.refresh_interval = int(section.get('TileRefreshInterval', 30))
+        self.merge_threshold = float(section.get('TileMergeThreshold', 0.6))
+
+        self._layouts = {}
+        self._previous_gray = None
+        self._cached_boxes = None
+        self._cached_scores = None
+        self._skipped_frames = None
+        self.skipped_tiles = 0
+        self.processed_tiles = 0
+
+    @staticmethod
+    def _tile_starts(length, tile_length, stride):
+        """ Start offsets of the tiles along one axis, the last tile is aligned to the end of the frame. """
+        if length <= tile_length:
+            return np.array([0])
+        starts = np.arange(0, length - tile_length, stride)
+        return np.append(starts, length - tile_length)
+
+    def _layout(self, frame_shape):
+        """
+        Return the tiles of a frame resolution as an [N, 4] int array of [x0, y0, x1, y1] pixel coordinates.
+        Layouts are cached by resolution.
+        """
+        height, width = frame_shape[:2]
+        layout = self._layouts.get((height, width))
+        if layout is None:
+            tile_w, tile_h = min(self.tile_size[0], width), min(self.tile_size[1], height)
+            stride_x = max(int(tile_w * (1 - self.overlap)), 1)
+            stride_y = max(int(tile_h * (1 - self.overlap)), 1)
+            xs = self._tile_starts(width, tile_w, stride_x)
+            ys = self._tile_starts(height, tile_h, stride_y)
+            x0, y0 = [grid.ravel() for grid in np.meshgrid(xs, ys)]
+            layout = np.stack((x0, y0, x0 + tile_w, y0 + tile_h), axis=1)
+            self._layouts[(height, width)] = layout
+            print('tiling %dx%d frames into %d tiles of %dx%d' % (width, height, len(layout), tile_w, tile_h))
+        return layout
+
+    def _moving_tiles(self, rgb_image, layout):
+        """ Return a boolean array which is True for the tiles that should be sent to the detector. """
+        if self.motion_threshold <= 0:
+            return np.ones(len(layout), dtype=bool)
+        gray = cv.cvtColor(rgb_image, cv.COLOR_RGB2GRAY)
+        if self._previous_gray is None or self._previous_gray.shape != gray.shape:
+            moving = np.ones(len(layout), dtype=bool)
+        else:
+            diff = cv.absdiff(gray, self._previous_gray)
+            # Summed area table gives the mean difference of every tile with four lookups
+            integral = cv.integral(diff)
+            x0, y0, x1, y1 = layout.T
+            sums = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+            energy = sums / ((x1 - x0) * (y1 - y0))
+            moving = (energy >= self.motion_threshold) | (self._skipped_frames >= self.refresh_interval)
+        self._previous_gray = gray
+        return moving
+
+    def _detect(self, batch):
+        if hasattr(self.detector, 'batch_inference'):
+            return self.detector.batch_inference(batch)
+        return [self.detector.inference(image) for image in batch]
+
+    def merge_boxes(self, boxes, scores, tile_ids):
+        """
+        Merge boxes of different tiles that describe the same object. Boxes that are cut by a tile seam mostly
+        lie inside the box of the same object from the neighbouring tile, so the intersection is measured over
+        the smaller box and the union of the merged boxes is kept with the highest score.
+
+        Args:
+            boxes: [N, 4] array of normalized [ymin, xmin, ymax, xmax] boxes in frame coordinates
+            scores: [N] array of scores
+            tile_ids: [N] array of the tile index of each box
+
+        Returns:
+            boxes, scores: The merged boxes and their scores
+        """
+        if len(boxes) == 0:
+            return boxes, scores
+        ymin, xmin, ymax, xmax = boxes.T
+        areas = (ymax - ymin) * (xmax - xmin)
+        order = np.argsort(-scores)
+        merged_boxes, merged_scores = [], []
+        while len(order) > 0:
+            i, rest = order[0], order[1:]
+            inter_h = np.maximum(0, np.minimum(ymax[i], ymax[rest]) - np.maximum(ymin[i], ymin[rest]))
+            inter_w = np.maximum(0, np.minimum(xmax[i], xmax[rest]) - np.maximum(xmin[i], xmin[rest]))
+            smaller_area = np.maximum(np.minimum(areas[i], areas[rest]), 1e-12)
+            duplicated = ((inter_h * inter_w / smaller_area) > self.merge_threshold) & (tile_ids[rest] != tile_ids[i])
+            group = np.append(i, rest[duplicated])
+            merged_boxes.append([ymin[group].min(), xmin[group].min(), ymax[group].max(), xmax[group].max()])
+            merged_scores.append(scores[i])
+            order = rest[~duplicated]
+        return np.array(merged_boxes, dtype=np.float32), np.array(merged_scores, dtype=np.float32)
+
+    def inference(self, rgb_image):
+        """
+        Detect objects on the tiles of a frame.
+
+        Args:
+            rgb_image: uint8 numpy array with shape (img_height, img_width, channels) at display resolution
+
+        Returns:
+            boxes: float32 array of shape [N, 4], normalized [ymin, xmin, ymax, xmax] of each detected object
+            scores: float32 array of shape [N], the score of each detected object
+        """
+        height, width = rgb_image.shape[:2]
+        layout = self._layout(rgb_image.shape)
+        if self._cached_boxes is None or len(self._cached_boxes) != len(layout):
+            self._cached_boxes = [np.zeros((0, 4), dtype=np.float32)] * len(layout)
+            self._cached_scores = [np.zeros(0, dtype=np.float32)] * len(layout)
+            self._skipped_frames = np.zeros(len(layout), dtype=np.int64)
+        moving = self._moving_tiles(rgb_image, layout)
+        indices = np.flatnonzero(moving)
+        self._skipped_frames[~moving] += 1
+        self._skipped_frames[moving] = 0
+        self.skipped_tiles += len(layout) - len(indices)
+        self.processed_tiles += len(indices)
+
+        if len(indices) > 0:
+            detector_size = tuple(self.image_size[:2])
+            batch = np.empty((len(indices), detector_size[1], detector_size[0], 3), dtype=np.uint8)
+            for batch_index, tile_index in enumerate(indices):
+                x0, y0, x1, y1 = layout[tile_index]
+                tile = rgb_image[y0:y1, x0:x1]
+                if tile.shape[1::-1] != detector_size:
+                    tile = cv.resize(tile, detector_size)
+                batch[batch_index] = tile
+            for tile_index, (boxes, scores) in zip(indices, self._detect(batch)):
+                # Map the normalized tile boxes to normalized frame coordinates
+                x0, y0, x1, y1 = layout[tile_index]
+                offset = np.array([y0 / height, x0 / width, y0 / height, x0 / width], dtype=np.float32)
+                scale = np.array([(y1 - y0) / height, (x1 - x0) / width] * 2, dtype=np.float32)
+                self._cached_boxes[tile_index] = np.asarray(boxes, dtype=np.float32).reshape(-1, 4) * scale + offset
+                self._cached_scores[tile_index] = np.asarray(scores, dtype=np.float32).reshape(-1)
+
+        tile_ids = np.concatenate([np.full(len(scores), i, dtype=np.int64) for i, scores in enumerate(self._cached_scores)])
+        boxes = np.concatenate(self._cached_boxes)
+        scores = np.concatenate(self._cached_scores)
+        return self.merge_boxes(boxes, scores, tile_ids)
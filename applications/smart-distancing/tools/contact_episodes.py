@@ -0,0 +1,82 @@
+"""
+Incremental tracking of contact episodes, i.e. the time spans in which two tracked objects (people) stay closer
+than the distance threshold.
+"""
+from collections import namedtuple
+
+from tools.objects_post_process import extract_violating_objects
+
+ContactEpisode = namedtuple("ContactEpisode", ["object_0", "object_1", "start", "end", "min_distance", "frames"])
+
+
+class ContactEpisodeTracker:
+    """
+    Open, extend and close contact episodes of object pairs that are keyed by their stable tracker ids.
+
+    Each open episode is one entry of a dictionary keyed by the (smaller id, larger id) pair, so a frame only
+    touches the pairs that are violating in it. An episode is closed when its pair has not been violating for
+    more than max_gap seconds. The number of open episodes is bounded by max_open_episodes, when it is reached
+    the episodes that were seen least recently are closed first, so memory does not grow with the run time.
+
+    :param dist_threshold: The minimum distance for considering unsafe distance between objects
+    :param max_gap: Seconds a pair can be apart (or missed by the detector) without closing its episode
+    :param max_open_episodes: Maximum number of episodes that are kept open at the same time
+    """
+
+    def __init__(self, dist_threshold, max_gap=1.0, max_open_episodes=10000):
+        self.dist_threshold = float(dist_threshold)
+        self.max_gap = float(max_gap)
+        self.max_open_episodes = int(max_open_episodes)
+        # (object_0, object_1) -> [start, last_seen, min_distance, frames]
+        self._open_episodes = {}
+
+    def __len__(self):
+        return len(self._open_episodes)
+
+    @staticmethod
+    def _close(pair, episode):
+        start, last_seen, min_distance, frames = episode
+        return ContactEpisode(pair[0], pair[1], start, last_seen, min_distance, frames)
+
+    def update(self, timestamp, track_ids, distances, violating_objects=None):
+        """
+        Update the episodes with the distances of a frame.
+
+        Args:
+            timestamp: Time of the frame in seconds
+            track_ids: A list of the stable tracker id of each object, in the order of the distance matrix rows
+            distances: A 2-d numpy array that stores distance between each pair of objects.
+            violating_objects: The violating index pairs of the frame if they are already extracted
+
+        Returns:
+            closed_episodes: A list of ContactEpisode tuples that were closed by this frame
+        """
+        if violating_objects is None:
+            violating_objects = extract_violating_objects(distances, self.dist_threshold)
+        for i, j in violating_objects:
+            id_0, id_1 = track_ids[i], track_ids[j]
+            pair = (id_0, id_1) if id_0 < id_1 else (id_1, id_0)
+            distance = float(distances[i, j])
+            episode = self._open_episodes.get(pair)
+            if episode is None:
+                self._open_episodes[pair] = [timestamp, timestamp, distance, 1]
+            else:
+                episode[1] = timestamp
+                episode[2] = min(episode[2], distance)
+                episode[3] += 1
+
+        closed_pairs = [pair for pair, episode in self._open_episodes.items()
+                        if timestamp - episode[1] > self.max_gap]
+        overflow = len(self._open_episodes) - len(closed_pairs) - self.max_open_episodes
+        if overflow > 0:
+            closed = set(closed_pairs)
+            remaining = [pair for pair in self._open_episodes if pair not in closed]
+            remaining.sort(key=lambda pair: self._open_episodes[pair][1])
+            closed_pairs.extend(remaining[:overflow])
+        return [self._close(pair, self._open_episodes.pop(pair)) for pair in closed_pairs]
+
+    def flush(self):
+        """ Close all of the open episodes, e.g. at the end of a video, and return them. """
+        closed_episodes = [self._close(pair, episode) for pair, episode in self._open_episodes.items()]
+        self._open_episodes.clear()
+        return closed_episodes
@@ -3,13 +3,14 @@ Set of functions related to calculating environment score for physical distancin
 """
 import numpy as np
 
-# TODO: consider these as a parameter; In the future, depend on the project, they may be moved at a separate config file
+# Default capacities, they can be set per camera with MaxCapacity and MaxAcceptableCapacity in the PostProcessor section
 MAX_ACCEPTABLE_CAPACITY = 20  # The maximum number of people that can stand as far away from other people as possible
 MAX_CAPACITY = 60  # The maximum number of people in the environment
 
 
 def mx_environment_scoring_consider_crowd(
-        detected_pedestrians: int, violating_pedestrians: int
+        detected_pedestrians: int, violating_pedestrians: int, max_capacity: int = MAX_CAPACITY,
+        max_acceptable_capacity: int = MAX_ACCEPTABLE_CAPACITY
 ) -> np.float64:
     """
     This function calculates the environment score based on the crowd and acceptable number of objects, and violating
@@ -18,6 +19,8 @@ def mx_environment_scoring_consider_crowd(
     Args:
         detected_pedestrians: Number of detected objects (people)
         violating_pedestrians: Number of violating objects (people)
+        max_capacity: The maximum number of people in the environment
+        max_acceptable_capacity: The maximum number of people that can stand as far away from other people as possible
 
     Returns:
         env_score: The normalized score of environment (0 is bad and 1 is good)
@@ -44,7 +47,7 @@ def mx_environment_scoring_consider_crowd(
     env_score = 1 - np.minimum(
         (
                 (violating_pedestrians + detected_pedestrians)
-                / (MAX_CAPACITY + MAX_ACCEPTABLE_CAPACITY)
+                / (max_capacity + max_acceptable_capacity)
         ),
         1,
     )
@@ -52,7 +55,9 @@ def mx_environment_scoring_consider_crowd(
     return env_score
 
 
-def mx_environment_scoring(violating_pedestrians: int) -> np.float64:
+def mx_environment_scoring(
+        violating_pedestrians: int, max_acceptable_capacity: int = MAX_ACCEPTABLE_CAPACITY
+) -> np.float64:
     """
     This function calculates the environment score based on acceptable number of object in an environment,
     and the violating objects.
@@ -60,11 +65,12 @@ def mx_environment_scoring(violating_pedestrians: int) -> np.float64:
 
     Args:
         violating_pedestrians: Number of violating objects (people)
+        max_acceptable_capacity: The maximum number of people that can stand as far away from other people as possible
 
     Returns:
         env_score: The normalized score of environment (0 is bad and 1 is good)
 
     """
-    env_score = 1 - np.minimum((violating_pedestrians / MAX_ACCEPTABLE_CAPACITY), 1)
+    env_score = 1 - np.minimum((violating_pedestrians / max_acceptable_capacity), 1)
     env_score = np.round(env_score, 2)
     return env_score
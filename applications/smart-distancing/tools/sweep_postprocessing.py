@@ -0,0 +1,105 @@
+"""
+Evaluate a grid of post-processing parameters on the recorded detections of a video.
+
+Record the detections once by running the app with "DetectionCache: record" in the App section, then run e.g.
+
+    python3 -m tools.sweep_postprocessing --config config-x86.ini --processes 4 \\
+        --param NMSThreshold=0.9,0.98 --param DistThreshold=100,150,200 --param MaxTrackFrame=5,10
+
+Parameters without a section are read from the PostProcessor section, other sections can be given as
+Section.Option=values. Every setting is evaluated in a separate process on the cached detections and the violation
+and count statistics of each setting are printed as a table.
+"""
+import argparse
+import itertools
+import multiprocessing as mp
+import shutil
+import tempfile
+
+import numpy as np
+
+from tools.contact_episodes import ContactEpisodeTracker
+from tools.environment_score import mx_environment_scoring_consider_crowd
+from tools.objects_post_process import extract_violating_objects
+
+
+def parse_param(param):
+    """ Parse "Section.Option=v1,v2" into ((section, option), [v1, v2]). """
+    key, values = param.split('=', 1)
+    section, option = key.split('.', 1) if '.' in key else ('PostProcessor', key)
+    return (section, option), [value.strip() for value in values.split(',')]
+
+
+def evaluate(args):
+    """ Replay the cached detections with one setting and return its statistics. """
+    config_path, setting, fps = args
+    from libs.config_engine import ConfigEngine
+    from libs.core import Distancing
+
+    config = ConfigEngine(config_path)
+    log_directory = tempfile.mkdtemp()
+    try:
+        config.set_option_in_section('App', 'DetectionCache', 'replay')
+        config.set_option_in_section('Logger', 'LogDirectory', log_directory)
+        for (section, option), value in setting:
+            config.set_option_in_section(section, option, value)
+        engine = Distancing(config)
+        section = config.get_section_dict('PostProcessor')
+        dist_threshold = float(section['DistThreshold'])
+        max_capacity = int(section.get('MaxCapacity', 60))
+        max_acceptable_capacity = int(section.get('MaxAcceptableCapacity', 20))
+        contact_episodes = ContactEpisodeTracker(dist_threshold)
+
+        detected, violating, scores, episodes = [], [], [], []
+        for frame_index, (objects, distancings) in enumerate(engine.process_detection_cache()):
+            violating_objects = extract_violating_objects(distancings, dist_threshold)
+            detected.append(len(objects))
+            violating.append(len(violating_objects))
+            scores.append(mx_environment_scoring_consider_crowd(len(objects), len(violating_objects), max_capacity,
+                                                                max_acceptable_capacity))
+            track_ids = [object_item.get("trackId", i) for i, object_item in enumerate(objects)]
+            episodes.extend(contact_episodes.update(frame_index / fps, track_ids, distancings, violating_objects))
+        episodes.extend(contact_episodes.flush())
+    finally:
+        shutil.rmtree(log_directory, ignore_errors=True)
+
+    detected, violating = np.array(detected), np.array(violating)
+    durations = np.array([episode.end - episode.start for episode in episodes])
+    return {
+        "setting": ' '.join('%s=%s' % (option, value) for (_, option), value in setting),
+        "frames": len(detected),
+        "mean_detected": detected.mean() if len(detected) else 0.0,
+        "max_detected": detected.max() if len(detected) else 0,
+        "mean_violating": violating.mean() if len(violating) else 0.0,
+        "violating_frames": (violating > 0).mean() if len(violating) else 0.0,
+        "mean_env_score": np.mean(scores) if len(scores) else 0.0,
+        "episodes": len(episodes),
+        "mean_episode_duration": durations.mean() if len(durations) else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', required=True)
+    parser.add_argument('--param', action='append', default=[], help='Section.Option=value1,value2,...')
+    parser.add_argument('--processes', type=int, default=mp.cpu_count())
+    parser.add_argument('--fps', type=float, default=30.0, help='frame rate of the video for the episode durations')
+    args = parser.parse_args()
+
+    params = [parse_param(param) for param in args.param]
+    keys = [key for key, _ in params]
+    settings = [list(zip(keys, values)) for values in itertools.product(*[values for _, values in params])]
+    with mp.get_context('spawn').Pool(max(1, min(args.processes, len(settings)))) as pool:
+        results = pool.map(evaluate, [(args.config, setting, args.fps) for setting in settings])
+
+    print('%-50s %7s %9s %8s %10s %9s %8s %9s %10s' % (
+        'setting', 'frames', 'detected', 'max_det', 'violating', 'viol_frm', 'score', 'episodes', 'episode_s'))
+    for result in results:
+        print('%-50s %7d %9.2f %8d %10.2f %9.2f %8.2f %9d %10.2f' % (
+            result["setting"], result["frames"], result["mean_detected"], result["max_detected"],
+            result["mean_violating"], result["violating_frames"], result["mean_env_score"], result["episodes"],
+            result["mean_episode_duration"]))
+
+
+if __name__ == '__main__':
+    main()
@@ -466,6 +466,27 @@ def birds_eye_view(input_frame, boxes, is_violating):
     return input_frame
 
 
+def birds_eye_view_from_points(input_frame, points, is_violating):
+    """
+    This function receives a black window and draw circles at the ground plane positions of the objects.
+    Args:
+        input_frame: uint8 numpy array with shape (img_height, img_width, 3)
+        points: A numpy array of shape [N, 2], the normalized x,y positions on the ground plane
+        is_violating: List of boolean (True/False) which indicates the correspond object at points is
+        a violating object or not
+
+    Returns:
+        input_frame: Frame with red and green circles
+
+    """
+    h, w = input_frame.shape[0:2]
+    pixels = np.round(np.asarray(points).reshape(-1, 2) * [w, h]).astype(np.int64)
+    for i, (center_x, center_y) in enumerate(pixels.tolist()):
+        color = (0, 0, 255) if is_violating[i] else (0, 255, 0)
+        input_frame = cv.circle(input_frame, (center_x, center_y), 2, color, 2)
+    return input_frame
+
+
 def text_putter(input_frame, txt, origin, fontscale=0.75, color=(255, 0, 20), thickness=2):
     """
     The function renders the specified text string in the image. This function does not return a
@@ -1,3 +1,6 @@
+import io
+import os
+import sys
 import threading
 import time
 import cv2 as cv
@@ -6,10 +9,13 @@ from datetime import date
 from flask import Flask
 from flask import render_template
 from flask import Response
+from flask import jsonify
+
+# The profiling endpoints are shared by the applications under applications/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from common.profiler import register_admin_routes  # noqa: E402
 
 from .utils import visualization_utils as vis_util
-from tools.objects_post_process import extract_violating_objects
-from tools.environment_score import mx_environment_scoring_consider_crowd
 
 
 class WebGUI:
@@ -28,6 +34,9 @@ class WebGUI:
         self._output_frame = None
         self._birds_view = None
         self._lock = threading.Lock()
+        # At most WebThreads frames of the ThreadBudget are encoded at the same time, whatever the number of clients
+        self._thread_budget = self.__ENGINE_INSTANCE.thread_budget
+        self._encoder_slots = threading.BoundedSemaphore(self._thread_budget.web_threads)
         self._host = self.config.get_section_dict("App")["Host"]
         self._port = int(self.config.get_section_dict("App")["Port"])
         self.app = self.create_flask_app()
@@ -36,7 +45,11 @@ class WebGUI:
 
         # TODO: read from config file
         file_name = str(date.today()) + '.csv'
-        self.objects_log = './static/data/objects_log/' + file_name
+        # With Aggregate the logger writes one row per interval to its own directory
+        if self.config.get_boolean("Logger", "Aggregate", fallback=False):
+            self.objects_log = './static/data/aggregates_log/' + file_name
+        else:
+            self.objects_log = './static/data/objects_log/' + file_name
 
     def update(self, input_frame, nn_out, distances):
         """
@@ -72,9 +85,15 @@ class WebGUI:
             use_normalized_coordinates=True,
             line_thickness=3,
         )
-        # TODO: Implement perspective view for objects
-        birds_eye_window = vis_util.birds_eye_view(birds_eye_window, output_dict["detection_boxes"],
-                                                   output_dict["violating_objects"])
+        ground_plane = self.__ENGINE_INSTANCE.ground_plane
+        if ground_plane is not None:
+            # Draw the objects at their projected ground plane positions
+            ground_points = ground_plane.normalize([obj["groundPoint"] for obj in nn_out])
+            birds_eye_window = vis_util.birds_eye_view_from_points(birds_eye_window, ground_points,
+                                                                   output_dict["violating_objects"])
+        else:
+            birds_eye_window = vis_util.birds_eye_view(birds_eye_window, output_dict["detection_boxes"],
+                                                       output_dict["violating_objects"])
         try:
             self._displayed_items['fps'] = self.__ENGINE_INSTANCE.detector.fps
         except:
@@ -91,11 +110,18 @@ class WebGUI:
         # -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_-
         # endregion
 
+        # Put the age of live frames to the frame
+        frame_reader = self.__ENGINE_INSTANCE.frame_reader
+        if frame_reader is not None and frame_reader.frame_age is not None:
+            txt_frame_age = 'Frame age = %d ms, dropped = %d' % (1000 * frame_reader.frame_age,
+                                                                 frame_reader.dropped_frames)
+            vis_util.text_putter(input_frame, txt_frame_age, (0.05, 0.88))
+
         # Put environment score to the frame
         # region
         # -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_- -_-
-        violating_objects = extract_violating_objects(distances, self._dist_threshold)
-        env_score = mx_environment_scoring_consider_crowd(len(nn_out), len(violating_objects))
+        # The environment score of the frame is computed once by the statistics of the engine
+        env_score = self.__ENGINE_INSTANCE.statistics.environment_score
         txt_env_score = 'Env Score = ' + str(env_score)  # Env Score = 0.7
         origin = (0.05, 0.98)
         vis_util.text_putter(input_frame, txt_env_score, origin)
@@ -138,6 +164,32 @@ class WebGUI:
             path = [self.objects_log]
             return render_template("visualizer.html", csv_path=path)
 
+        @app.route("/heatmap/<name>.png", methods=['GET'])
+        def heatmap_image(name):
+            # Return the occupancy or the violations heatmap rendered at the App resolution
+            if name not in ("occupancy", "violations"):
+                return Response("Unknown heatmap", status=404)
+            resolution = [int(i) for i in self.config.get_section_dict("App")["Resolution"].split(",")]
+            (flag, encoded_heatmap) = cv.imencode(".png", self.__ENGINE_INSTANCE.heatmap.render(name, resolution))
+            return Response(bytearray(encoded_heatmap), mimetype="image/png")
+
+        @app.route("/heatmap/<name>.npy", methods=['GET'])
+        def heatmap_array(name):
+            # Return the raw counts of the occupancy or the violations grid as a .npy file
+            if name not in ("occupancy", "violations"):
+                return Response("Unknown heatmap", status=404)
+            buffer = io.BytesIO()
+            np.save(buffer, self.__ENGINE_INSTANCE.heatmap.get_grid(name))
+            return Response(buffer.getvalue(), mimetype="application/octet-stream")
+
+        @app.route("/statistics", methods=['GET'])
+        def statistics():
+            # Return the statistics of the last frame and of the last 1 minute, 15 minutes and 1 hour as json
+            return jsonify(self.__ENGINE_INSTANCE.statistics.summary())
+
+        if self.config.get_boolean("App", "AdminEndpoints", fallback=False):
+            register_admin_routes(app)
+
         return app
 
     def _generate(self, out_frame: int):
@@ -155,25 +207,22 @@ class WebGUI:
                 # The iteration of the loop
                 if self._output_frame is None:
                     continue
-                # Encode the frames in JPEG format
-                (flag, encoded_birds_eye_img) = cv.imencode(".jpeg", self._birds_view)
-                (flag, encoded_input_img) = cv.imencode(".jpeg", self._output_frame)
-                # Ensure the frame was successfully encoded
-                if not flag:
-                    continue
+                # update replaces the frames by new copies, so they can be encoded outside of the lock
+                frame = self._output_frame if out_frame == 1 else self._birds_view
+            # Encode the frame in JPEG format
+            with self._encoder_slots:
+                (flag, encoded_img) = cv.imencode(".jpeg", frame)
+            # Ensure the frame was successfully encoded
+            if not flag:
+                continue
 
             # Yield the output frame in the byte format
-            encoded_input_frame = (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + bytearray(encoded_input_img) + b"\r\n")
-
-            encoded_birds_eye_frame = (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + bytearray(encoded_birds_eye_img) + b"\r\n")
-
-            yield encoded_input_frame if out_frame == 1 else encoded_birds_eye_frame
+            yield (b"--frame\r\n"
+                   b"Content-Type: image/jpeg\r\n\r\n" + bytearray(encoded_img) + b"\r\n")
 
     def _run(self):
+        # The request threads of the server inherit the web cores of the ThreadBudget
+        self._thread_budget.pin('web')
         self.app.run(
             host=self._host, port=self._port, debug=True, threaded=True, use_reloader=False,
         )
@@ -0,0 +1,67 @@
+"""
+Recorded inputs of the benchmark workloads. The frames are generated from a fixed seed and encoded to a video file
+once per run, so the workloads decode the same frames on every machine without shipping a video in the repo.
+"""
+import os
+
+import cv2 as cv
+import numpy as np
+
+
+def record_video(path, frame_count=150, resolution=(640, 480), fps=15, seed=0):
+    """
+    Write a video of people-sized blobs walking over a textured background and return its path. An existing file
+    is reused.
+    """
+    if os.path.isfile(path):
+        return path
+    w, h = resolution
+    rng = np.random.RandomState(seed)
+    background = cv.GaussianBlur(rng.randint(0, 255, (h, w, 3), dtype=np.uint8), (0, 0), 5)
+    count = 20
+    positions = rng.uniform(0, 1, size=(count, 2)) * (w, h)
+    velocities = rng.uniform(-4, 4, size=(count, 2))
+    sizes = rng.uniform(0.05, 0.2, size=count) * h
+    colors = rng.randint(0, 255, size=(count, 3))
+
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*'MJPG'), fps, (w, h))
+    for frame_number in range(frame_count):
+        frame = background.copy()
+        points = np.abs((positions + frame_number * velocities) % (2 * np.array([w, h])) - (w, h))
+        for (x, y), size, color in zip(points, sizes, colors):
+            cv.ellipse(frame, (int(x), int(y)), (int(size * 0.2), int(size * 0.5)), 0, 0, 360,
+                       tuple(int(c) for c in color), -1)
+            cv.circle(frame, (int(x), int(y - size * 0.6)), int(size * 0.15), (180, 200, 230), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def iterate_frames(path):
+    """ Decode the frames of a video one by one. """
+    capture = cv.VideoCapture(path)
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        yield frame
+    capture.release()
+
+
+class Fixture:
+    """
+    The inputs of a workload: the recorded video and a scratch directory for its outputs.
+
+    :param video_path: Path of the recorded video
+    :param scratch_directory: Directory that is removed after the run
+    """
+
+    def __init__(self, video_path, scratch_directory):
+        self.video_path = video_path
+        self.scratch_directory = scratch_directory
+
+    def scratch(self, name):
+        """ Return a new directory in the scratch directory. """
+        path = os.path.join(self.scratch_directory, name)
+        os.makedirs(path, exist_ok=True)
+        return path
@@ -0,0 +1,188 @@
+"""
+Run the CPU benchmark workloads of the applications and compare them to the baseline.
+
+Every workload runs in its own process from the directory of its application, so the applications can import
+their own libs packages and the peak RSS of each workload is measured separately. The workloads decode a
+video that is recorded from a fixed seed and use the Dummy devices or dummy backends, so no model or accelerator
+is needed. A workload whose requirements are not installed is skipped.
+
+    python3 benchmarks/run_benchmarks.py                 # compare to benchmarks/baseline.json
+    python3 benchmarks/run_benchmarks.py --only 'smart-distancing/*' --repeat 5
+    python3 benchmarks/run_benchmarks.py --update        # write the results as the new baseline
+
+The run fails (exit code 1) when the median time of a workload is more than --tolerance slower than its baseline,
+or its peak RSS is more than --rss-tolerance larger. Small absolute differences (--min-time-delta and
+--min-rss-delta) are ignored, so noise in very short workloads does not fail the run. The baseline depends on
+the machine, regenerate it with --update on the machine that runs the comparison.
+"""
+import argparse
+import fnmatch
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+APPLICATIONS_DIRECTORY = os.path.join(os.path.dirname(BENCHMARKS_DIRECTORY), 'applications')
+sys.path.insert(0, BENCHMARKS_DIRECTORY)
+
+from fixtures import Fixture, record_video  # noqa: E402
+from workloads import MODULES  # noqa: E402
+
+
+def list_workloads():
+    """ Return the "app/workload" keys of all workloads and the module that defines each. """
+    keys = {}
+    for app, module_name in MODULES.items():
+        module = importlib.import_module(module_name)
+        for name in module.WORKLOADS:
+            keys[app + '/' + name] = module
+    return keys
+
+
+def peak_rss_mb():
+    import resource
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024.0 * 1024.0) if sys.platform == 'darwin' else maxrss / 1024.0
+
+
+def run_child(key, video_path, scratch_directory, repeat, output_path):
+    """ Set up and time one workload in the current process and write the result to output_path. """
+    app, name = key.split('/', 1)
+    module = importlib.import_module(MODULES[app])
+    setup, requires = module.WORKLOADS[name]
+    result = {"key": key}
+    missing = [requirement for requirement in requires if importlib.util.find_spec(requirement) is None]
+    if missing:
+        result["skipped"] = "missing " + ', '.join(missing)
+    else:
+        app_directory = os.path.join(APPLICATIONS_DIRECTORY, module.APP)
+        os.chdir(app_directory)
+        for path in [app_directory] + [os.path.join(app_directory, path) for path in module.PATHS]:
+            sys.path.insert(1, path)
+        run = setup(Fixture(video_path, scratch_directory))
+        run()  # Warm up
+        times = []
+        for _ in range(repeat):
+            t_begin = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - t_begin)
+        result.update({"median_s": statistics.median(times), "min_s": min(times), "repeat": repeat,
+                       "peak_rss_mb": peak_rss_mb()})
+    with open(output_path, 'w') as output_file:
+        json.dump(result, output_file)
+
+
+def run_workload(key, video_path, scratch_directory, repeat):
+    """ Run a workload in a new process and return its result. """
+    output_path = os.path.join(scratch_directory, 'result.json')
+    command = [sys.executable, os.path.abspath(__file__), '--child', key, '--video', video_path,
+               '--scratch', scratch_directory, '--repeat', str(repeat), '--output', output_path]
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if process.returncode != 0 or not os.path.isfile(output_path):
+        return {"key": key, "error": process.stdout.decode(errors='replace')[-4000:]}
+    with open(output_path) as output_file:
+        return json.load(output_file)
+
+
+def compare(result, baseline, args):
+    """ Return the status of a result compared to its baseline entry and a description of the differences. """
+    if "error" in result:
+        return "error", ""
+    if "skipped" in result:
+        return "skipped", result["skipped"]
+    if baseline is None:
+        return "new", ""
+    regressions = []
+    time_delta = result["median_s"] - baseline["median_s"]
+    if time_delta > args.min_time_delta and result["median_s"] > baseline["median_s"] * (1 + args.tolerance):
+        regressions.append('time +%.0f%%' % (100 * time_delta / baseline["median_s"]))
+    rss_delta = result["peak_rss_mb"] - baseline["peak_rss_mb"]
+    if rss_delta > args.min_rss_delta and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + args.rss_tolerance):
+        regressions.append('rss +%.0f%%' % (100 * rss_delta / baseline["peak_rss_mb"]))
+    return ("regression" if regressions else "ok"), ', '.join(regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', action='append', default=[], help='glob of "app/workload" keys to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of every workload after one warm up')
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARKS_DIRECTORY, 'baseline.json'))
+    parser.add_argument('--update', action='store_true', help='write the results to the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase of the time')
+    parser.add_argument('--rss-tolerance', type=float, default=0.2, help='allowed relative increase of the RSS')
+    parser.add_argument('--min-time-delta', type=float, default=0.01, help='seconds that are always allowed')
+    parser.add_argument('--min-rss-delta', type=float, default=10.0, help='megabytes that are always allowed')
+    parser.add_argument('--frames', type=int, default=150, help='frames of the recorded video')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--video', help=argparse.SUPPRESS)
+    parser.add_argument('--scratch', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.video, args.scratch, args.repeat, args.output)
+        return
+
+    keys = [key for key in list_workloads()
+            if not args.only or any(fnmatch.fnmatch(key, pattern) for pattern in args.only)]
+    baseline = {"workloads": {}}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    scratch_directory = tempfile.mkdtemp(prefix='neuralet_benchmarks_')
+    results = []
+    try:
+        video_path = record_video(os.path.join(scratch_directory, 'recorded.avi'), frame_count=args.frames)
+        print('%-45s %10s %10s %10s %10s  %s' % ('workload', 'median_s', 'base_s', 'rss_mb', 'base_mb', 'status'))
+        for key in keys:
+            workload_directory = tempfile.mkdtemp(dir=scratch_directory)
+            result = run_workload(key, video_path, workload_directory, args.repeat)
+            base = baseline["workloads"].get(key)
+            result["status"], result["details"] = compare(result, base, args)
+            results.append(result)
+            print('%-45s %10s %10s %10s %10s  %s %s' % (
+                key, '%.3f' % result["median_s"] if "median_s" in result else '-',
+                '%.3f' % base["median_s"] if base else '-',
+                '%.0f' % result["peak_rss_mb"] if "peak_rss_mb" in result else '-',
+                '%.0f' % base["peak_rss_mb"] if base else '-', result["status"], result["details"]))
+            if result["status"] == "error":
+                print(result["error"])
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.update:
+        for result in results:
+            if "median_s" in result:
+                baseline["workloads"][result["key"]] = {
+                    "median_s": round(result["median_s"], 4), "min_s": round(result["min_s"], 4),
+                    "peak_rss_mb": round(result["peak_rss_mb"], 1)}
+        baseline["machine"] = {"platform": platform.platform(), "processor": platform.processor(),
+                               "cpu_count": os.cpu_count(), "python": platform.python_version()}
+        baseline["frames"] = args.frames
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print('updated the baseline', args.baseline)
+
+    statuses = [result["status"] for result in results]
+    if "error" in statuses:
+        sys.exit(2)
+    if "regression" in statuses and not args.update:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
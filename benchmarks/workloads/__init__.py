@@ -0,0 +1,12 @@
+"""
+The workloads of every application. Each module names the directory of its application in APP, the extra import
+paths relative to it in PATHS, and maps the workload names to (setup, requires) in WORKLOADS. setup(fixture) is
+called in the application directory and returns the function that is timed, requires lists the modules that
+have to be importable, otherwise the workload is skipped.
+"""
+MODULES = {
+    "smart-distancing": "workloads.smart_distancing",
+    "facemask": "workloads.facemask",
+    "pose-estimation-tensorrt": "workloads.pose_estimation_tensorrt",
+    "adaptive-learning": "workloads.adaptive_learning",
+}
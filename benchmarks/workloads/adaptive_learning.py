@@ -0,0 +1,66 @@
+"""
+Workloads of the adaptive-learning teacher with a dummy detector: the loop of teachers/teacher_main.py that
+preprocesses the frames, filters the detections and writes the images and the xml annotations.
+"""
+APP = "adaptive-learning"
+PATHS = ["teachers"]
+
+TEACHER_CONFIG = """
+[Teacher]
+Name: dummy
+ImageSize: 704,576,3
+ClassID: 1
+MinScore: 0.5
+ImagePath: {image_path}
+XmlPath: {xml_path}
+MaxAllowedImage: 10000
+MinDetectionPerFrame: 1
+SaveFrequency: 1
+"""
+
+
+def teacher_pipeline(fixture):
+    """ Preprocess every frame, run a dummy detector and save the frames with their annotations. """
+    import os
+
+    import numpy as np
+    from configs.config_engine import ConfigEngine
+    from fixtures import iterate_frames
+    from teacher_meta_arch import TeacherMetaArch
+
+    class DummyTeacher(TeacherMetaArch):
+        """ Detects 20 fixed boxes that move with the frame number. """
+
+        def __init__(self, config):
+            super(DummyTeacher, self).__init__(config=config)
+            rng = np.random.RandomState(0)
+            self._boxes = rng.uniform(0, 0.7, size=(20, 2))
+            self._sizes = rng.uniform(0.05, 0.3, size=(20, 2))
+            self._frame_number = 0
+
+        def inference(self, preprocessed_image):
+            self._frame_number += 1
+            corners = (self._boxes + 0.001 * self._frame_number) % 0.7
+            return [{"id": "1-" + str(i), "bbox": [x, y, x + w, y + h], "score": 0.9}
+                    for i, ((x, y), (w, h)) in enumerate(zip(corners, self._sizes))]
+
+    config_path = os.path.join(fixture.scratch('teacher'), 'teacher.ini')
+    with open(config_path, 'w') as config_file:
+        config_file.write(TEACHER_CONFIG.format(image_path=fixture.scratch('teacher/images'),
+                                                xml_path=fixture.scratch('teacher/xmls')))
+    config = ConfigEngine(config_path)
+
+    def run():
+        teacher_model = DummyTeacher(config)
+        for cv_image in iterate_frames(fixture.video_path):
+            preprocessed_image = teacher_model.preprocessing(cv_image)
+            raw_results = teacher_model.inference(preprocessed_image)
+            postprocessed_results = teacher_model.postprocessing(raw_results)
+            teacher_model.save_results(cv_image, postprocessed_results)
+
+    return run
+
+
+WORKLOADS = {
+    "teacher_pipeline": (teacher_pipeline, ("lxml",)),
+}
@@ -0,0 +1,60 @@
+"""
+Workloads of facemask on the Dummy device: detection, cropping and classification of the faces of every frame,
+with and without the tracker that caches the labels, and the cropping of 1, 10 and 50 faces into the classifier
+batch.
+"""
+APP = "facemask"
+PATHS = []
+
+
+def pipeline_dummy(tracker):
+    """ Resize every frame, crop and normalize the faces and classify them or take their labels from the tracker. """
+    def setup(fixture):
+        from configs.config_handler import Config
+        from fixtures import iterate_frames
+        from libs.core import FaceMaskAppEngine
+
+        config = Config(path='configs/config-dummy.json')
+        config.TRACKER_ENABLED = tracker
+
+        def run():
+            engine = FaceMaskAppEngine(config)
+            for frame in iterate_frames(fixture.video_path):
+                engine._FaceMaskAppEngine__process(frame)
+
+        return run
+
+    return setup
+
+
+def face_crops(face_count):
+    """ Crop face_count faces from every frame into the classifier batch. """
+    def setup(fixture):
+        import itertools
+
+        import numpy as np
+        from fixtures import iterate_frames
+        from libs.utils.face_crops import FaceCropper
+
+        frames = list(itertools.islice(iterate_frames(fixture.video_path), 50))
+        rng = np.random.RandomState(0)
+        corners = rng.uniform(0, 0.85, size=(face_count, 2))
+        bboxes = np.concatenate((corners, corners + rng.uniform(0.03, 0.15, size=(face_count, 2))), axis=1)
+        cropper = FaceCropper(45)
+
+        def run():
+            for frame in frames:
+                cropper.crop(frame, bboxes)
+
+        return run
+
+    return setup
+
+
+WORKLOADS = {
+    "pipeline_dummy": (pipeline_dummy(False), ()),
+    "pipeline_tracked": (pipeline_dummy(True), ()),
+    "face_crops_1": (face_crops(1), ()),
+    "face_crops_10": (face_crops(10), ()),
+    "face_crops_50": (face_crops(50), ()),
+}
@@ -0,0 +1,52 @@
+"""
+Workloads of pose-estimation-tensorrt that run on the CPU: the PifPaf decoding and soft NMS of decoder.py. The
+TensorRT engine itself needs a GPU, so the decoder is fed with fields that are generated from a fixed seed in the
+layout of the pif, paf and paf25 heads of the engine.
+"""
+import numpy as np
+
+APP = "pose-estimation-tensorrt"
+PATHS = []
+
+KEYPOINTS = 17
+CONNECTIONS = 19
+
+
+def _fields(rng, h, w):
+    """ Generate the fields of one image: an intensity, regressions, spreads and scales for every head. """
+    def intensity(count):
+        # Mostly background with a few confident peaks
+        return (rng.uniform(0, 1, size=(count, h, w)) ** 8).astype(np.float32)
+
+    def regression(count):
+        return rng.uniform(-2, 2, size=(count, 2, h, w)).astype(np.float32)
+
+    def spread(count):
+        return rng.uniform(0, 1, size=(count, h, w)).astype(np.float32)
+
+    pif = [intensity(KEYPOINTS), regression(KEYPOINTS), spread(KEYPOINTS), spread(KEYPOINTS) * 4]
+    paf = [intensity(CONNECTIONS), regression(CONNECTIONS), regression(CONNECTIONS), spread(CONNECTIONS),
+           spread(CONNECTIONS)]
+    paf25 = [intensity(CONNECTIONS), regression(CONNECTIONS), regression(CONNECTIONS), spread(CONNECTIONS),
+             spread(CONNECTIONS)]
+    return [pif, paf, paf25]
+
+
+def decoder(fixture):
+    """ Decode 20 images of 401x401 (51x51 fields at stride 8). """
+    from decoder import PifPafDecoder
+
+    rng = np.random.RandomState(0)
+    images = [_fields(rng, 51, 51) for _ in range(20)]
+    pifpaf_decoder = PifPafDecoder()
+
+    def run():
+        for fields in images:
+            pifpaf_decoder.decode([fields])
+
+    return run
+
+
+WORKLOADS = {
+    "decoder": (decoder, ("openpifpaf",)),
+}
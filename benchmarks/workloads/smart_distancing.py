@@ -0,0 +1,111 @@
+"""
+Workloads of smart-distancing on the Dummy device with 50 people: the whole video pipeline, the replay of recorded
+detections and the post-processing steps on their own.
+"""
+APP = "smart-distancing"
+PATHS = []
+
+
+class NullUI:
+    """ Discards the processed frames, so the pipeline runs without the web server. """
+
+    def update(self, *args):
+        pass
+
+
+def _config(fixture, options=()):
+    from libs.config_engine import ConfigEngine
+
+    config = ConfigEngine('config-dummy.ini')
+    config.set_option_in_section('Detector', 'CrowdSize', '50')
+    config.set_option_in_section('App', 'VideoPath', fixture.video_path)
+    config.set_option_in_section('App', 'CacheDirectory', fixture.scratch('detection_cache'))
+    config.set_option_in_section('Logger', 'LogDirectory', fixture.scratch('logs'))
+    for section, option, value in options:
+        config.set_option_in_section(section, option, value)
+    return config
+
+
+def pipeline_dummy(fixture):
+    """ Decode, detect, track, measure the distances, update the statistics and the heatmap and log every frame. """
+    from libs.core import Distancing
+
+    config = _config(fixture)
+
+    def run():
+        engine = Distancing(config)
+        engine.set_ui(NullUI())
+        engine.process_video(fixture.video_path)
+
+    return run
+
+
+def pipeline_replay(fixture):
+    """ Replay recorded detections through the tracker, the distancing and the statistics. """
+    from libs.core import Distancing
+
+    engine = Distancing(_config(fixture, [('App', 'DetectionCache', 'record')]))
+    engine.set_ui(NullUI())
+    engine.process_video(fixture.video_path)
+    config = _config(fixture, [('App', 'DetectionCache', 'replay')])
+
+    def run():
+        engine = Distancing(config)
+        for objects, distancings in engine.process_detection_cache():
+            engine.statistics.update(objects, distancings)
+
+    return run
+
+
+def distancing_200(fixture):
+    """ Filter, track and measure the distances of 30 frames with 200 people. """
+    from libs.core import Distancing
+    from libs.detectors.dummy.detector import Detector
+
+    config = _config(fixture, [('Detector', 'CrowdSize', '200')])
+    detector = Detector(config)
+    detections = [detector.inference(None) for _ in range(30)]
+
+    resolution = [int(i) for i in config.get_section_dict('App')['Resolution'].split(',')]
+
+    def run():
+        engine = Distancing(config)
+        for boxes, scores in detections:
+            engine.calculate_distancing(engine.detections_to_objects(boxes, scores, resolution))
+
+    return run
+
+
+def delta_track_log(fixture):
+    """ Write the tracks of 1000 frames with 50 people to a delta track log. """
+    import os
+
+    from libs.detectors.dummy.detector import Detector
+    from libs.loggers.delta_track_log import DeltaTrackWriter
+
+    config = _config(fixture)
+    detector = Detector(config)
+    frames = []
+    for _ in range(1000):
+        boxes, scores = detector.inference(None)
+        frames.append([{"id": i, "bbox": [box[1], box[0], box[3], box[2]], "score": score}
+                       for i, (box, score) in enumerate(zip(boxes, scores))])
+    directory = fixture.scratch('tracks')
+
+    def run():
+        writer = DeltaTrackWriter()
+        path = os.path.join(directory, 'tracks.csv')
+        if os.path.exists(path):
+            os.remove(path)
+        for frame_number, objects in enumerate(frames):
+            writer.write(frame_number, objects, path)
+
+    return run
+
+
+WORKLOADS = {
+    "pipeline_dummy": (pipeline_dummy, ()),
+    "pipeline_replay": (pipeline_replay, ()),
+    "distancing_200": (distancing_200, ()),
+    "delta_track_log": (delta_track_log, ()),
+}